@@ -0,0 +1,10 @@
+#!/bin/sh
+set -e
+
+# metrics files of the workers of the previous run would be reported along with the current ones
+if [ -n "$PROMETHEUS_MULTIPROC_DIR" ]; then
+    rm -rf "$PROMETHEUS_MULTIPROC_DIR"
+    mkdir -p "$PROMETHEUS_MULTIPROC_DIR"
+fi
+
+exec "$@"
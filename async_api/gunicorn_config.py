@@ -0,0 +1,8 @@
+from typing import Any
+
+from prometheus_client import multiprocess
+
+
+def child_exit(server: Any, worker: Any) -> None:  # noqa: ARG001
+    """Drop the metrics files of the exited worker, so its live gauges are not reported."""
+    multiprocess.mark_process_dead(worker.pid)  # type: ignore[no-untyped-call]
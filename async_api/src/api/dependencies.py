@@ -1,17 +1,40 @@
-from pydantic import BaseModel, Field
+from typing import Any
+
+from uuid import UUID
+
+from fastapi import HTTPException, Request, status
+from pydantic import BaseModel, Field, field_validator
 
 from core.settings import settings
 from models.value_objects import SortOrder
+from services.known_ids import known_ids
+from utils.metrics import ID_FILTER_REJECTIONS
 
 
 class PaginationParams(BaseModel):
     page_number: int = Field(1, ge=1)
     page_size: int = Field(settings.default_page_size, ge=1)
+    cursor: str | None = Field(
+        None,
+        description="Курсор следующей страницы из заголовка X-Next-Cursor. "
+        "Пустое значение начинает постраничный обход по курсору, номер страницы при этом игнорируется",
+    )
+
+
+def is_cursor_request(pagination_params: PaginationParams, **_: Any) -> bool:
+    """Listings by cursor are not cached: cursors are bound to a short-lived point in time."""
+    return pagination_params.cursor is not None
 
 
 class SortParams(BaseModel):
     sort: str | None = Field(None, min_length=1)
 
+    @field_validator("sort")
+    @classmethod
+    def normalize_sort(cls, sort: str | None) -> str | None:
+        """Ascending order may be given explicitly with `+`, which URLs decode as a space."""
+        return sort.strip().removeprefix("+") if sort else sort
+
     @property
     def sort_by(self) -> str | None:
         if not self.sort:
@@ -23,3 +46,26 @@ class SortParams(BaseModel):
         if not self.sort:
             return None
         return SortOrder.desc if self.sort.startswith("-") else SortOrder.asc
+
+
+class KnownID:
+    """Responds with 404 at once to the IDs ruled out by the ID filter of the namespace.
+
+    The dependency runs before the endpoint, so such lookups do not reach
+    the cache and Elasticsearch.
+    """
+
+    def __init__(self, namespace: str, param: str, detail: str) -> None:
+        self.namespace = namespace
+        self.param = param
+        self.detail = detail
+
+    def __call__(self, request: Request) -> None:
+        try:
+            id_ = str(UUID(request.path_params[self.param]))
+        except ValueError:
+            # malformed IDs are rejected by the validation of the endpoint parameters
+            return
+        if not known_ids.might_exist(self.namespace, id_):
+            ID_FILTER_REJECTIONS.labels(self.namespace).inc()
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=self.detail)
@@ -0,0 +1,16 @@
+from fastapi import APIRouter, Response, status
+
+from utils.metrics import generate_metrics
+
+router = APIRouter()
+
+
+@router.get(
+    "/metrics",
+    status_code=status.HTTP_200_OK,
+    summary="Получить метрики сервиса в формате Prometheus.",
+    include_in_schema=False,
+)
+def get_metrics() -> Response:
+    content, media_type = generate_metrics()
+    return Response(content=content, media_type=media_type)
@@ -1,14 +1,20 @@
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi_cache.decorator import cache
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 
-from api.dependencies import PaginationParams, SortParams
-from api.v1.schemas.films import FilmDetailsSchema, FilmShortSchema
-from core.settings import settings
-from models.film import Film
+from api.dependencies import KnownID, PaginationParams, SortParams, is_cursor_request
+from api.v1.schemas.films import (
+    FilmBatchRequestSchema,
+    FilmDetailsSchema,
+    FilmFacetsSchema,
+    FilmShortSchema,
+)
+from models.film import Film, FilmFacets, FilmShort
 from models.value_objects import FilmID
 from services.film import BaseFilmService, ElasticsearchFilmService
+from services.genre import genre_catalog
+from services.known_ids import known_ids
+from utils.cache import cache, cache_many, normalize_text
 
 router = APIRouter()
 
@@ -20,20 +26,31 @@ router = APIRouter()
     status_code=status.HTTP_200_OK,
     summary="Получить список всех фильмов",
 )
-@cache(expire=settings.cache_ttl_seconds)
+@cache(
+    namespace="films",
+    unless=is_cursor_request,
+    trusted=True,
+    normalize={"genre": genre_catalog.canonical_name},
+)
 async def get_film_list(
     film_service: Annotated[BaseFilmService, Depends(ElasticsearchFilmService)],
     pagination_params: Annotated[PaginationParams, Depends()],
     sort_params: Annotated[SortParams, Depends()],
+    response: Response,
     genre: str | None = None,
-) -> list[Film]:
-    return await film_service.get_list(
+) -> list[FilmShort]:
+    page = await film_service.get_list(
         page=pagination_params.page_number,
         size=pagination_params.page_size,
         sort_by=sort_params.sort_by,
         sort_order=sort_params.sort_order,
         genre=genre,
+        cursor=pagination_params.cursor,
+        trusted=True,
     )
+    if page.next_cursor:
+        response.headers["X-Next-Cursor"] = page.next_cursor
+    return page.items
 
 
 @router.get(
@@ -43,17 +60,47 @@ async def get_film_list(
     status_code=status.HTTP_200_OK,
     summary="Поиск по фильмам",
 )
-@cache(expire=settings.cache_ttl_seconds)
+@cache(
+    namespace="films",
+    unless=is_cursor_request,
+    trusted=True,
+    normalize={"query": normalize_text},
+)
 async def search_films(
     film_service: Annotated[BaseFilmService, Depends(ElasticsearchFilmService)],
     pagination_params: Annotated[PaginationParams, Depends()],
+    response: Response,
     query: str | None = None,
-) -> list[Film]:
-    return await film_service.search(
+) -> list[FilmShort]:
+    page = await film_service.search(
         query=query,
         page=pagination_params.page_number,
         size=pagination_params.page_size,
+        cursor=pagination_params.cursor,
+        trusted=True,
     )
+    if page.next_cursor:
+        response.headers["X-Next-Cursor"] = page.next_cursor
+    return page.items
+
+
+@router.get(
+    "/facets",
+    response_model=FilmFacetsSchema,
+    response_description="Количество фильмов по жанрам и рейтингу",
+    status_code=status.HTTP_200_OK,
+    summary="Получить количество фильмов по жанрам и интервалам рейтинга",
+)
+@cache(
+    namespace="films",
+    trusted=True,
+    normalize={"genre": genre_catalog.canonical_name},
+)
+async def get_film_facets(
+    film_service: Annotated[BaseFilmService, Depends(ElasticsearchFilmService)],
+    genre: str | None = None,
+) -> FilmFacets:
+    return await film_service.get_facets(genre=genre)
 
 
 @router.get(
@@ -62,13 +109,43 @@ async def search_films(
     response_description="Информация о фильме",
     status_code=status.HTTP_200_OK,
     summary="Получить информацию о фильме",
+    dependencies=[Depends(KnownID("films", "film_id", "Film not found"))],
 )
-@cache(expire=settings.cache_ttl_seconds)
+@cache(namespace="films", id_param="film_id", trusted=True)
 async def get_film_details(
     film_id: FilmID,
     film_service: Annotated[BaseFilmService, Depends(ElasticsearchFilmService)],
 ) -> Film:
-    film = await film_service.get_or_none(film_id)
+    film = await film_service.get_or_none(film_id, trusted=True)
     if not film:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Film not found")
     return film
+
+
+@router.post(
+    "/batch",
+    response_model=list[FilmDetailsSchema],
+    response_description="Информация о найденных фильмах",
+    status_code=status.HTTP_200_OK,
+    summary="Получить информацию о нескольких фильмах",
+)
+async def get_films_batch(
+    batch: FilmBatchRequestSchema,
+    film_service: Annotated[BaseFilmService, Depends(ElasticsearchFilmService)],
+    request: Request,
+) -> Response:
+    async def fetch(film_ids: list[FilmID]) -> dict[FilmID, Film]:
+        film_ids = [film_id for film_id in film_ids if known_ids.might_exist("films", str(film_id))]
+        if not film_ids:
+            return {}
+        return {film.id: film for film in await film_service.get_many(film_ids)}
+
+    return await cache_many(
+        get_film_details,
+        list(dict.fromkeys(batch.ids)),
+        fetch,
+        request=request,
+        response_model=FilmDetailsSchema,
+        namespace="films",
+        id_param="film_id",
+    )
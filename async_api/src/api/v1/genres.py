@@ -1,13 +1,12 @@
 from typing import Annotated
 
 from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi_cache.decorator import cache
 
+from api.dependencies import KnownID
 from api.v1.schemas.genres import GenreDetailsSchema
-from core.settings import settings
 from models.genre import Genre
 from models.value_objects import GenreID
-from services.genre import BaseGenreService, ElasticsearchGenreService
+from services.genre import BaseGenreService, CatalogGenreService
 
 router = APIRouter()
 
@@ -18,11 +17,11 @@ router = APIRouter()
     response_description="Информация о жанре",
     status_code=status.HTTP_200_OK,
     summary="Получить информацию о жанре",
+    dependencies=[Depends(KnownID("genres", "genre_id", "Genre not found"))],
 )
-@cache(expire=settings.cache_ttl_seconds)
 async def get_genre_details(
     genre_id: GenreID,
-    genre_service: Annotated[BaseGenreService, Depends(ElasticsearchGenreService)],
+    genre_service: Annotated[BaseGenreService, Depends(CatalogGenreService)],
 ) -> Genre:
     genre = await genre_service.get_or_none(genre_id)
     if not genre:
@@ -37,8 +36,7 @@ async def get_genre_details(
     status_code=status.HTTP_200_OK,
     summary="Получить список всех жанров",
 )
-@cache(expire=settings.cache_ttl_seconds)
 async def get_genres_list(
-    genre_service: Annotated[BaseGenreService, Depends(ElasticsearchGenreService)],
+    genre_service: Annotated[BaseGenreService, Depends(CatalogGenreService)],
 ) -> list[Genre]:
     return await genre_service.get_list()
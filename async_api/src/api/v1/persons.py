@@ -1,14 +1,13 @@
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi_cache.decorator import cache
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 
-from api.dependencies import PaginationParams
+from api.dependencies import KnownID, PaginationParams, is_cursor_request
 from api.v1.schemas.persons import PersonDetailsSchema, PersonFilmDetailedSchema
-from core.settings import settings
 from models.person import Person, PersonFilm
 from models.value_objects import PersonID
 from services.person import BasePersonService, ElasticsearchPersonService
+from utils.cache import cache, normalize_text
 
 router = APIRouter()
 
@@ -20,17 +19,26 @@ router = APIRouter()
     status_code=status.HTTP_200_OK,
     summary="Поиск по персонам",
 )
-@cache(expire=settings.cache_ttl_seconds)
+@cache(
+    namespace="persons",
+    unless=is_cursor_request,
+    normalize={"query": normalize_text},
+)
 async def search_persons(
     person_service: Annotated[BasePersonService, Depends(ElasticsearchPersonService)],
     pagination_params: Annotated[PaginationParams, Depends()],
+    response: Response,
     query: str | None = None,
 ) -> list[Person]:
-    return await person_service.search(
+    page = await person_service.search(
         query=query,
         page=pagination_params.page_number,
         size=pagination_params.page_size,
+        cursor=pagination_params.cursor,
     )
+    if page.next_cursor:
+        response.headers["X-Next-Cursor"] = page.next_cursor
+    return page.items
 
 
 @router.get(
@@ -39,8 +47,9 @@ async def search_persons(
     response_description="Информация о персоне",
     status_code=status.HTTP_200_OK,
     summary="Получить информацию о персоне",
+    dependencies=[Depends(KnownID("persons", "person_id", "Person not found"))],
 )
-@cache(expire=settings.cache_ttl_seconds)
+@cache(namespace="persons", id_param="person_id")
 async def get_person_details(
     person_id: PersonID,
     person_service: Annotated[BasePersonService, Depends(ElasticsearchPersonService)],
@@ -57,8 +66,9 @@ async def get_person_details(
     response_description="Список фильмов, в которых участвовала персона",
     status_code=status.HTTP_200_OK,
     summary="Получить список фильмов, в которых участвовала персона",
+    dependencies=[Depends(KnownID("persons", "person_id", "Person not found"))],
 )
-@cache(expire=settings.cache_ttl_seconds)
+@cache(namespace="persons", id_param="person_id")
 async def get_person_films(
     person_id: PersonID,
     person_service: Annotated[BasePersonService, Depends(ElasticsearchPersonService)],
@@ -1,5 +1,6 @@
 from pydantic import BaseModel, Field
 
+from core.settings import settings
 from models.value_objects import FilmID
 
 
@@ -23,3 +24,22 @@ class FilmDetailsSchema(BaseModel):
     actors: list[IdNameSchema]
     writers: list[IdNameSchema]
     directors: list[IdNameSchema]
+
+
+class GenreFacetSchema(BaseModel):
+    name: str
+    count: int
+
+
+class RatingFacetSchema(BaseModel):
+    rating: float
+    count: int
+
+
+class FilmFacetsSchema(BaseModel):
+    genres: list[GenreFacetSchema]
+    imdb_rating: list[RatingFacetSchema]
+
+
+class FilmBatchRequestSchema(BaseModel):
+    ids: list[FilmID] = Field(..., min_length=1, max_length=settings.films_batch_max_size)
@@ -0,0 +1,13 @@
+from uuid import UUID
+
+from pydantic import BaseModel, Field
+
+
+class SuggestionSchema(BaseModel):
+    uuid: UUID = Field(..., validation_alias="id")
+    name: str
+
+
+class SuggestionsSchema(BaseModel):
+    films: list[SuggestionSchema]
+    persons: list[SuggestionSchema]
@@ -0,0 +1,35 @@
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, Query, status
+
+from api.v1.schemas.suggestions import SuggestionsSchema
+from core.settings import settings
+from models.suggestion import Suggestions
+from services.suggestion import BaseSuggestionService, ElasticsearchSuggestionService
+from utils.cache import cache, normalize_text
+
+router = APIRouter()
+
+
+@router.get(
+    "/",
+    response_model=SuggestionsSchema,
+    response_description="Подсказки по фильмам и персонам",
+    status_code=status.HTTP_200_OK,
+    summary="Автодополнение названий фильмов и имён персон",
+)
+@cache(
+    expire=settings.suggest_cache_ttl_seconds,
+    namespace="suggestions",
+    trusted=True,
+    normalize={"query": normalize_text},
+)
+async def get_suggestions(
+    suggestion_service: Annotated[BaseSuggestionService, Depends(ElasticsearchSuggestionService)],
+    query: Annotated[
+        str,
+        Query(min_length=1, max_length=100, description="Начало названия фильма или имени"),
+    ],
+    size: Annotated[int, Query(ge=1, le=settings.suggest_max_size)] = settings.suggest_default_size,
+) -> Suggestions:
+    return await suggestion_service.suggest(query, size)
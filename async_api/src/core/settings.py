@@ -12,15 +12,93 @@ class Settings(BaseSettings):
     # cache
     redis_url: RedisDsn
     cache_ttl_seconds: int = 300
+    # TTLs of responses by namespace or by namespace and endpoint, the latter win, e.g.
+    # {"films": 600, "films:search_films": 60}; documents and lists of the namespace are
+    # dropped from the cache when the ETL updates the documents, so their TTLs can be long
+    cache_ttl_policy: dict[str, int] = {
+        "films:get_film_details": 3600,
+        "films:get_film_facets": 900,
+        "persons:get_person_details": 3600,
+        "persons:get_person_films": 3600,
+    }
+    # TTLs are changed randomly by up to this fraction, so entries written together expire apart
+    cache_ttl_jitter: float = 0.1
+    # TTLs of the hottest keys counted by the warmer are multiplied by up to this factor
+    cache_ttl_popularity_factor: float = 1.0
+    # clients may keep responses for at most this long: unlike the entries of the cache,
+    # their copies are not dropped when the ETL updates the documents, later they revalidate
+    # the responses with the ETags, 0 makes them revalidate every time
+    cache_client_max_age_seconds: int = 30
+    # expired entries are served for this long while they are refreshed in the background
+    cache_stale_ttl_seconds: int = 60
+    local_cache_ttl_seconds: int = 10
+    local_cache_max_size_bytes: int = 32 * 1024 * 1024
+    cache_lock_enabled: bool = False
+    cache_lock_timeout_seconds: float = 10
+    cache_invalidation_stream: str = "cache-invalidation"
+    # entries of at least this size are compressed before they are stored in Redis, 0 disables
+    cache_compression_min_size_bytes: int = 1024
+    cache_compression_level: int = 1
+    # entries of the most requested keys are refreshed before they become stale,
+    # paths of these keys are saved in Redis and requested on startup to fill the cache
+    cache_warmer_enabled: bool = True
+    cache_warmer_interval_seconds: float = 10
+    cache_refresh_ahead_seconds: int = 30
+    # number of keys counted to find the most requested ones and the number of the ones warmed
+    cache_hot_keys_capacity: int = 1000
+    cache_warm_keys: int = 100
+    cache_warmup_timeout_seconds: float = 30
+    cache_warmup_concurrency: int = 8
+    # 404 responses of document lookups are cached for this long, 0 disables
+    negative_cache_ttl_seconds: int = 30
+
+    # responses of at least this size are gzipped for clients accepting it
+    response_compression_min_size_bytes: int = 1024
+    response_compression_level: int = 6
+    # expired entries are kept for this long to be served while Elasticsearch is unavailable
+    cache_fallback_ttl_seconds: int = 3600
+    # fraction of trusted responses still validated against response models, for debugging
+    trusted_response_validation_rate: float = 0.0
+
+    # latency budget of a request, searches get the time left of it and return partial results
+    # when it runs out; budgets of particular routes are keyed by the path, e.g. /v1/films/
+    request_budget_ms: float = 1000
+    request_budgets_ms: dict[str, float] = {}
 
     # elasticsearch
     elasticsearch_host: str
     es_genres_index: str = "genres"
     es_persons_index: str = "persons"
     es_films_index: str = "movies"
+    # consecutive failures after which requests to Elasticsearch are rejected for a while
+    es_breaker_failure_threshold: int = 5
+    es_breaker_recovery_seconds: float = 10
+    # searches issued within this window are sent as a single _msearch request, 0 disables batching
+    es_msearch_window_ms: float = 1
+    # a batch is sent before the window ends when it reaches this number of searches
+    es_msearch_max_size: int = 32
+    # searches time out this much earlier than the request, so partial results have time to arrive
+    es_timeout_margin_ms: float = 50
+    genre_catalog_refresh_seconds: float = 300
+    genre_catalog_max_size: int = 1000
+    films_rating_facet_interval: float = 1.0
+    # lookups of IDs missing in the Bloom filters of the indexes are answered with 404 at once
+    id_filter_enabled: bool = True
+    id_filter_error_rate: float = 0.01
+    id_filter_scan_size: int = 5000
+    # films, persons and genres are served from this NDJSON export of the indexes if it is set,
+    # suggestions still need Elasticsearch
+    catalog_snapshot_path: Path | None = None
+
+    # suggestions
+    suggest_default_size: int = 5
+    suggest_max_size: int = 20
+    suggest_cache_ttl_seconds: int = 3600
 
     # pagination
     default_page_size: int = 50
+    es_pit_keep_alive: str = "1m"
+    films_batch_max_size: int = 100
 
 
 settings = Settings(_env_file=PROJECT_ROOT / ".env")
@@ -1,8 +1,164 @@
-from elasticsearch import AsyncElasticsearch
+from typing import Any, cast
+
+from collections.abc import Sequence
+from functools import partial
+from http import HTTPStatus
+
+from elastic_transport import (
+    ApiResponse,
+    ApiResponseMeta,
+    ConnectionTimeout,
+    ObjectApiResponse,
+    TransportError,
+)
+from elasticsearch import ApiError, AsyncElasticsearch
+from elasticsearch.exceptions import HTTP_EXCEPTIONS
 
 from core.settings import settings
+from utils.circuit_breaker import CircuitBreaker, CircuitOpenError
+from utils.latency_budget import LatencyBudgetExceededError, latency_budget, search_timeout
+from utils.msearch import MultiSearchBatcher, Search
+
+# errors after which stale cache entries are served instead of failing requests
+UNAVAILABLE_ERRORS = (CircuitOpenError, TransportError, LatencyBudgetExceededError)
+
+# parameters of searches which can be sent in a batch: in the header or in the body under the name
+MSEARCH_HEADER_PARAMS = ("index", "request_cache")
+MSEARCH_BODY_PARAMS = {
+    "query": "query",
+    "from_": "from",
+    "size": "size",
+    "sort": "sort",
+    "source_includes": "_source",
+    "aggs": "aggs",
+    "timeout": "timeout",
+}
+
+breaker = CircuitBreaker(
+    "Elasticsearch",
+    failure_threshold=settings.es_breaker_failure_threshold,
+    recovery_seconds=settings.es_breaker_recovery_seconds,
+)
+
+
+def is_failure(error: Exception, *, budget_limited: bool = False) -> bool | None:
+    """Connection errors, timeouts and server errors are failures, client errors are not.
+
+    Timeouts of requests limited by a latency budget are neither: the budget may be
+    too short for a healthy cluster.
+    """
+    if budget_limited and isinstance(error, ConnectionTimeout):
+        return None
+    if isinstance(error, ApiError):
+        status: int = error.meta.status
+        return status >= HTTPStatus.INTERNAL_SERVER_ERROR or status == HTTPStatus.TOO_MANY_REQUESTS
+    return isinstance(error, TransportError)
+
+
+class GuardedElasticsearch(AsyncElasticsearch):
+    """Client which stops sending requests to Elasticsearch while it is failing.
+
+    Concurrent searches are sent in batches as _msearch requests, which saves
+    the round-trips and the work of the coordinating node at high request rates.
+    Searches made while handling a request are limited by its latency budget.
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        # set on the copies made to send requests with the timeout of a latency budget
+        self.budget_limited = False
+        self.search_batcher = MultiSearchBatcher(
+            self._multi_search,
+            window_seconds=settings.es_msearch_window_ms / 1000,
+            max_size=settings.es_msearch_max_size,
+        )
+
+    async def perform_request(self, *args: Any, **kwargs: Any) -> ApiResponse[Any]:
+        return await breaker.call(
+            partial(super().perform_request, *args, **kwargs),
+            partial(is_failure, budget_limited=self.budget_limited),
+        )
+
+    async def search(self, **kwargs: Any) -> ObjectApiResponse[Any]:
+        """Search within the latency budget of the request, in a batch if possible.
+
+        The time left of the budget is both the timeout of the search in Elasticsearch,
+        after which it returns the hits found so far, and the timeout of the HTTP request.
+        Partial results mark the budget, so the response is flagged and not cached.
+        If the HTTP request times out, the budget is exhausted.
+        """
+        budget = latency_budget.get()
+        request_timeout = None
+        if budget is not None and "timeout" not in kwargs:
+            request_timeout = budget.remaining()
+            if request_timeout <= 0:
+                raise LatencyBudgetExceededError
+            kwargs["timeout"] = search_timeout(request_timeout)
+        try:
+            response = await self._search(request_timeout, **kwargs)
+        except ConnectionTimeout as e:
+            if request_timeout is None:
+                raise
+            raise LatencyBudgetExceededError from e
+        if budget is not None and response.get("timed_out"):
+            budget.partial = True
+        return response
+
+    async def _search(self, request_timeout: float | None, **kwargs: Any) -> ObjectApiResponse[Any]:
+        """Search in a batch unless batching is disabled or the search has other parameters."""
+        params = kwargs.keys() - MSEARCH_BODY_PARAMS.keys() - set(MSEARCH_HEADER_PARAMS)
+        if not settings.es_msearch_window_ms or params or kwargs.get("index") is None:
+            return await AsyncElasticsearch.search(self._with_timeout(request_timeout), **kwargs)
+        header = {name: kwargs.pop(name) for name in MSEARCH_HEADER_PARAMS if name in kwargs}
+        body = {
+            MSEARCH_BODY_PARAMS[name]: value for name, value in kwargs.items() if value is not None
+        }
+        response = await self.search_batcher.search(header, body, request_timeout)
+        return cast(ObjectApiResponse[Any], response)
+
+    async def _multi_search(
+        self,
+        searches: Sequence[Search],
+        request_timeout: float | None,
+    ) -> list[ObjectApiResponse[Any] | ApiError]:
+        client = self._with_timeout(request_timeout)
+        result = await client.msearch(searches=[part for search in searches for part in search])
+        return [unpack_search_response(response, result.meta) for response in result["responses"]]
+
+    def _with_timeout(self, request_timeout: float | None) -> AsyncElasticsearch:
+        if request_timeout is None:
+            return self
+        client = self.options(request_timeout=request_timeout)
+        client.budget_limited = True
+        return client
+
+
+def unpack_search_response(
+    response: dict[str, Any],
+    meta: ApiResponseMeta,
+) -> ObjectApiResponse[Any] | ApiError:
+    """Turn the response to a search of _msearch into what a separate search would give.
+
+    The _msearch request succeeds even if its searches fail, so the errors of the searches
+    which are failures of the cluster are counted by the circuit breaker here.
+    """
+    search_meta = ApiResponseMeta(
+        status=response.get("status", HTTPStatus.OK),
+        http_version=meta.http_version,
+        headers=meta.headers,
+        duration=meta.duration,
+        node=meta.node,
+    )
+    if "error" not in response:
+        return ObjectApiResponse(body=response, meta=search_meta)
+    error_class = HTTP_EXCEPTIONS.get(search_meta.status, ApiError)
+    error = error_class(str(response["error"].get("type")), search_meta, response)
+    if is_failure(error):
+        breaker.record_failure()
+    return error
+
 
-elasticsearch = AsyncElasticsearch(settings.elasticsearch_host)
+elasticsearch = GuardedElasticsearch(settings.elasticsearch_host)
 
 
 def get_elasticsearch() -> AsyncElasticsearch:
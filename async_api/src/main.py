@@ -1,25 +1,107 @@
+import asyncio
+import math
+
 from collections.abc import AsyncIterator
 from contextlib import asynccontextmanager
+from functools import partial
+from pathlib import Path
 
-from fastapi import FastAPI
+from elastic_transport import TransportError
+from fastapi import FastAPI, Request, status
+from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.responses import ORJSONResponse
 from fastapi_cache import FastAPICache
-from fastapi_cache.backends.redis import RedisBackend
 
-from api import health
-from api.v1 import films, genres, persons
+from api import health, metrics
+from api.v1 import films, genres, persons, suggestions
 from core.settings import settings
 from db.elastic import elasticsearch
 from db.redis import redis
+from services.film import ElasticsearchFilmService, InMemoryFilmService
+from services.genre import CatalogGenreService, InMemoryGenreService, genre_catalog
+from services.known_ids import known_ids
+from services.pagination import InvalidCursorError
+from services.person import ElasticsearchPersonService, InMemoryPersonService
+from services.snapshot import CatalogSnapshot, UnsupportedSortError, get_catalog_snapshot
 from utils.cache import key_builder
+from utils.cache_backends import LocalLRUCache, TwoTierBackend
+from utils.cache_codec import CacheCodec
+from utils.cache_invalidation import CacheInvalidator
+from utils.cache_warmer import CacheWarmer
+from utils.circuit_breaker import CircuitOpenError
+from utils.latency_budget import LatencyBudgetExceededError, LatencyBudgetMiddleware
+from utils.metrics import PrometheusMiddleware
+
+
+async def use_catalog_snapshot(app: FastAPI, path: Path) -> None:
+    """Serve films, persons and genres from the snapshot in memory instead of Elasticsearch."""
+    snapshot = await asyncio.to_thread(CatalogSnapshot.load, path)
+    genre_catalog.catalog = snapshot.genres
+    if settings.id_filter_enabled:
+        known_ids.build("films", [str(film.id) for film in snapshot.films])
+        known_ids.build("persons", [str(person.id) for person in snapshot.persons])
+        known_ids.build("genres", [str(genre.id) for genre in snapshot.genres.genres])
+    app.dependency_overrides.update(
+        {
+            get_catalog_snapshot: lambda: snapshot,
+            ElasticsearchFilmService: InMemoryFilmService,
+            ElasticsearchPersonService: InMemoryPersonService,
+            CatalogGenreService: InMemoryGenreService,
+        },
+    )
 
 
 @asynccontextmanager
-async def lifespan(_app: FastAPI) -> AsyncIterator[None]:
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
     await redis.initialize()
-    await elasticsearch.info()
-    FastAPICache.init(RedisBackend(redis), prefix="fastapi-cache", key_builder=key_builder)
+    if not settings.catalog_snapshot_path:
+        await elasticsearch.info()
+    local_cache = LocalLRUCache(
+        max_size_bytes=settings.local_cache_max_size_bytes,
+        max_ttl_seconds=settings.local_cache_ttl_seconds,
+    )
+    codec = (
+        CacheCodec(
+            min_size=settings.cache_compression_min_size_bytes,
+            level=settings.cache_compression_level,
+        )
+        if settings.cache_compression_min_size_bytes
+        else None
+    )
+    FastAPICache.init(
+        TwoTierBackend(redis, local_cache, codec),
+        prefix="fastapi-cache",
+        key_builder=key_builder,
+    )
+    invalidator = CacheInvalidator(redis, settings.cache_invalidation_stream)
+    tasks = []
+    if settings.catalog_snapshot_path:
+        await use_catalog_snapshot(app, settings.catalog_snapshot_path)
+    else:
+        await genre_catalog.reload()
+        invalidator.add_listener("genres", lambda _: genre_catalog.reload_in_background())
+        tasks.append(
+            asyncio.create_task(genre_catalog.run(settings.genre_catalog_refresh_seconds)),
+        )
+        if settings.id_filter_enabled:
+            indexes = {
+                "films": settings.es_films_index,
+                "persons": settings.es_persons_index,
+                "genres": settings.es_genres_index,
+            }
+            for namespace in indexes:
+                invalidator.add_listener(namespace, partial(known_ids.add, namespace))
+            # lookups are not filtered until the IDs are loaded, so startup does not wait for them
+            tasks.append(asyncio.create_task(known_ids.load(elasticsearch, indexes)))
+    tasks.append(asyncio.create_task(invalidator.run()))
+    if settings.cache_warmer_enabled:
+        warmer = CacheWarmer(app, redis, f"{FastAPICache.get_prefix()}:hot-keys")
+        # the worker starts serving after the cache is filled with the entries hot before the deploy
+        await warmer.warm_up()
+        tasks.append(asyncio.create_task(warmer.run()))
     yield
+    for task in tasks:
+        task.cancel()
     await redis.close()
     await elasticsearch.close()
 
@@ -30,7 +112,47 @@ app = FastAPI(
     default_response_class=ORJSONResponse,
     lifespan=lifespan,
 )
+
+
+@app.exception_handler(CircuitOpenError)
+@app.exception_handler(TransportError)
+async def elasticsearch_unavailable_handler(_request: Request, exc: Exception) -> ORJSONResponse:
+    """Fail fast when Elasticsearch is down and there is no cached response to serve."""
+    retry_after = exc.retry_after if isinstance(exc, CircuitOpenError) else 0
+    return ORJSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": "Service temporarily unavailable"},
+        headers={"Retry-After": str(math.ceil(retry_after) or 1)},
+    )
+
+
+@app.exception_handler(LatencyBudgetExceededError)
+async def latency_budget_exceeded_handler(_request: Request, _exc: Exception) -> ORJSONResponse:
+    """Give up on the request which has no time left and no cached response to serve."""
+    return ORJSONResponse(
+        status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+        content={"detail": "Request took too long"},
+    )
+
+
+@app.exception_handler(InvalidCursorError)
+@app.exception_handler(UnsupportedSortError)
+async def bad_request_handler(_request: Request, exc: ValueError) -> ORJSONResponse:
+    return ORJSONResponse(status_code=status.HTTP_400_BAD_REQUEST, content={"detail": str(exc)})
+
+
+# responses which are not precompressed by the cache are gzipped on the fly
+app.add_middleware(
+    GZipMiddleware,
+    minimum_size=settings.response_compression_min_size_bytes,
+    compresslevel=settings.response_compression_level,
+)
+app.add_middleware(PrometheusMiddleware)
+# outermost, so the budget counts the time spent in the other middlewares
+app.add_middleware(LatencyBudgetMiddleware)
 app.include_router(health.router, tags=["Статус"])
+app.include_router(metrics.router, tags=["Статус"])
 app.include_router(films.router, prefix="/v1/films", tags=["Фильмы"])
 app.include_router(persons.router, prefix="/v1/persons", tags=["Персоны"])
 app.include_router(genres.router, prefix="/v1/genres", tags=["Жанры"])
+app.include_router(suggestions.router, prefix="/v1/suggest", tags=["Подсказки"])
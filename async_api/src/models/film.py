@@ -17,6 +17,14 @@ class GenreIdName(BaseModel):
     name: str
 
 
+class FilmShort(BaseModel):
+    """Модель для хранения краткой информации о фильме в списках."""
+
+    id: FilmID
+    title: str
+    imdb_rating: float | None
+
+
 class Film(BaseModel):
     """Модель для хранения информации о фильме."""
 
@@ -31,3 +39,24 @@ class Film(BaseModel):
     actors: list[PersonIdName]
     writers: list[PersonIdName]
     directors: list[PersonIdName]
+
+
+class GenreFacet(BaseModel):
+    """Модель для хранения количества фильмов жанра."""
+
+    name: str
+    count: int
+
+
+class RatingFacet(BaseModel):
+    """Модель для хранения количества фильмов с рейтингом от `rating` до следующего интервала."""
+
+    rating: float
+    count: int
+
+
+class FilmFacets(BaseModel):
+    """Модель для хранения количества фильмов по жанрам и интервалам рейтинга."""
+
+    genres: list[GenreFacet]
+    imdb_rating: list[RatingFacet]
@@ -0,0 +1,17 @@
+from uuid import UUID
+
+from pydantic import BaseModel
+
+
+class Suggestion(BaseModel):
+    """Модель для хранения подсказки автодополнения: идентификатора и отображаемого имени."""
+
+    id: UUID
+    name: str
+
+
+class Suggestions(BaseModel):
+    """Модель для хранения подсказок автодополнения по фильмам и персонам."""
+
+    films: list[Suggestion]
+    persons: list[Suggestion]
@@ -0,0 +1,16 @@
+from typing import Any, TypeVar
+
+from pydantic import BaseModel
+
+M = TypeVar("M", bound=BaseModel)
+
+
+def parse_document(model: type[M], source: dict[str, Any], *, trusted: bool = False) -> M:
+    """Build the model from the source of an Elasticsearch document.
+
+    Trusted sources are not validated: nested values are kept as they are in the source,
+    so such models are only fit to be rendered by trusted endpoints.
+    """
+    if trusted:
+        return model.model_construct(**source)
+    return model.model_validate(source)
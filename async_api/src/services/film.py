@@ -1,6 +1,10 @@
-from typing import Annotated
+from typing import Annotated, Any
+
+import math
 
 from abc import ABC, abstractmethod
+from collections import Counter
+from collections.abc import Sequence
 
 from elasticsearch import AsyncElasticsearch
 from elasticsearch.exceptions import NotFoundError
@@ -8,8 +12,17 @@ from fastapi import Depends
 
 from core.settings import settings
 from db.elastic import get_elasticsearch
-from models.film import Film
+from models.film import Film, FilmFacets, FilmShort, GenreFacet, RatingFacet
 from models.value_objects import FilmID, SortOrder
+from services.documents import parse_document
+from services.genre import genre_catalog
+from services.pagination import Page, search_page, slice_page
+from services.snapshot import CatalogSnapshot, get_catalog_snapshot
+from utils.metrics import track_elasticsearch
+
+# lists return short films, so the rest of the document is not fetched from Elasticsearch
+FILM_SHORT_FIELDS = list(FilmShort.model_fields)
+MAX_RATING = 10
 
 
 class BaseFilmService(ABC):
@@ -22,7 +35,9 @@ class BaseFilmService(ABC):
         sort_by: str | None = None,
         sort_order: SortOrder | None = None,
         genre: str | None = None,
-    ) -> list[Film]:
+        cursor: str | None = None,
+        trusted: bool = False,
+    ) -> Page[FilmShort]:
         pass
 
     @abstractmethod
@@ -32,11 +47,21 @@ class BaseFilmService(ABC):
         query: str | None = None,
         page: int = 1,
         size: int = settings.default_page_size,
-    ) -> list[Film]:
+        cursor: str | None = None,
+        trusted: bool = False,
+    ) -> Page[FilmShort]:
+        pass
+
+    @abstractmethod
+    async def get_facets(self, *, genre: str | None = None) -> FilmFacets:
+        pass
+
+    @abstractmethod
+    async def get_or_none(self, film_id: FilmID, *, trusted: bool = False) -> Film | None:
         pass
 
     @abstractmethod
-    async def get_or_none(self, film_id: FilmID) -> Film | None:
+    async def get_many(self, film_ids: Sequence[FilmID]) -> list[Film]:
         pass
 
 
@@ -44,6 +69,7 @@ class ElasticsearchFilmService(BaseFilmService):
     def __init__(self, elastic: Annotated[AsyncElasticsearch, Depends(get_elasticsearch)]):
         self.elastic = elastic
 
+    @track_elasticsearch
     async def get_list(
         self,
         *,
@@ -52,43 +78,210 @@ class ElasticsearchFilmService(BaseFilmService):
         sort_by: str | None = None,
         sort_order: SortOrder | None = None,
         genre: str | None = None,
-    ) -> list[Film]:
-        query: dict[str, dict[str, dict[str, str | dict[str, str]]]]
-        query = {"match_all": {}}
-        if genre:
-            query = {"bool": {"filter": {"term": {"genres.name.keyword": genre}}}}
-
+        cursor: str | None = None,
+        trusted: bool = False,
+    ) -> Page[FilmShort]:
         sort = None
         if sort_by:
-            sort = {sort_by: {"order": sort_order or SortOrder.asc}}
+            sort = [{sort_by: {"order": sort_order or SortOrder.asc}}]
 
-        result = await self.elastic.search(
+        hits, next_cursor = await search_page(
+            self.elastic,
             index=settings.es_films_index,
-            from_=(page - 1) * size,
-            size=size,
-            query=query,
+            query=self._filter_query(genre),
             sort=sort,
+            page=page,
+            size=size,
+            cursor=cursor,
+            source_includes=FILM_SHORT_FIELDS,
         )
-        return [Film.model_validate(hit["_source"]) for hit in result["hits"]["hits"]]
+        films = [parse_document(FilmShort, hit["_source"], trusted=trusted) for hit in hits]
+        return Page(films, next_cursor)
+
+    @staticmethod
+    def _filter_query(genre: str | None) -> dict[str, Any]:
+        if not genre:
+            return {"match_all": {}}
+        # the filter is case-insensitive for genres known to the catalog
+        genre_name = genre_catalog.catalog.canonical_name(genre)
+        return {"bool": {"filter": {"term": {"genres.name.keyword": genre_name}}}}
 
+    @track_elasticsearch
     async def search(
         self,
         *,
         query: str | None = None,
         page: int = 1,
         size: int = settings.default_page_size,
-    ) -> list[Film]:
-        result = await self.elastic.search(
+        cursor: str | None = None,
+        trusted: bool = False,
+    ) -> Page[FilmShort]:
+        hits, next_cursor = await search_page(
+            self.elastic,
             index=settings.es_films_index,
-            from_=(page - 1) * size,
-            size=size,
             query={"match": {"title": query}} if query else {"match_all": {}},
+            page=page,
+            size=size,
+            cursor=cursor,
+            source_includes=FILM_SHORT_FIELDS,
+        )
+        films = [parse_document(FilmShort, hit["_source"], trusted=trusted) for hit in hits]
+        return Page(films, next_cursor)
+
+    @track_elasticsearch
+    async def get_facets(self, *, genre: str | None = None) -> FilmFacets:
+        """Count films by genres and rating intervals with a single aggregation.
+
+        Only films of the genre are counted if it is given. The request does not fetch
+        any documents, so its result is cached by the shard request cache
+        until the index is refreshed with changes.
+        """
+        interval = settings.films_rating_facet_interval
+        result = await self.elastic.search(
+            index=settings.es_films_index,
+            size=0,
+            query=self._filter_query(genre),
+            request_cache=True,
+            aggs={
+                "genres": {
+                    "terms": {
+                        "field": "genres.name.keyword",
+                        "size": settings.genre_catalog_max_size,
+                    },
+                },
+                "imdb_rating": {
+                    "histogram": {
+                        "field": "imdb_rating",
+                        "interval": interval,
+                        "min_doc_count": 0,
+                        "extended_bounds": {"min": 0, "max": MAX_RATING - interval},
+                    },
+                },
+            },
+        )
+        aggregations = result["aggregations"]
+        return FilmFacets(
+            genres=[
+                GenreFacet(name=bucket["key"], count=bucket["doc_count"])
+                for bucket in aggregations["genres"]["buckets"]
+            ],
+            imdb_rating=[
+                RatingFacet(rating=bucket["key"], count=bucket["doc_count"])
+                for bucket in aggregations["imdb_rating"]["buckets"]
+            ],
         )
-        return [Film.model_validate(hit["_source"]) for hit in result["hits"]["hits"]]
 
-    async def get_or_none(self, film_id: FilmID) -> Film | None:
+    @track_elasticsearch
+    async def get_or_none(self, film_id: FilmID, *, trusted: bool = False) -> Film | None:
         try:
             doc = await self.elastic.get(index=settings.es_films_index, id=str(film_id))
-            return Film.model_validate(doc["_source"])
+            return parse_document(Film, doc["_source"], trusted=trusted)
         except NotFoundError:
             return None
+
+    @track_elasticsearch
+    async def get_many(self, film_ids: Sequence[FilmID]) -> list[Film]:
+        if not film_ids:
+            return []
+        result = await self.elastic.mget(
+            index=settings.es_films_index,
+            ids=[str(film_id) for film_id in film_ids],
+        )
+        return [Film.model_validate(doc["_source"]) for doc in result["docs"] if doc["found"]]
+
+
+class InMemoryFilmService(BaseFilmService):
+    """Serves films from the catalog snapshot in worker memory without network round-trips."""
+
+    def __init__(self, snapshot: Annotated[CatalogSnapshot, Depends(get_catalog_snapshot)]):
+        self.snapshot = snapshot
+
+    async def get_list(
+        self,
+        *,
+        page: int = 1,
+        size: int = settings.default_page_size,
+        sort_by: str | None = None,
+        sort_order: SortOrder | None = None,
+        genre: str | None = None,
+        cursor: str | None = None,
+        trusted: bool = False,  # noqa: ARG002
+    ) -> Page[FilmShort]:
+        positions, next_cursor = slice_page(
+            self.snapshot.order_films(genre=genre, sort_by=sort_by, sort_order=sort_order),
+            version=self.snapshot.version,
+            index=settings.es_films_index,
+            query=genre,
+            sort=[sort_by, sort_order],
+            page=page,
+            size=size,
+            cursor=cursor,
+        )
+        return Page([self.snapshot.film_shorts[position] for position in positions], next_cursor)
+
+    async def search(
+        self,
+        *,
+        query: str | None = None,
+        page: int = 1,
+        size: int = settings.default_page_size,
+        cursor: str | None = None,
+        trusted: bool = False,  # noqa: ARG002
+    ) -> Page[FilmShort]:
+        positions, next_cursor = slice_page(
+            self.snapshot.film_titles.search(query) if query else self.snapshot.order_films(),
+            version=self.snapshot.version,
+            index=settings.es_films_index,
+            query=query,
+            page=page,
+            size=size,
+            cursor=cursor,
+        )
+        return Page([self.snapshot.film_shorts[position] for position in positions], next_cursor)
+
+    async def get_facets(self, *, genre: str | None = None) -> FilmFacets:
+        positions = self.snapshot.get_genre_films(genre)
+        if positions is None:
+            return self._count_facets([])
+        return self.snapshot.memoize(
+            ("facets", genre and self.snapshot.genres.canonical_name(genre)),
+            lambda: self._count_facets([self.snapshot.films[position] for position in positions]),
+        )
+
+    @staticmethod
+    def _count_facets(films: Sequence[Film]) -> FilmFacets:
+        """Count the films like the terms and histogram aggregations of Elasticsearch do."""
+        genres = Counter(genre.name for film in films for genre in film.genres)
+        interval = settings.films_rating_facet_interval
+        ratings = Counter(
+            math.floor(film.imdb_rating / interval)
+            for film in films
+            if film.imdb_rating is not None
+        )
+        last_bucket = math.floor((MAX_RATING - interval) / interval)
+        return FilmFacets(
+            genres=[
+                GenreFacet(name=name, count=count)
+                for name, count in sorted(genres.items(), key=lambda item: (-item[1], item[0]))
+            ][: settings.genre_catalog_max_size],
+            imdb_rating=[
+                RatingFacet(rating=bucket * interval, count=ratings[bucket])
+                for bucket in range(min([0, *ratings]), max([last_bucket, *ratings]) + 1)
+            ],
+        )
+
+    async def get_or_none(
+        self,
+        film_id: FilmID,
+        *,
+        trusted: bool = False,  # noqa: ARG002
+    ) -> Film | None:
+        position = self.snapshot.film_positions.get(film_id)
+        return None if position is None else self.snapshot.films[position]
+
+    async def get_many(self, film_ids: Sequence[FilmID]) -> list[Film]:
+        return [
+            self.snapshot.films[self.snapshot.film_positions[film_id]]
+            for film_id in film_ids
+            if film_id in self.snapshot.film_positions
+        ]
@@ -1,15 +1,26 @@
+from types import MappingProxyType
 from typing import Annotated
 
+import asyncio
+import logging
+
 from abc import ABC, abstractmethod
+from collections.abc import Iterable, Mapping
+from dataclasses import dataclass, field
 
 from elasticsearch import AsyncElasticsearch
-from elasticsearch.exceptions import NotFoundError
+from elasticsearch.exceptions import ApiError, NotFoundError, TransportError
 from fastapi import Depends
 
 from core.settings import settings
 from db.elastic import get_elasticsearch
 from models.genre import Genre
 from models.value_objects import GenreID
+from utils.circuit_breaker import CircuitOpenError
+from utils.metrics import track_elasticsearch
+from utils.singleflight import SingleFlight
+
+logger = logging.getLogger(__name__)
 
 
 class BaseGenreService(ABC):
@@ -26,6 +37,7 @@ class ElasticsearchGenreService(BaseGenreService):
     def __init__(self, elastic: Annotated[AsyncElasticsearch, Depends(get_elasticsearch)]):
         self.elastic = elastic
 
+    @track_elasticsearch
     async def get_or_none(self, genre_id: GenreID) -> Genre | None:
         try:
             doc = await self.elastic.get(index=settings.es_genres_index, id=str(genre_id))
@@ -33,8 +45,138 @@ class ElasticsearchGenreService(BaseGenreService):
         except NotFoundError:
             return None
 
+    @track_elasticsearch
     async def get_list(self) -> list[Genre]:
         result = await self.elastic.search(
+            index=settings.es_genres_index,
+            size=settings.genre_catalog_max_size,
             query={"match_all": {}},
         )
         return [Genre.model_validate(hit["_source"]) for hit in result["hits"]["hits"]]
+
+
+@dataclass(frozen=True)
+class GenreCatalog:
+    """Immutable snapshot of all genres with lookups by ID and by case-insensitive name."""
+
+    genres: tuple[Genre, ...] = ()
+    by_id: Mapping[GenreID, Genre] = field(default_factory=lambda: MappingProxyType({}))
+    by_name: Mapping[str, Genre] = field(default_factory=lambda: MappingProxyType({}))
+
+    @classmethod
+    def from_genres(cls, genres: Iterable[Genre]) -> "GenreCatalog":
+        sorted_genres = tuple(sorted(genres, key=lambda genre: genre.name))
+        return cls(
+            genres=sorted_genres,
+            by_id=MappingProxyType({genre.id: genre for genre in sorted_genres}),
+            by_name=MappingProxyType({genre.name.casefold(): genre for genre in sorted_genres}),
+        )
+
+    def get_by_name(self, name: str) -> Genre | None:
+        return self.by_name.get(name.strip().casefold())
+
+    def canonical_name(self, name: str) -> str:
+        """Name of the genre as it is stored or the name itself if the genre is unknown."""
+        genre = self.get_by_name(name)
+        return genre.name if genre else name
+
+
+class GenreCatalogLoader:
+    """Keeps the catalog of all genres in worker memory.
+
+    The catalog is loaded on startup and reloaded periodically and when the ETL
+    reports updated genres. Reloads replace the whole snapshot at once,
+    so readers never see a partially loaded catalog.
+    """
+
+    def __init__(self) -> None:
+        self.catalog = GenreCatalog()
+        self._single_flight = SingleFlight()
+        self._reload_tasks: set[asyncio.Task[GenreCatalog]] = set()
+
+    async def reload(self) -> GenreCatalog:
+        """Load the catalog from Elasticsearch, concurrent reloads are coalesced."""
+        return await self._single_flight.do("genres", self._load)
+
+    async def _load(self) -> GenreCatalog:
+        service = ElasticsearchGenreService(get_elasticsearch())
+        try:
+            genres = await service.get_list()
+        except NotFoundError:
+            logger.warning(
+                "Index %s does not exist, genre catalog is empty",
+                settings.es_genres_index,
+            )
+            genres = []
+        self.catalog = GenreCatalog.from_genres(genres)
+        logger.info("Loaded %d genres to the catalog", len(genres))
+        return self.catalog
+
+    def canonical_name(self, name: str) -> str:
+        return self.catalog.canonical_name(name)
+
+    def reload_in_background(self) -> None:
+        task = asyncio.create_task(self.reload())
+        self._reload_tasks.add(task)
+        task.add_done_callback(self._on_reload_done)
+
+    def _on_reload_done(self, task: asyncio.Task[GenreCatalog]) -> None:
+        self._reload_tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.error("Error reloading genre catalog", exc_info=task.exception())
+
+    async def run(self, interval_seconds: float) -> None:
+        """Reload the catalog periodically."""
+        while True:
+            await asyncio.sleep(interval_seconds)
+            try:
+                await self.reload()
+            except (ApiError, TransportError, CircuitOpenError):
+                logger.exception("Error reloading genre catalog")
+
+
+genre_catalog = GenreCatalogLoader()
+
+
+def get_genre_catalog() -> GenreCatalogLoader:
+    return genre_catalog
+
+
+class CatalogGenreService(BaseGenreService):
+    """Serves genres from the in-memory catalog without network round-trips.
+
+    Only genres missing in the catalog are looked up in Elasticsearch: if such a genre exists,
+    it was added after the last reload, so the catalog is reloaded in the background.
+    """
+
+    def __init__(
+        self,
+        catalog: Annotated[GenreCatalogLoader, Depends(get_genre_catalog)],
+        elastic: Annotated[AsyncElasticsearch, Depends(get_elasticsearch)],
+    ):
+        self.catalog = catalog
+        self.elastic = elastic
+
+    async def get_or_none(self, genre_id: GenreID) -> Genre | None:
+        genre = self.catalog.catalog.by_id.get(genre_id)
+        if genre is None:
+            genre = await ElasticsearchGenreService(self.elastic).get_or_none(genre_id)
+            if genre is not None:
+                self.catalog.reload_in_background()
+        return genre
+
+    async def get_list(self) -> list[Genre]:
+        return list(self.catalog.catalog.genres)
+
+
+class InMemoryGenreService(BaseGenreService):
+    """Serves genres from the in-memory catalog only, when it is loaded from a snapshot."""
+
+    def __init__(self, catalog: Annotated[GenreCatalogLoader, Depends(get_genre_catalog)]):
+        self.catalog = catalog
+
+    async def get_or_none(self, genre_id: GenreID) -> Genre | None:
+        return self.catalog.catalog.by_id.get(genre_id)
+
+    async def get_list(self) -> list[Genre]:
+        return list(self.catalog.catalog.genres)
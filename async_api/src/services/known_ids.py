@@ -0,0 +1,104 @@
+import logging
+
+from collections.abc import AsyncIterator, Collection, Iterable, Mapping
+
+from elasticsearch import AsyncElasticsearch
+from elasticsearch.exceptions import ApiError, TransportError
+
+from core.settings import settings
+from utils.bloom import BloomFilter
+from utils.circuit_breaker import CircuitOpenError
+
+logger = logging.getLogger(__name__)
+
+# filters are sized for this many times the documents they are built from,
+# so the documents added by the ETL until the next restart do not raise the error rate
+CAPACITY_HEADROOM = 2
+MIN_CAPACITY = 10_000
+
+
+class KnownIDs:
+    """Bloom filters of the IDs of the films, persons and genres in the indexes, per worker.
+
+    Lookups of the IDs ruled out by the filter of their namespace are answered with 404
+    at once, without round-trips to the cache or Elasticsearch. The filters are built
+    from the indexes on startup and updated with the IDs of the documents loaded by the ETL.
+    Deleted documents stay in the filters and are looked up as before.
+
+    Until the filter of a namespace is built, e.g. if its index could not be read,
+    any ID of the namespace might exist.
+    """
+
+    def __init__(self) -> None:
+        self.filters: dict[str, BloomFilter] = {}
+        self._building: dict[str, BloomFilter] = {}
+
+    def might_exist(self, namespace: str, id_: str) -> bool:
+        bloom = self.filters.get(namespace)
+        return bloom is None or id_ in bloom
+
+    def add(self, namespace: str, ids: Iterable[str]) -> None:
+        """Add the IDs to the filter of the namespace and to the one being built, if any."""
+        ids = list(ids)
+        for bloom in (self.filters.get(namespace), self._building.get(namespace)):
+            if bloom is not None:
+                bloom.update(ids)
+
+    def build(self, namespace: str, ids: Collection[str]) -> None:
+        bloom = self._create(len(ids))
+        bloom.update(ids)
+        self.filters[namespace] = bloom
+
+    async def load(self, elastic: AsyncElasticsearch, indexes: Mapping[str, str]) -> None:
+        """Build the filters of the namespaces from the IDs of their indexes."""
+        for namespace, index in indexes.items():
+            try:
+                await self._load(elastic, namespace, index)
+            except (ApiError, TransportError, CircuitOpenError):
+                logger.exception("Error loading IDs of %s, their lookups are not filtered", index)
+
+    async def _load(self, elastic: AsyncElasticsearch, namespace: str, index: str) -> None:
+        count = (await elastic.count(index=index))["count"]
+        # documents loaded by the ETL while the index is read are added to the new filter too
+        bloom = self._building[namespace] = self._create(count)
+        try:
+            async for ids in self._scan(elastic, index):
+                bloom.update(ids)
+        finally:
+            del self._building[namespace]
+        self.filters[namespace] = bloom
+        logger.info("Loaded %d IDs of %s to the filter of %s", len(bloom), index, namespace)
+
+    @staticmethod
+    async def _scan(elastic: AsyncElasticsearch, index: str) -> AsyncIterator[list[str]]:
+        """Read the IDs of all documents of the index page by page inside a point in time."""
+        pit = await elastic.open_point_in_time(index=index, keep_alive=settings.es_pit_keep_alive)
+        pit_id, search_after = pit["id"], None
+        try:
+            while True:
+                result = await elastic.search(
+                    pit={"id": pit_id, "keep_alive": settings.es_pit_keep_alive},
+                    size=settings.id_filter_scan_size,
+                    sort=[{"_shard_doc": {"order": "asc"}}],
+                    search_after=search_after,
+                    source=False,
+                    track_total_hits=False,
+                )
+                pit_id = result.get("pit_id", pit_id)
+                hits = result["hits"]["hits"]
+                yield [hit["_id"] for hit in hits]
+                if len(hits) < settings.id_filter_scan_size:
+                    return
+                search_after = hits[-1]["sort"]
+        finally:
+            await elastic.close_point_in_time(id=pit_id)
+
+    @staticmethod
+    def _create(count: int) -> BloomFilter:
+        return BloomFilter(
+            max(count * CAPACITY_HEADROOM, MIN_CAPACITY),
+            settings.id_filter_error_rate,
+        )
+
+
+known_ids = KnownIDs()
@@ -0,0 +1,186 @@
+from typing import Any, Generic, TypeVar
+
+import base64
+import binascii
+import hashlib
+
+from collections.abc import Sequence
+from dataclasses import dataclass
+
+import orjson
+
+from elasticsearch import AsyncElasticsearch
+from elasticsearch.exceptions import BadRequestError, NotFoundError
+from pydantic import BaseModel
+
+from core.settings import settings
+
+T = TypeVar("T")
+
+
+class InvalidCursorError(ValueError):
+    def __init__(self, message: str = "Invalid cursor") -> None:
+        super().__init__(message)
+
+
+class ExpiredCursorError(InvalidCursorError):
+    def __init__(self) -> None:
+        super().__init__("Cursor has expired")
+
+
+class MismatchedCursorError(InvalidCursorError):
+    def __init__(self) -> None:
+        super().__init__("Cursor does not match the request")
+
+
+class Cursor(BaseModel):
+    """Position of the cursor pagination: point in time and sort values of the last hit.
+
+    The cursor is bound to the index and to the digest of the query and the sort
+    it was issued for, so it is rejected by requests of other listings.
+    """
+
+    pit_id: str
+    search_after: list[Any]
+    index: str
+    digest: str
+
+    def encode(self) -> str:
+        return base64.urlsafe_b64encode(self.model_dump_json().encode()).decode()
+
+    @classmethod
+    def decode(cls, token: str) -> "Cursor":
+        try:
+            return cls.model_validate_json(base64.urlsafe_b64decode(token))
+        except (binascii.Error, ValueError) as e:
+            raise InvalidCursorError from e
+
+
+def request_digest(query: Any, sort: Any) -> str:
+    """Short digest of the query and the sort of a listing, independent of the order of keys."""
+    body = orjson.dumps([query, sort], option=orjson.OPT_SORT_KEYS)
+    return hashlib.blake2b(body, digest_size=8).hexdigest()
+
+
+def decode_cursor(cursor: str, *, index: str, digest: str) -> Cursor:
+    position = Cursor.decode(cursor)
+    if position.index != index or position.digest != digest:
+        raise MismatchedCursorError
+    return position
+
+
+@dataclass
+class Page(Generic[T]):
+    items: list[T]
+    next_cursor: str | None = None
+
+
+async def search_page(
+    elastic: AsyncElasticsearch,
+    *,
+    index: str,
+    query: dict[str, Any],
+    sort: list[dict[str, Any]] | None = None,
+    page: int = 1,
+    size: int = settings.default_page_size,
+    cursor: str | None = None,
+    source_includes: list[str] | None = None,
+) -> tuple[list[dict[str, Any]], str | None]:
+    """Search a page of hits and return them with the cursor of the next page.
+
+    Without a cursor the page is fetched by its number with `from`/`size`,
+    which gets slower with every page and is limited by `index.max_result_window`.
+    With a cursor the hits are fetched with `search_after` inside a point in time,
+    so deep pages cost the same as the first one and the listing is not affected
+    by concurrent index updates. An empty cursor opens a new point in time.
+    The next cursor is None when there are no more pages. Cursors issued for another index,
+    query or sort raise InvalidCursorError.
+
+    If `source_includes` is given, only these fields of the documents are fetched.
+    """
+    if cursor is None:
+        result = await elastic.search(
+            index=index,
+            from_=(page - 1) * size,
+            size=size,
+            query=query,
+            sort=sort,
+            source_includes=source_includes,
+        )
+        return result["hits"]["hits"], None
+
+    digest = request_digest(query, sort)
+    if cursor:
+        position = decode_cursor(cursor, index=index, digest=digest)
+        pit_id, search_after = position.pit_id, position.search_after
+    else:
+        pit = await elastic.open_point_in_time(index=index, keep_alive=settings.es_pit_keep_alive)
+        pit_id, search_after = pit["id"], None
+
+    try:
+        result = await elastic.search(
+            pit={"id": pit_id, "keep_alive": settings.es_pit_keep_alive},
+            size=size,
+            query=query,
+            # _shard_doc is a unique tiebreaker, so hits with equal sort values are not skipped
+            sort=[*(sort or [{"_score": {"order": "desc"}}]), {"_shard_doc": {"order": "asc"}}],
+            search_after=search_after,
+            source_includes=source_includes,
+        )
+    except NotFoundError as e:
+        raise ExpiredCursorError from e
+    except BadRequestError as e:
+        # sort values of a forged cursor do not fit the sort
+        if search_after is None:
+            raise
+        raise InvalidCursorError from e
+
+    hits = result["hits"]["hits"]
+    # point in time ID may change between requests
+    pit_id = result.get("pit_id", pit_id)
+    if len(hits) < size:
+        await elastic.close_point_in_time(id=pit_id)
+        return hits, None
+    next_position = Cursor(pit_id=pit_id, search_after=hits[-1]["sort"], index=index, digest=digest)
+    return hits, next_position.encode()
+
+
+def slice_page(
+    items: Sequence[T],
+    *,
+    version: str,
+    index: str,
+    query: Any = None,
+    sort: Any = None,
+    page: int = 1,
+    size: int = settings.default_page_size,
+    cursor: str | None = None,
+) -> tuple[list[T], str | None]:
+    """Cut a page from results sorted in memory with the same semantics as `search_page`.
+
+    The version of the data plays the role of the point in time, so cursors of other versions
+    have expired. As the data of a version never changes, cursors keep the offset
+    of the next page instead of the sort values of the last hit. Like the cursors of `search_page`,
+    they are bound to the index, the query and the sort of the results.
+    """
+    if cursor is None:
+        start = (page - 1) * size
+        return list(items[start : start + size]), None
+
+    start = 0
+    digest = request_digest(query, sort)
+    if cursor:
+        position = decode_cursor(cursor, index=index, digest=digest)
+        if position.pit_id != version:
+            raise ExpiredCursorError
+        match position.search_after:
+            case [int(offset)] if offset >= 0:
+                start = offset
+            case _:
+                raise InvalidCursorError
+
+    hits = list(items[start : start + size])
+    if len(hits) < size:
+        return hits, None
+    next_position = Cursor(pit_id=version, search_after=[start + size], index=index, digest=digest)
+    return hits, next_position.encode()
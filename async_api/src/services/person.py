@@ -10,6 +10,9 @@ from core.settings import settings
 from db.elastic import get_elasticsearch
 from models.person import Person
 from models.value_objects import PersonID
+from services.pagination import Page, search_page, slice_page
+from services.snapshot import CatalogSnapshot, get_catalog_snapshot
+from utils.metrics import track_elasticsearch
 
 
 class BasePersonService(ABC):
@@ -24,7 +27,8 @@ class BasePersonService(ABC):
         query: str | None = None,
         page: int = 1,
         size: int = settings.default_page_size,
-    ) -> list[Person]:
+        cursor: str | None = None,
+    ) -> Page[Person]:
         pass
 
 
@@ -32,6 +36,7 @@ class ElasticsearchPersonService(BasePersonService):
     def __init__(self, elastic: Annotated[AsyncElasticsearch, Depends(get_elasticsearch)]):
         self.elastic = elastic
 
+    @track_elasticsearch
     async def get_or_none(self, person_id: PersonID) -> Person | None:
         try:
             doc = await self.elastic.get(index=settings.es_persons_index, id=str(person_id))
@@ -39,18 +44,56 @@ class ElasticsearchPersonService(BasePersonService):
             return None
         return Person.model_validate(doc["_source"])
 
+    @track_elasticsearch
     async def search(
         self,
         *,
         query: str | None = None,
         page: int = 1,
         size: int = settings.default_page_size,
-    ) -> list[Person]:
+        cursor: str | None = None,
+    ) -> Page[Person]:
         search_query = {"match": {"full_name": query}} if query else {"match_all": {}}
-        result = await self.elastic.search(
+        hits, next_cursor = await search_page(
+            self.elastic,
             index=settings.es_persons_index,
-            from_=(page - 1) * size,
-            size=size,
             query=search_query,
+            page=page,
+            size=size,
+            cursor=cursor,
+        )
+        return Page([Person.model_validate(hit["_source"]) for hit in hits], next_cursor)
+
+
+class InMemoryPersonService(BasePersonService):
+    """Serves persons from the catalog snapshot in worker memory without network round-trips."""
+
+    def __init__(self, snapshot: Annotated[CatalogSnapshot, Depends(get_catalog_snapshot)]):
+        self.snapshot = snapshot
+
+    async def get_or_none(self, person_id: PersonID) -> Person | None:
+        position = self.snapshot.person_positions.get(person_id)
+        return None if position is None else self.snapshot.persons[position]
+
+    async def search(
+        self,
+        *,
+        query: str | None = None,
+        page: int = 1,
+        size: int = settings.default_page_size,
+        cursor: str | None = None,
+    ) -> Page[Person]:
+        positions, next_cursor = slice_page(
+            (
+                self.snapshot.person_names.search(query)
+                if query
+                else range(len(self.snapshot.persons))
+            ),
+            version=self.snapshot.version,
+            index=settings.es_persons_index,
+            query=query,
+            page=page,
+            size=size,
+            cursor=cursor,
         )
-        return [Person.model_validate(hit["_source"]) for hit in result["hits"]["hits"]]
+        return Page([self.snapshot.persons[position] for position in positions], next_cursor)
@@ -0,0 +1,223 @@
+from typing import Any, TypeVar
+
+import hashlib
+import logging
+import math
+import re
+
+from collections import Counter, defaultdict
+from collections.abc import Callable, Hashable, Iterable, Sequence
+from pathlib import Path
+
+import orjson
+
+from core.settings import settings
+from models.film import Film, FilmShort
+from models.genre import Genre
+from models.person import Person
+from models.value_objects import FilmID, PersonID, SortOrder
+from services.genre import GenreCatalog
+
+T = TypeVar("T")
+
+logger = logging.getLogger(__name__)
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+# sortable fields of the index and the fields of the short film they are sorted by
+SORT_FIELDS = {"id": "id", "imdb_rating": "imdb_rating", "title.raw": "title"}
+
+
+class UnsupportedSortError(ValueError):
+    def __init__(self, field: str) -> None:
+        super().__init__(f"Sorting by {field} is not supported")
+
+
+def tokenize(text: str) -> list[str]:
+    return TOKEN_PATTERN.findall(text.casefold())
+
+
+class TextIndex:
+    """Inverted index of a text field which ranks matches with BM25 like Elasticsearch does.
+
+    Terms are lowercase words. Unlike the analyzer of the Elasticsearch indexes, stop words are
+    kept and words are not stemmed, so a query matches the exact word forms only.
+    """
+
+    k1 = 1.2
+    b = 0.75
+
+    def __init__(self, texts: Iterable[str]) -> None:
+        self.postings: dict[str, list[tuple[int, int]]] = defaultdict(list)
+        self.lengths: list[int] = []
+        for position, text in enumerate(texts):
+            frequencies = Counter(tokenize(text))
+            self.lengths.append(frequencies.total())
+            for term, frequency in frequencies.items():
+                self.postings[term].append((position, frequency))
+        self.average_length = sum(self.lengths) / len(self.lengths) if self.lengths else 0
+
+    def search(self, query: str) -> list[int]:
+        """Positions of the texts with any of the query terms, the best matches first."""
+        scores: dict[int, float] = defaultdict(float)
+        for term in set(tokenize(query)):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (len(self.lengths) - len(postings) + 0.5) / (len(postings) + 0.5))
+            for position, frequency in postings:
+                norm = 1 - self.b + self.b * self.lengths[position] / self.average_length
+                scores[position] += idf * frequency * (self.k1 + 1) / (frequency + self.k1 * norm)
+        return sorted(scores, key=lambda position: (-scores[position], position))
+
+
+class CatalogSnapshot:
+    """Films, persons and genres held in worker memory with the lookups to search them.
+
+    The snapshot never changes, so the orders of films and other results which depend
+    only on the snapshot are computed on the first request and kept for its lifetime.
+    The version identifies the data: cursors of other versions have expired.
+    """
+
+    def __init__(
+        self,
+        films: Iterable[Film],
+        persons: Iterable[Person],
+        genres: Iterable[Genre],
+        version: str = "",
+    ) -> None:
+        self.version = version
+        self.films = tuple(films)
+        self.film_shorts = tuple(
+            FilmShort(id=film.id, title=film.title, imdb_rating=film.imdb_rating)
+            for film in self.films
+        )
+        self.persons = tuple(persons)
+        self.genres = GenreCatalog.from_genres(genres)
+        self.film_positions: dict[FilmID, int] = {
+            film.id: position for position, film in enumerate(self.films)
+        }
+        self.person_positions: dict[PersonID, int] = {
+            person.id: position for position, person in enumerate(self.persons)
+        }
+        self.film_titles = TextIndex(film.title for film in self.films)
+        self.person_names = TextIndex(person.full_name for person in self.persons)
+        # positions of the films of every genre, like the postings of genres.name.keyword
+        self.genre_films: dict[str, list[int]] = defaultdict(list)
+        for position, film in enumerate(self.films):
+            for genre in film.genres:
+                self.genre_films[genre.name].append(position)
+        self._memo: dict[Hashable, Any] = {}
+
+    @classmethod
+    def load(cls, path: Path) -> "CatalogSnapshot":
+        """Load the snapshot from an NDJSON export of the indexes, e.g. made with elasticdump.
+
+        Every line is a document with the name of its index in `_index` and its source
+        in `_source`. Documents of other indexes are skipped. The version is the digest
+        of the file, so workers loading the same file accept each other's cursors.
+        """
+        sources: dict[str, list[dict[str, Any]]] = {
+            settings.es_films_index: [],
+            settings.es_persons_index: [],
+            settings.es_genres_index: [],
+        }
+        digest = hashlib.blake2b(digest_size=8)
+        skipped = 0
+        with path.open("rb") as file:
+            for line in file:
+                digest.update(line)
+                if not line.strip():
+                    continue
+                document = orjson.loads(line)
+                if document.get("_index") in sources:
+                    sources[document["_index"]].append(document["_source"])
+                else:
+                    skipped += 1
+        snapshot = cls(
+            films=[Film.model_validate(source) for source in sources[settings.es_films_index]],
+            persons=[
+                Person.model_validate(source) for source in sources[settings.es_persons_index]
+            ],
+            genres=[Genre.model_validate(source) for source in sources[settings.es_genres_index]],
+            version=digest.hexdigest(),
+        )
+        logger.info(
+            "Loaded %d films, %d persons and %d genres from %s, skipped %d documents",
+            len(snapshot.films),
+            len(snapshot.persons),
+            len(snapshot.genres.genres),
+            path,
+            skipped,
+        )
+        return snapshot
+
+    def memoize(self, key: Hashable, compute: Callable[[], T]) -> T:
+        if key not in self._memo:
+            self._memo[key] = compute()
+        result: T = self._memo[key]
+        return result
+
+    def get_genre_films(self, genre: str | None) -> list[int] | None:
+        """Positions of the films of the genre, of all films if it is None or None if it is unknown.
+
+        The genre is matched case-insensitively if it is known to the catalog.
+        """
+        if genre is None:
+            return list(range(len(self.films)))
+        return self.genre_films.get(self.genres.canonical_name(genre))
+
+    def order_films(
+        self,
+        *,
+        genre: str | None = None,
+        sort_by: str | None = None,
+        sort_order: SortOrder | None = None,
+    ) -> Sequence[int]:
+        """Positions of the films of the genre sorted by the field.
+
+        Films without the field go last in both orders, ties keep the order of the snapshot.
+        """
+        positions = self.get_genre_films(genre)
+        if positions is None:
+            return []
+        if not sort_by:
+            return positions
+        if sort_by not in SORT_FIELDS:
+            raise UnsupportedSortError(sort_by)
+        order = sort_order or SortOrder.asc
+        sorted_films = self.memoize(
+            ("sort", sort_by, order),
+            lambda: self._sort_films(SORT_FIELDS[sort_by], order),
+        )
+        if genre is None:
+            return sorted_films
+        members = set(positions)
+        return self.memoize(
+            ("sort", sort_by, order, self.genres.canonical_name(genre)),
+            lambda: [position for position in sorted_films if position in members],
+        )
+
+    def _sort_films(self, field: str, order: SortOrder) -> list[int]:
+        present = [
+            position
+            for position, film in enumerate(self.film_shorts)
+            if getattr(film, field) is not None
+        ]
+        # sorting is stable in reverse too, so ties keep the order of the snapshot
+        present.sort(
+            key=lambda position: getattr(self.film_shorts[position], field),
+            reverse=order == SortOrder.desc,
+        )
+        present_set = set(present)
+        return present + [
+            position for position in range(len(self.film_shorts)) if position not in present_set
+        ]
+
+
+def get_catalog_snapshot() -> CatalogSnapshot:
+    """Snapshot of the in-memory services, overridden with the loaded one on startup."""
+    return EMPTY_SNAPSHOT
+
+
+EMPTY_SNAPSHOT = CatalogSnapshot(films=(), persons=(), genres=())
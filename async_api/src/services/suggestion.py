@@ -0,0 +1,75 @@
+from typing import Annotated, Any
+
+from abc import ABC, abstractmethod
+
+from elastic_transport import ObjectApiResponse
+from elasticsearch import ApiError, AsyncElasticsearch
+from fastapi import Depends
+
+from core.settings import settings
+from db.elastic import get_elasticsearch, unpack_search_response
+from models.suggestion import Suggestion, Suggestions
+from utils.metrics import track_elasticsearch
+
+
+class BaseSuggestionService(ABC):
+    @abstractmethod
+    async def suggest(self, prefix: str, size: int = settings.suggest_default_size) -> Suggestions:
+        pass
+
+
+class ElasticsearchSuggestionService(BaseSuggestionService):
+    """Suggests films and persons by the prefix of any word of their titles and names.
+
+    Completion suggesters are served from in-memory FSTs of the completion fields
+    filled by the ETL, so they are much cheaper than full-text searches. Both indexes
+    are queried with a single round-trip and only IDs and names are fetched.
+    If either search fails, its error is raised, so no partial suggestions are cached.
+    """
+
+    def __init__(self, elastic: Annotated[AsyncElasticsearch, Depends(get_elasticsearch)]):
+        self.elastic = elastic
+
+    @track_elasticsearch
+    async def suggest(self, prefix: str, size: int = settings.suggest_default_size) -> Suggestions:
+        result = await self.elastic.msearch(
+            searches=[
+                {"index": settings.es_films_index},
+                self._completion_search(prefix, "title", size),
+                {"index": settings.es_persons_index},
+                self._completion_search(prefix, "full_name", size),
+            ],
+        )
+        films, persons = (
+            unpack_search_response(response, result.meta) for response in result["responses"]
+        )
+        if isinstance(films, ApiError):
+            raise films
+        if isinstance(persons, ApiError):
+            raise persons
+        return Suggestions(
+            films=self._parse_suggestions(films, "title"),
+            persons=self._parse_suggestions(persons, "full_name"),
+        )
+
+    @staticmethod
+    def _completion_search(prefix: str, name_field: str, size: int) -> dict[str, Any]:
+        return {
+            "_source": [name_field],
+            "suggest": {
+                "suggestions": {
+                    "prefix": prefix,
+                    "completion": {"field": f"{name_field}_suggest", "size": size},
+                },
+            },
+        }
+
+    @staticmethod
+    def _parse_suggestions(
+        response: ObjectApiResponse[Any],
+        name_field: str,
+    ) -> list[Suggestion]:
+        return [
+            Suggestion(id=option["_id"], name=option["_source"][name_field])
+            for option in response["suggest"]["suggestions"][0]["options"]
+        ]
@@ -0,0 +1,45 @@
+import hashlib
+import math
+
+from collections.abc import Iterable, Iterator
+
+
+class BloomFilter:
+    """Set of strings which may report false positives but never false negatives.
+
+    The filter is sized for `capacity` items at the false positive rate `error_rate`,
+    the rate grows when more items are added. Items can not be removed.
+    Bit positions of an item are derived from a single 128-bit hash by double hashing.
+    """
+
+    def __init__(self, capacity: int, error_rate: float) -> None:
+        capacity = max(capacity, 1)
+        self.size = max(math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2), 8)
+        self.hash_count = max(round(self.size / capacity * math.log(2)), 1)
+        self.capacity = capacity
+        self.count = 0
+        self._bits = bytearray(math.ceil(self.size / 8))
+
+    def _positions(self, item: str) -> Iterator[int]:
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        first, second = int.from_bytes(digest[:8]), int.from_bytes(digest[8:]) | 1
+        for i in range(self.hash_count):
+            yield (first + i * second) % self.size
+
+    def add(self, item: str) -> None:
+        for position in self._positions(item):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def update(self, items: Iterable[str]) -> None:
+        for item in items:
+            self.add(item)
+
+    def __contains__(self, item: str) -> bool:
+        return all(
+            self._bits[position >> 3] & 1 << (position & 7) for position in self._positions(item)
+        )
+
+    def __len__(self) -> int:
+        """Number of added items, duplicates included."""
+        return self.count
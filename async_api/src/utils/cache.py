@@ -1,12 +1,98 @@
-from typing import Any
+from typing import Any, ParamSpec, TypeVar, cast
 
+import asyncio
+import contextvars
+import dataclasses
+import gzip
 import hashlib
+import inspect
+import logging
+import random
 
-from collections.abc import Callable
+from collections.abc import Awaitable, Callable, Collection, Mapping, Sequence
+from functools import wraps
+from urllib.parse import urlencode
 
+import orjson
+
+from fastapi.datastructures import DefaultPlaceholder
+from fastapi.encoders import jsonable_encoder
+from fastapi.routing import APIRoute, serialize_response
+from fastapi_cache import FastAPICache
+from pydantic import BaseModel, TypeAdapter, ValidationError
+from redis.exceptions import RedisError
+from starlette import status
+from starlette.exceptions import HTTPException
 from starlette.requests import Request
 from starlette.responses import Response
 
+from core.settings import settings
+from db.elastic import UNAVAILABLE_ERRORS
+from db.redis import redis
+from utils.cache_backends import TwoTierBackend
+from utils.heavy_hitters import SpaceSaving
+from utils.latency_budget import PARTIAL_RESULTS_HEADER, is_partial, latency_budget
+from utils.metrics import CACHE_REQUESTS, CACHE_STALE_HITS
+from utils.projection import get_projector
+from utils.singleflight import SingleFlight
+
+P = ParamSpec("P")
+R = TypeVar("R")
+K = TypeVar("K")
+
+logger = logging.getLogger(__name__)
+
+single_flight = SingleFlight(
+    redis if settings.cache_lock_enabled else None,
+    lock_timeout=settings.cache_lock_timeout_seconds,
+)
+# keep references to the background refreshes, so they are not garbage collected
+refresh_tasks: set[asyncio.Task[Any]] = set()
+
+
+@dataclasses.dataclass(frozen=True)
+class HotKey:
+    # path with the query string of the last request for the key, to repeat it after a restart
+    path: str
+    stale_seconds: int
+    # returns the rendered response with the time it stays fresh
+    render: Callable[[], Awaitable[tuple["CachedResponse", int]]]
+
+
+class HotKeys:
+    """Most requested cache keys with the means to render their entries again.
+
+    Requests are counted by a Space-Saving sketch of `capacity` keys, 0 disables the counting.
+    The render function of a key is the one of its last request, it is dropped
+    with the key when the sketch replaces it.
+    """
+
+    def __init__(self, capacity: int) -> None:
+        self.sketch = SpaceSaving(capacity)
+        self.keys: dict[str, HotKey] = {}
+        # popularity of the hottest keys from 1 for the hottest down to 0, as of the last ranking
+        self.popularity: dict[str, float] = {}
+
+    def record(self, cache_key: str, hot_key: HotKey) -> None:
+        if not self.sketch.capacity:
+            return
+        evicted = self.sketch.add(cache_key)
+        if evicted is not None:
+            del self.keys[evicted]
+        self.keys[cache_key] = hot_key
+
+    def top(self, n: int) -> list[tuple[str, HotKey, float]]:
+        return [(key, self.keys[key], count) for key, count in self.sketch.top(n)]
+
+    def rank(self, n: int) -> list[tuple[str, HotKey, float]]:
+        """Return the n hottest keys and update their popularity."""
+        top = self.top(n)
+        self.popularity = {key: 1 - position / n for position, (key, _, _) in enumerate(top)}
+        return top
+
+
+hot_keys = HotKeys(settings.cache_hot_keys_capacity if settings.cache_warmer_enabled else 0)
+
 
 def key_builder(
     func: Callable[..., Any],
@@ -16,18 +102,679 @@ def key_builder(
     args: tuple[Any] | None = None,
     kwargs: dict[str, Any] | None = None,
 ) -> str:
-    """Key builder for fastapi-cache which does not take into account service dependencies.
+    """Key builder for fastapi-cache which builds readable keys from canonical parameters.
+
+    Keys look like `<prefix>:<namespace>:<endpoint>:<param>=<value>&...`, so the entries
+    of a namespace or of an endpoint can be inspected and invalidated by prefix.
+    Parameters are sorted by name, models are expanded to their fields and None values are skipped,
+    so equal requests share the key however their parameters were passed.
+    Service dependencies are skipped as well, see: https://github.com/long2ice/fastapi-cache/issues/279
+    """
+    params: dict[str, Any] = {str(position): arg for position, arg in enumerate(args or ())}
+    for name, value in (kwargs or {}).items():
+        if name.endswith("_service"):
+            continue
+        if isinstance(value, BaseModel):
+            params.update(value.model_dump(mode="json"))
+        else:
+            params[name] = value
+    query = urlencode(
+        sorted((str(name), value) for name, value in params.items() if value is not None),
+    )
+    return f"{FastAPICache.get_prefix()}:{namespace}:{func.__name__}:{query}"
+
+
+def normalize_text(text: str) -> str:
+    """Canonical form of a full-text query: analyzers ignore case and extra whitespace."""
+    return " ".join(text.split()).lower()
+
+
+def normalize_params(
+    kwargs: Mapping[str, Any],
+    normalizers: Mapping[str, Callable[[Any], Any]],
+) -> dict[str, Any]:
+    return {
+        name: normalizers[name](value) if name in normalizers and value is not None else value
+        for name, value in kwargs.items()
+    }
+
+
+def get_backend() -> TwoTierBackend:
+    return cast(TwoTierBackend, FastAPICache.get_backend())
+
+
+def tag_key(tag: str) -> str:
+    """Key of the Redis set with the cache keys marked with the tag."""
+    return f"{FastAPICache.get_prefix()}:tags:{tag}"
+
+
+def is_cache_bypassed(request: Request) -> bool:
+    return not FastAPICache.get_enable() or request.headers.get("Cache-Control") in (
+        "no-store",
+        "no-cache",
+    )
+
+
+class InvalidCacheEntryError(ValueError):
+    def __init__(self) -> None:
+        super().__init__("Cache entry is not a dumped response")
+
+
+@dataclasses.dataclass(frozen=True)
+class CachedResponse:
+    """Rendered response stored in the cache.
+
+    Cache hits are returned as is, without decoding, validation and serialization.
+    The entry is stored as a one-line JSON header with the response metadata followed by the body.
+
+    Bodies of at least `response_compression_min_size_bytes` are stored gzipped,
+    so they are sent to clients accepting gzip without compressing them on every hit.
+
+    The strong ETag is a hash of the uncompressed body computed once, when the response
+    is rendered, so conditional requests are answered by the header alone.
+
+    Responses rendered from partial results are never stored, they are only
+    sent to the requests waiting for them with the `X-Partial-Results` header.
+    """
+
+    body: bytes
+    status_code: int = 200
+    media_type: str | None = None
+    content_encoding: str | None = None
+    etag: str | None = None
+    partial: bool = False
+
+    @classmethod
+    def from_response(cls, response: Response) -> "CachedResponse":
+        return cls(
+            response.body,
+            response.status_code,
+            response.headers.get("content-type"),
+            etag=make_etag(response.body),
+        )
+
+    def dump(self) -> bytes:
+        header = orjson.dumps(
+            {
+                "status_code": self.status_code,
+                "media_type": self.media_type,
+                "content_encoding": self.content_encoding,
+                "etag": self.etag,
+            },
+        )
+        return header + b"\n" + self.body
+
+    @classmethod
+    def load(cls, data: bytes) -> "CachedResponse":
+        """Restore the dumped response, raising InvalidCacheEntryError if the entry is not one."""
+        header, separator, body = data.partition(b"\n")
+        try:
+            fields = orjson.loads(header)
+            if not separator or not isinstance(fields, dict):
+                raise InvalidCacheEntryError
+            return cls(body=body, **fields)
+        except (orjson.JSONDecodeError, TypeError) as e:
+            raise InvalidCacheEntryError from e
+
+    @property
+    def raw_body(self) -> bytes:
+        return gzip.decompress(self.body) if self.content_encoding == "gzip" else self.body
+
+    def compress(self) -> "CachedResponse":
+        """Return the response with the gzipped body if the body is large enough to compress."""
+        if self.content_encoding or len(self.body) < settings.response_compression_min_size_bytes:
+            return self
+        return dataclasses.replace(
+            self,
+            body=gzip.compress(self.body, settings.response_compression_level, mtime=0),
+            content_encoding="gzip",
+        )
+
+    def to_response(self, request: Request | None = None, max_age: int | None = None) -> Response:
+        """Build the response for the request.
+
+        The body is decompressed only if the client does not accept gzip. If the client
+        has the current version of the body, the response is 304 Not Modified without a body.
+        Clients keep the response for `max_age` seconds, but at most
+        for `cache_client_max_age_seconds`.
+        """
+        headers = {}
+        body = self.body
+        if self.content_encoding is not None:
+            headers["Vary"] = "Accept-Encoding"
+            if request and self.content_encoding in request.headers.get("Accept-Encoding", ""):
+                headers["Content-Encoding"] = self.content_encoding
+            else:
+                body = self.raw_body
+        if self.etag is not None:
+            # representations with different encodings must have different strong ETags
+            headers["ETag"] = (
+                f'"{self.etag}-{headers["Content-Encoding"]}"'
+                if "Content-Encoding" in headers
+                else f'"{self.etag}"'
+            )
+        if self.partial:
+            headers[PARTIAL_RESULTS_HEADER] = "true"
+            headers["Cache-Control"] = "no-store"
+        elif max_age is not None:
+            headers["Cache-Control"] = (
+                f"max-age={min(max_age, settings.cache_client_max_age_seconds)}"
+            )
+        if request and self.is_not_modified(request):
+            headers.pop("Content-Encoding", None)
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        return Response(body, self.status_code, headers, media_type=self.media_type)
+
+    def is_not_modified(self, request: Request) -> bool:
+        """Check whether If-None-Match of the request matches any representation of the body."""
+        if_none_match = request.headers.get("If-None-Match")
+        if self.etag is None or if_none_match is None or self.status_code != status.HTTP_200_OK:
+            return False
+        tags = {tag.strip().removeprefix("W/").strip('"') for tag in if_none_match.split(",")}
+        return "*" in tags or any(tag.partition("-")[0] == self.etag for tag in tags)
+
+
+def make_etag(body: bytes) -> str:
+    return hashlib.blake2b(body, digest_size=16).hexdigest()
+
+
+def get_response_class(route: APIRoute) -> type[Response]:
+    response_class = route.response_class
+    if isinstance(response_class, DefaultPlaceholder):
+        return cast(type[Response], response_class.value)
+    return response_class
+
+
+async def render_response(
+    request: Request,
+    content: Any,
+    *,
+    trusted: bool = False,
+) -> CachedResponse:
+    """Validate and serialize the endpoint result the same way as FastAPI does.
+
+    Trusted results are not validated: they are projected to the fields of the response model.
+    """
+    route = cast(APIRoute, request.scope["route"])
+    if trusted:
+        serialized = get_projector(route.response_model)(content)
+        if random.random() < settings.trusted_response_validation_rate:  # noqa: S311
+            validate_trusted_response(route, content, serialized)
+    else:
+        serialized = await serialize_response(
+            field=route.response_field,
+            response_content=content,
+            include=route.response_model_include,
+            exclude=route.response_model_exclude,
+            by_alias=route.response_model_by_alias,
+            exclude_unset=route.response_model_exclude_unset,
+            exclude_defaults=route.response_model_exclude_defaults,
+            exclude_none=route.response_model_exclude_none,
+        )
+    response = get_response_class(route)(serialized, status_code=route.status_code or 200)
+    return CachedResponse.from_response(response)
+
+
+def validate_trusted_response(route: APIRoute, content: Any, serialized: Any) -> None:
+    """Check that the trusted result is valid and rendered as it would be with validation."""
+    adapter = TypeAdapter(route.response_model)
+    try:
+        validated = adapter.validate_python(content, from_attributes=True)
+    except ValidationError:
+        logger.exception("Trusted response of %s does not match the response model", route.path)
+        return
+    if adapter.dump_python(validated, mode="json") != jsonable_encoder(serialized):
+        logger.error("Trusted response of %s differs from the validated one", route.path)
+
+
+def render_document(
+    response_class: type[Response],
+    response_model: type[BaseModel],
+    document: Any,
+) -> CachedResponse:
+    content = jsonable_encoder(response_model.model_validate(document, from_attributes=True))
+    return CachedResponse.from_response(response_class(content))
+
+
+def get_request_path(request: Request) -> str:
+    query_string: bytes = request.scope["query_string"]
+    path: str = request.scope["path"]
+    return f"{path}?{query_string.decode()}" if query_string else path
+
+
+def get_tag(namespace: str, id_param: str | None, params: Mapping[str, Any]) -> str:
+    return f"{namespace}:{params[id_param]}" if id_param else namespace
+
+
+async def render_endpoint(
+    request: Request,
+    result: Awaitable[Any],
+    ttl: int,
+    *,
+    trusted: bool,
+) -> tuple[CachedResponse, int]:
+    """Render the result of the endpoint and return it with the time it stays fresh.
+
+    404 errors are rendered too, they stay fresh for `negative_cache_ttl_seconds`.
+    """
+    try:
+        content = await result
+    except HTTPException as e:
+        if e.status_code != status.HTTP_404_NOT_FOUND or not settings.negative_cache_ttl_seconds:
+            raise
+        return render_error(e), spread_ttl(settings.negative_cache_ttl_seconds)
+    rendered = await render_response(request, content, trusted=trusted)
+    return rendered.compress(), ttl
+
+
+def render_error(error: HTTPException) -> CachedResponse:
+    """Render the error like the default handler of FastAPI does."""
+    return CachedResponse(
+        orjson.dumps({"detail": error.detail}),
+        error.status_code,
+        media_type="application/json",
+    )
+
+
+async def get_cached(
+    cache_key: str,
+    namespace: str | None = None,
+) -> tuple[int, CachedResponse | None]:
+    """Get the cached response and its TTL or (0, None) if the key is missing or cache is down.
+
+    Entries are kept in the cache for `cache_fallback_ttl_seconds` after they expire,
+    the TTL of such entries is zero or negative: they are served only if the response
+    can not be rendered because the service is unavailable.
+
+    The result of the lookup is counted in the metrics of the namespace if it is given.
+    """
+    try:
+        ttl, cached = await get_backend().get_with_ttl(cache_key)
+    except RedisError:
+        logger.warning("Error retrieving cache key '%s' from backend", cache_key, exc_info=True)
+        count_cache_requests(namespace, "error")
+        return 0, None
+    response = None if cached is None else load_cached(cache_key, cached)
+    if response is None:
+        count_cache_requests(namespace, "miss")
+        return 0, None
+    ttl -= settings.cache_fallback_ttl_seconds
+    count_cache_requests(namespace, "hit" if ttl > 0 else "miss")
+    return ttl, response
+
+
+def load_cached(cache_key: str, data: bytes) -> CachedResponse | None:
+    """Load the cached response, treating entries which are not dumped responses as missing.
+
+    Such entries, e.g. truncated or stored by an older version, are replaced when
+    the response is rendered again.
+    """
+    try:
+        return CachedResponse.load(data)
+    except InvalidCacheEntryError:
+        logger.warning("Invalid cache entry of key '%s'", cache_key, exc_info=True)
+        return None
+
+
+def count_cache_requests(namespace: str | None, result: str, amount: int = 1) -> None:
+    if namespace is not None and amount:
+        CACHE_REQUESTS.labels(namespace, result).inc(amount)
+
+
+async def get_fresh_cached(
+    cache_key: str,
+    stale_seconds: int,
+) -> tuple[CachedResponse, int] | None:
+    """Get the cached response which is not stale yet with the time it stays fresh."""
+    remaining_ttl, cached = await get_cached(cache_key)
+    if cached is None or remaining_ttl <= stale_seconds:
+        return None
+    return cached, remaining_ttl - stale_seconds
+
+
+async def set_cached(
+    cache_key: str,
+    value: CachedResponse,
+    ttl: int | None,
+    tags: Collection[str],
+) -> None:
+    try:
+        await get_backend().set(cache_key, value.dump(), ttl, [tag_key(tag) for tag in tags])
+    except RedisError:
+        logger.warning("Error setting cache key '%s' in backend", cache_key, exc_info=True)
+
+
+async def set_many_cached(
+    entries: Collection[tuple[str, CachedResponse, int | None, Collection[str]]],
+) -> None:
+    try:
+        await get_backend().set_many(
+            [
+                (cache_key, value.dump(), ttl, [tag_key(tag) for tag in tags])
+                for cache_key, value, ttl, tags in entries
+            ],
+        )
+    except RedisError:
+        logger.warning("Error setting cache keys in backend", exc_info=True)
 
-    See: https://github.com/long2ice/fastapi-cache/issues/279
+
+def add_request_params(func: Callable[..., Any]) -> set[str]:
+    """Make FastAPI pass `request` and `response` to the endpoint.
+
+    Return the names of these parameters which are declared by the endpoint itself.
     """
-    from fastapi_cache import FastAPICache
+    signature = inspect.signature(func)
+    own_params = {"request", "response"} & signature.parameters.keys()
+    func.__signature__ = signature.replace(  # type: ignore[attr-defined]
+        parameters=[
+            *signature.parameters.values(),
+            *(
+                inspect.Parameter(name, inspect.Parameter.KEYWORD_ONLY, annotation=annotation)
+                for name, annotation in (("request", Request), ("response", Response))
+                if name not in own_params
+            ),
+        ],
+    )
+    return own_params
+
+
+def get_ttl(
+    namespace: str,
+    endpoint: str,
+    expire: int | None = None,
+    cache_key: str | None = None,
+) -> int:
+    """TTL of an entry of the endpoint by the policy in `cache_ttl_policy`.
 
-    if kwargs:
-        kwargs = {key: value for key, value in kwargs.items() if not key.endswith("_service")}
-    prefix = f"{FastAPICache.get_prefix()}:{namespace}:"
-    return (
-        prefix
-        + hashlib.md5(  # noqa: S324
-            f"{func.__module__}:{func.__name__}:{args}:{kwargs}".encode(),
-        ).hexdigest()
+    The TTL set for `<namespace>:<endpoint>` is taken first, then the one of the namespace,
+    then `expire` of the decorator and the default TTL. Entries of the hottest keys
+    live longer by up to `cache_ttl_popularity_factor` times.
+    """
+    policy = settings.cache_ttl_policy
+    ttl: float = (
+        policy.get(f"{namespace}:{endpoint}")
+        or policy.get(namespace)
+        or expire
+        or FastAPICache.get_expire()
+        or settings.cache_ttl_seconds
     )
+    if cache_key is not None and (popularity := hot_keys.popularity.get(cache_key)):
+        ttl *= 1 + (settings.cache_ttl_popularity_factor - 1) * popularity
+    return spread_ttl(ttl)
+
+
+def spread_ttl(ttl: float) -> int:
+    """Change the TTL randomly by up to `cache_ttl_jitter` of it.
+
+    Entries written at the same time, e.g. on startup or by a batch request,
+    then expire at different times and are not rendered again all at once.
+    """
+    jitter = settings.cache_ttl_jitter
+    return max(round(ttl * random.uniform(1 - jitter, 1 + jitter)), 1)  # noqa: S311
+
+
+def get_storage_ttl(ttl: int) -> int:
+    """TTL of the entry in the backend: expired entries are kept there as a fallback."""
+    return ttl + settings.cache_fallback_ttl_seconds
+
+
+async def render_trusted_response(request: Request, response: Response, result: Any) -> Response:
+    """Render the result of the trusted endpoint which is not cached."""
+    rendered = (await render_response(request, result, trusted=True)).to_response(request)
+    # FastAPI does not copy headers set by the endpoint to the returned response
+    rendered.headers.update(response.headers)
+    return rendered
+
+
+def refresh_in_background(cache_key: str, refresh: Callable[[], Awaitable[Any]]) -> None:
+    """Refresh the stale entry unless it is already being refreshed in this worker."""
+    if single_flight.in_flight(cache_key):
+        return
+    # nobody waits for the refresh, so it is not limited by the latency budget of the request
+    context = contextvars.copy_context()
+    context.run(latency_budget.set, None)
+    task = context.run(single_flight.start, cache_key, refresh)
+    refresh_tasks.add(task)
+    task.add_done_callback(on_refresh_done)
+
+
+def on_refresh_done(task: asyncio.Task[Any]) -> None:
+    refresh_tasks.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        logger.error("Error refreshing stale cache entry", exc_info=task.exception())
+
+
+async def respond_cached(
+    request: Request,
+    cache_key: str,
+    namespace: str,
+    stale_seconds: int,
+    render: Callable[[], Awaitable[tuple[CachedResponse, int]]],
+) -> Response:
+    """Respond with the cached entry, refreshing it if it is stale, or render it on a miss.
+
+    Clients may keep the response while it is fresh in the cache, e.g. for
+    `negative_cache_ttl_seconds` if it is a 404 error.
+    """
+    remaining_ttl, cached = await get_cached(cache_key, namespace)
+    if cached is not None and remaining_ttl > 0:
+        if remaining_ttl <= stale_seconds:
+            CACHE_STALE_HITS.labels(namespace).inc()
+            refresh_in_background(cache_key, render)
+        return cached.to_response(request, max_age=max(remaining_ttl - stale_seconds, 0))
+
+    try:
+        rendered, fresh_ttl = await single_flight.do(cache_key, render)
+    except UNAVAILABLE_ERRORS:
+        if cached is None:
+            raise
+        logger.warning("Serving expired cache entry '%s'", cache_key, exc_info=True)
+        count_cache_requests(namespace, "fallback")
+        return cached.to_response(request, max_age=0)
+    return rendered.to_response(request, max_age=fresh_ttl)
+
+
+def cache(
+    expire: int | None = None,
+    namespace: str = "",
+    id_param: str | None = None,
+    unless: Callable[..., bool] | None = None,
+    *,
+    trusted: bool = False,
+    stale_ttl: int | None = None,
+    normalize: Mapping[str, Callable[[Any], Any]] | None = None,
+) -> Callable[[Callable[P, Awaitable[R]]], Callable[P, Awaitable[R]]]:
+    """Cache rendered responses of the endpoint using the backend and key builder of FastAPICache.
+
+    Works like `fastapi_cache.decorator.cache`, but concurrent misses of the same key
+    are coalesced: only one coroutine per worker calls the endpoint and the others await its result.
+    The result is validated and serialized once, on a miss, and the body is stored with
+    the status code and the content type, so hits are sent without any processing.
+
+    Cached entries are tagged for invalidation: entries of a single document are tagged with
+    `<namespace>:<id>`, where the ID is taken from the `id_param` parameter of the endpoint,
+    the rest are tagged with the namespace itself.
+
+    Parameters listed in `normalize` are passed through their functions before the cache key
+    is built, so requests with e.g. differently cased search queries share the entry.
+    The normalized values only make the key, the endpoint gets the parameters as they are.
+
+    Requests for which `unless` returns True are not cached, the predicate is called
+    with the parameters of the endpoint. The endpoint may declare `request` and `response`
+    parameters itself, e.g. to set response headers of such requests.
+
+    Results of `trusted` endpoints are rendered without validation against the response model,
+    the endpoint must return data already valid for it, e.g. documents written by the ETL.
+    A fraction of such responses set by `trusted_response_validation_rate` is still validated
+    and mismatches are logged.
+
+    Entries are fresh for `expire` seconds and then stale for `stale_ttl` more seconds
+    (`cache_stale_ttl_seconds` by default). A stale entry is served at once and refreshed
+    by a background task, only requests coming after both periods wait for the endpoint.
+    If the endpoint fails because Elasticsearch is unavailable, the expired entry
+    is served if it is still kept in the cache.
+
+    Responses have strong ETags, hits with a matching `If-None-Match` are answered
+    with 304 Not Modified.
+
+    404 errors of the endpoint are cached as well, but only for `negative_cache_ttl_seconds`,
+    so lookups of missing documents do not reach Elasticsearch every time. The entries
+    are tagged like the found documents and dropped when the ETL loads the document.
+    """
+    stale_seconds = settings.cache_stale_ttl_seconds if stale_ttl is None else stale_ttl
+
+    def wrapper(func: Callable[P, Awaitable[R]]) -> Callable[P, Awaitable[R]]:
+        own_params = add_request_params(func)
+
+        @wraps(func)
+        async def inner(*args: P.args, **kwargs: P.kwargs) -> R:
+            request = cast(Request, kwargs["request"])
+            response = cast(Response, kwargs["response"])
+            for name in {"request", "response"} - own_params:
+                del kwargs[name]
+            if is_cache_bypassed(request) or (unless is not None and unless(*args, **kwargs)):
+                result = await func(*args, **kwargs)
+                if trusted:
+                    return cast(R, await render_trusted_response(request, response, result))
+                return result
+
+            cache_key = FastAPICache.get_key_builder()(
+                func,
+                namespace,
+                request=request,
+                response=response,
+                args=args,
+                kwargs=normalize_params(
+                    {name: value for name, value in kwargs.items() if name not in own_params},
+                    normalize or {},
+                ),
+            )
+
+            ttl = get_ttl(namespace, func.__name__, expire, cache_key)
+
+            async def call() -> tuple[CachedResponse, int]:
+                # another worker could have refreshed the entry while we were waiting for the lock
+                if single_flight.distributed and (
+                    fresh := await get_fresh_cached(cache_key, stale_seconds)
+                ):
+                    return fresh
+                rendered, fresh_ttl = await render_endpoint(
+                    request,
+                    func(*args, **kwargs),
+                    ttl,
+                    trusted=trusted,
+                )
+                if is_partial():
+                    # the next request may have the time to get the complete results
+                    return dataclasses.replace(rendered, partial=True), 0
+                await set_cached(
+                    cache_key,
+                    rendered,
+                    get_storage_ttl(fresh_ttl + stale_seconds),
+                    [get_tag(namespace, id_param, kwargs)],
+                )
+                return rendered, fresh_ttl
+
+            hot_keys.record(cache_key, HotKey(get_request_path(request), stale_seconds, call))
+            return cast(
+                R,
+                await respond_cached(request, cache_key, namespace, stale_seconds, call),
+            )
+
+        return inner
+
+    return wrapper
+
+
+async def get_many_cached(
+    ids: Sequence[K],
+    cache_keys: Sequence[str],
+    namespace: str,
+) -> tuple[dict[K, CachedResponse], dict[K, CachedResponse]]:
+    """Get cached responses by IDs with a single round-trip, split into live and expired ones.
+
+    Cached 404 responses of the endpoint are misses: the documents are looked up again,
+    so the array never contains error bodies and documents created since are found.
+    """
+    try:
+        entries = await get_backend().get_many(cache_keys)
+    except RedisError:
+        logger.warning("Error retrieving cache keys from backend", exc_info=True)
+        count_cache_requests(namespace, "error")
+        return {}, {}
+    live: dict[K, CachedResponse] = {}
+    expired: dict[K, CachedResponse] = {}
+    for id_, cache_key, (ttl, value) in zip(ids, cache_keys, entries, strict=True):
+        cached = None if value is None else load_cached(cache_key, value)
+        if cached is not None and cached.status_code == status.HTTP_200_OK:
+            target = live if ttl > settings.cache_fallback_ttl_seconds else expired
+            target[id_] = cached
+    count_cache_requests(namespace, "hit", len(live))
+    count_cache_requests(namespace, "miss", len(ids) - len(live))
+    return live, expired
+
+
+async def cache_many(
+    func: Callable[..., Any],
+    ids: Sequence[K],
+    fetch: Callable[[list[K]], Awaitable[Mapping[K, Any]]],
+    *,
+    request: Request,
+    response_model: type[BaseModel],
+    expire: int | None = None,
+    namespace: str = "",
+    id_param: str = "id",
+) -> Response:
+    """Respond with a JSON array of documents found by IDs.
+
+    Cached responses of the single document endpoint `func` are reused: they are looked up
+    with a single round-trip to Redis and their bodies are spliced into the array as is.
+    The missing documents are fetched at once, rendered with `response_model`
+    and cached back with a single round-trip as well, so they are shared with the endpoint.
+    Documents not found by `fetch` are skipped. The ETag is a hash of the whole array.
+    """
+    key_builder = FastAPICache.get_key_builder()
+    cache_keys = [key_builder(func, namespace, args=(), kwargs={id_param: id_}) for id_ in ids]
+    bypassed = is_cache_bypassed(request)
+    results: dict[K, CachedResponse] = {}
+    expired: dict[K, CachedResponse] = {}
+    if not bypassed:
+        results, expired = await get_many_cached(ids, cache_keys, namespace)
+
+    missing = [id_ for id_ in ids if id_ not in results]
+    response_class = get_response_class(cast(APIRoute, request.scope["route"]))
+    if missing:
+        try:
+            fetched = await fetch(missing)
+        except UNAVAILABLE_ERRORS:
+            if not expired.keys() >= set(missing):
+                raise
+            logger.warning("Serving expired cache entries of %d documents", len(missing))
+            count_cache_requests(namespace, "fallback", len(missing))
+            fetched = {}
+            results.update(expired)
+        rendered = {
+            id_: render_document(response_class, response_model, document)
+            for id_, document in fetched.items()
+        }
+        results.update(rendered)
+        if rendered and not bypassed:
+            await set_many_cached(
+                [
+                    (
+                        cache_key,
+                        rendered[id_].compress(),
+                        get_storage_ttl(
+                            get_ttl(namespace, func.__name__, expire, cache_key)
+                            + settings.cache_stale_ttl_seconds,
+                        ),
+                        [f"{namespace}:{id_}"],
+                    )
+                    for id_, cache_key in zip(ids, cache_keys, strict=True)
+                    if id_ in rendered
+                ],
+            )
+
+    body = b"[" + b",".join(results[id_].raw_body for id_ in ids if id_ in results) + b"]"
+    batch = CachedResponse(body, media_type="application/json", etag=make_etag(body))
+    return batch.to_response(request)
@@ -0,0 +1,255 @@
+import re
+import time
+
+from collections import OrderedDict
+from collections.abc import Collection, Iterable, Sequence
+
+from fastapi_cache.backends import Backend
+from fastapi_cache.backends.redis import RedisBackend
+from redis.asyncio import Redis
+from redis.asyncio.client import Pipeline
+
+from utils.cache_codec import CacheCodec
+from utils.metrics import LOCAL_CACHE_EVICTIONS, LOCAL_CACHE_REQUESTS, REDIS_DURATION
+
+LOCAL_CACHE_HITS = LOCAL_CACHE_REQUESTS.labels("hit")
+LOCAL_CACHE_MISSES = LOCAL_CACHE_REQUESTS.labels("miss")
+
+
+class LocalLRUCache:
+    """Bounded in-process LRU cache with per-entry TTL.
+
+    The size of the cache is measured in bytes of stored keys and values,
+    so a few large list pages cannot push out all the small detail entries unnoticed:
+    hits, misses and evictions are counted in the Prometheus metrics.
+    """
+
+    def __init__(self, max_size_bytes: int, max_ttl_seconds: float) -> None:
+        self.max_size_bytes = max_size_bytes
+        self.max_ttl_seconds = max_ttl_seconds
+        self.size_bytes = 0
+        # value, local expiration time and expiration time of the entry it was copied from
+        self._entries: OrderedDict[str, tuple[bytes, float, float]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_with_ttl(self, key: str) -> tuple[float, bytes] | None:
+        """Get the value and the remaining TTL it was stored with or None if the key is missing.
+
+        The TTL is counted down from the one passed to `set`, not from the capped local one,
+        so it matches the TTL of the entry in Redis.
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            LOCAL_CACHE_MISSES.inc()
+            return None
+        value, expires_at, deadline = entry
+        now = time.monotonic()
+        if expires_at <= now:
+            self.delete(key)
+            LOCAL_CACHE_MISSES.inc()
+            return None
+        self._entries.move_to_end(key)
+        LOCAL_CACHE_HITS.inc()
+        return deadline - now, value
+
+    def set(self, key: str, value: bytes, ttl: float | None = None) -> None:
+        """Store the value for at most `max_ttl_seconds`, evicting the least recently used keys."""
+        self.delete(key)
+        local_ttl = min(ttl, self.max_ttl_seconds) if ttl else self.max_ttl_seconds
+        entry_size = len(key) + len(value)
+        if local_ttl <= 0 or entry_size > self.max_size_bytes:
+            return
+        now = time.monotonic()
+        self._entries[key] = (value, now + local_ttl, now + (ttl or local_ttl))
+        self.size_bytes += entry_size
+        while self.size_bytes > self.max_size_bytes:
+            evicted_key, (evicted_value, *_) = self._entries.popitem(last=False)
+            self.size_bytes -= len(evicted_key) + len(evicted_value)
+            LOCAL_CACHE_EVICTIONS.inc()
+
+    def delete(self, key: str) -> bool:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return False
+        self.size_bytes -= len(key) + len(entry[0])
+        return True
+
+    def clear(self, prefix: str = "") -> int:
+        """Delete all keys starting with the prefix and return the number of deleted keys."""
+        keys = [key for key in self._entries if key.startswith(prefix)]
+        for key in keys:
+            self.delete(key)
+        return len(keys)
+
+
+class TwoTierBackend(Backend):
+    """Backend for fastapi-cache which keeps hot keys in worker memory in front of Redis.
+
+    Values found in Redis are copied into the local layer with their remaining TTL,
+    so an entry never outlives its Redis counterpart.
+
+    If the codec is given, values are encoded with it on their way to Redis and decoded back,
+    the local layer keeps them decoded. Values which can not be decoded are treated as missing.
+    """
+
+    def __init__(self, redis: Redis, local: LocalLRUCache, codec: CacheCodec | None = None) -> None:
+        self.redis = redis
+        self.local = local
+        self.codec = codec
+        self.remote = RedisBackend(redis)
+
+    def _encode(self, value: bytes) -> bytes:
+        return self.codec.encode(value) if self.codec else value
+
+    def _decode(self, value: bytes | None) -> bytes | None:
+        return self.codec.decode(value) if self.codec and value is not None else value
+
+    # Redis client returns bytes, though the base class declares str
+    async def get_with_ttl(self, key: str) -> tuple[int, bytes | None]:  # type: ignore[override]
+        entry = self.local.get_with_ttl(key)
+        if entry is not None:
+            local_ttl, local_value = entry
+            return int(local_ttl), local_value
+        async with self.redis.pipeline() as pipe:
+            pipe.ttl(key)
+            pipe.get(key)
+            with REDIS_DURATION.labels("get").time():
+                ttl, value = await pipe.execute()
+        value = self._decode(value)
+        if value is not None:
+            # Redis returns -1 for keys without expiration
+            self.local.set(key, value, ttl if ttl > 0 else None)
+        return ttl, value
+
+    async def get(self, key: str) -> bytes | None:  # type: ignore[override]
+        return (await self.get_with_ttl(key))[1]
+
+    async def get_ttls(self, keys: Sequence[str]) -> list[int]:
+        """Get TTLs of the keys in Redis with a single round-trip, -2 for missing keys.
+
+        The local layer is skipped, as it keeps entries for a shorter time than Redis.
+        """
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for key in keys:
+                pipe.ttl(key)
+            with REDIS_DURATION.labels("get_ttls").time():
+                ttls: list[int] = await pipe.execute()
+        return ttls
+
+    async def get_many(self, keys: Sequence[str]) -> list[tuple[int, bytes | None]]:
+        """Get TTLs and values of the keys, missing keys are returned as (0, None).
+
+        Keys missing locally are fetched with a single round-trip to Redis.
+        """
+        entries: dict[str, tuple[int, bytes]] = {}
+        missing = []
+        for key in keys:
+            entry = self.local.get_with_ttl(key)
+            if entry is None:
+                missing.append(key)
+            else:
+                entries[key] = (int(entry[0]), entry[1])
+        if missing:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                pipe.mget(missing)
+                for key in missing:
+                    pipe.ttl(key)
+                with REDIS_DURATION.labels("get_many").time():
+                    remote_values, *ttls = await pipe.execute()
+            for key, remote_value, ttl in zip(missing, remote_values, ttls, strict=True):
+                value = self._decode(remote_value)
+                if value is not None:
+                    self.local.set(key, value, ttl if ttl > 0 else None)
+                    entries[key] = (ttl, value)
+        return [entries.get(key, (0, None)) for key in keys]
+
+    async def set(
+        self,
+        key: str,
+        value: str | bytes,
+        expire: int | None = None,
+        tag_keys: Collection[str] = (),
+    ) -> None:
+        """Store the value and add its key to the sets of the tags."""
+        await self.set_many([(key, value, expire, tag_keys)])
+
+    async def set_many(
+        self,
+        entries: Iterable[tuple[str, str | bytes, int | None, Collection[str]]],
+    ) -> None:
+        """Store (key, value, expire, tag keys) entries with a single round-trip to Redis."""
+        stored = {}
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for key, value, expire, tag_keys in entries:
+                data = value.encode() if isinstance(value, str) else value
+                stored[key] = (data, expire)
+                self._set(pipe, key, self._encode(data), expire, tag_keys)
+            with REDIS_DURATION.labels("set").time():
+                await pipe.execute()
+        for key, (data, expire) in stored.items():
+            self.local.set(key, data, expire)
+
+    @staticmethod
+    def _set(
+        pipe: Pipeline,
+        key: str,
+        data: bytes,
+        expire: int | None,
+        tag_keys: Collection[str],
+    ) -> None:
+        pipe.set(key, data, ex=expire)
+        for tag_key in tag_keys:
+            pipe.sadd(tag_key, key)
+            if expire:
+                # the tag must live at least as long as the longest living key in it
+                pipe.expire(tag_key, expire, nx=True)
+                pipe.expire(tag_key, expire, gt=True)
+
+    async def invalidate_tags(self, tag_keys: Collection[str]) -> int:
+        """Delete all keys of the tags and return the number of deleted keys."""
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for tag_key in tag_keys:
+                pipe.smembers(tag_key)
+            with REDIS_DURATION.labels("invalidate").time():
+                members: list[set[bytes]] = await pipe.execute()
+        keys = set().union(*members)
+        if not keys:
+            return 0
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.delete(*keys)
+            for tag_key, tag_members in zip(tag_keys, members, strict=True):
+                if tag_members:
+                    pipe.srem(tag_key, *tag_members)
+            with REDIS_DURATION.labels("invalidate").time():
+                await pipe.execute()
+        for key in keys:
+            self.local.delete(key.decode())
+        return len(keys)
+
+    async def invalidate_prefix(self, prefix: str, batch_size: int = 1000) -> int:
+        """Delete all keys starting with the prefix and return the number of deleted keys.
+
+        Keys are found with SCAN and unlinked in batches, so Redis is not blocked
+        like it is by KEYS on large databases.
+        """
+        self.local.clear(prefix)
+        pattern = re.sub(r"([*?\[\]\\])", r"\\\1", prefix) + "*"
+        deleted = 0
+        batch = []
+        async for key in self.redis.scan_iter(match=pattern, count=batch_size):
+            batch.append(key)
+            if len(batch) >= batch_size:
+                deleted += await self.redis.unlink(*batch)
+                batch.clear()
+        if batch:
+            deleted += await self.redis.unlink(*batch)
+        return deleted
+
+    async def clear(self, namespace: str | None = None, key: str | None = None) -> int:
+        if namespace:
+            return await self.invalidate_prefix(f"{namespace}:")
+        if key:
+            self.local.delete(key)
+        return await self.remote.clear(namespace, key)
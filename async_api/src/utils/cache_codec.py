@@ -0,0 +1,110 @@
+import logging
+import time
+import zlib
+
+from utils.metrics import CACHE_CODER_DURATION, CACHE_COMPRESSION_RATIO
+
+logger = logging.getLogger(__name__)
+
+# Compressed entries start with a zero byte, which can not start a rendered response,
+# followed by the ID of the codec. Entries without the marker are stored as is.
+MARKER = b"\x00"
+RAW = b"r"
+ZLIB = b"z"
+ZLIB_DICTIONARY = b"d"
+GZIP_MAGIC = b"\x1f\x8b"
+
+# Fragments repeated in rendered films and persons, the most frequent ones go last.
+# Entries store the checksum of the dictionary, so changing it only turns old entries into misses.
+RESPONSE_DICTIONARY = (
+    b'{"uuid":"","full_name":"","films":[{"uuid":"","roles":["actor","writer","director"]}]}'
+    b'[{"uuid":"","name":""}],"description":null,"description":"'
+    b'","genres":[{"uuid":"","name":"Drama"},{"uuid":"","name":"Action"}],'
+    b'"actors":[],"writers":[],"directors":[]'
+    b'[{"uuid":"","title":"","imdb_rating":},{"uuid":"","title":"","imdb_rating":'
+    b'{"uuid":"","name":""},{"uuid":"","name":""},{"uuid":"","name":""}'
+)
+
+
+class CacheCodec:
+    """Compresses cache entries larger than `min_size` bytes before they are sent to Redis.
+
+    Entries are compressed with zlib, by default using a preset dictionary of the common
+    JSON fragments of our responses, which matters most for small entries like single films.
+    Every entry carries a header with its codec, so compressed and uncompressed entries
+    coexist, e.g. while the threshold is changed or after an upgrade.
+    Entries gzipped already are stored as is, compressing them again only costs time.
+    """
+
+    def __init__(
+        self,
+        min_size: int,
+        level: int = 1,
+        dictionary: bytes | None = RESPONSE_DICTIONARY,
+    ) -> None:
+        self.min_size = min_size
+        self.level = level
+        self.dictionary = dictionary
+        self.header = (
+            MARKER + ZLIB_DICTIONARY + zlib.crc32(dictionary).to_bytes(4)
+            if dictionary
+            else MARKER + ZLIB
+        )
+
+    def encode(self, data: bytes) -> bytes:
+        if len(data) < self.min_size or is_gzipped(data):
+            return self._encode_raw(data)
+        start = time.perf_counter()
+        if self.dictionary:
+            compressor = zlib.compressobj(self.level, zdict=self.dictionary)
+        else:
+            compressor = zlib.compressobj(self.level)
+        encoded = self.header + compressor.compress(data) + compressor.flush()
+        CACHE_CODER_DURATION.labels("encode").observe(time.perf_counter() - start)
+        if len(encoded) >= len(data):
+            return self._encode_raw(data)
+        CACHE_COMPRESSION_RATIO.observe(len(data) / len(encoded))
+        return encoded
+
+    @staticmethod
+    def _encode_raw(data: bytes) -> bytes:
+        return MARKER + RAW + data if data.startswith(MARKER) else data
+
+    def decode(self, data: bytes) -> bytes | None:
+        """Restore the entry or return None if its codec is unknown or it is corrupted."""
+        if not data.startswith(MARKER):
+            return data
+        codec, payload = data[1:2], data[2:]
+        if codec == RAW:
+            return payload
+        start = time.perf_counter()
+        try:
+            if codec == ZLIB:
+                decoded, complete = zlib.decompress(payload), True
+            elif self.dictionary and data.startswith(self.header):
+                decompressor = zlib.decompressobj(zdict=self.dictionary)
+                decoded = decompressor.decompress(payload[4:]) + decompressor.flush()
+                # unlike zlib.decompress, the object returns what it got from a truncated stream
+                complete = decompressor.eof
+            else:
+                logger.warning("Unknown codec of cache entry: %r", data[:6])
+                return None
+        except zlib.error:
+            logger.warning("Corrupted compressed cache entry", exc_info=True)
+            return None
+        if not complete:
+            logger.warning("Truncated compressed cache entry")
+            return None
+        CACHE_CODER_DURATION.labels("decode").observe(time.perf_counter() - start)
+        return decoded
+
+
+def is_gzipped(data: bytes) -> bool:
+    """Check whether the entry is a gzip stream or a cached response with a gzipped body.
+
+    Cached responses start with a JSON header line, which never contains the gzip magic bytes.
+    """
+    if data.startswith(GZIP_MAGIC):
+        return True
+    line_end = data.find(b"\n")
+    return line_end >= 0 and data.startswith(GZIP_MAGIC, line_end + 1)
@@ -0,0 +1,98 @@
+import asyncio
+import logging
+
+from collections import defaultdict
+from collections.abc import Callable, Iterable
+
+import orjson
+
+from fastapi_cache import FastAPICache
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from utils.cache import get_backend, tag_key
+
+logger = logging.getLogger(__name__)
+
+
+class CacheInvalidator:
+    """Drops cache entries of the documents updated by the ETL.
+
+    The ETL publishes IDs of the loaded films, persons and genres to a Redis stream.
+    Every worker reads the whole stream: it deletes the tagged entries from Redis
+    and clears its local cache layer for the namespace. The ID of the last processed event
+    is kept in Redis, so events published while the API was down are processed on startup.
+    Malformed events and events failing in listeners are logged and skipped.
+
+    Other in-process state built from the documents can subscribe to the events with listeners.
+    """
+
+    def __init__(self, redis: Redis, stream: str, block_ms: int = 5000) -> None:
+        self.redis = redis
+        self.stream = stream
+        self.block_ms = block_ms
+        self.last_id_key = f"{FastAPICache.get_prefix()}:{stream}:last-id"
+        self.listeners: defaultdict[str, list[Callable[[list[str]], None]]] = defaultdict(list)
+
+    def add_listener(self, namespace: str, listener: Callable[[list[str]], None]) -> None:
+        """Call the listener with IDs of the updated documents of the namespace."""
+        self.listeners[namespace].append(listener)
+
+    async def invalidate(self, namespace: str, ids: Iterable[str]) -> None:
+        """Drop entries of the documents and all list entries of the namespace."""
+        backend = get_backend()
+        tags = [namespace, *(f"{namespace}:{id_}" for id_ in ids)]
+        deleted = await backend.invalidate_tags([tag_key(tag) for tag in tags])
+        backend.local.clear(f"{FastAPICache.get_prefix()}:{namespace}:")
+        logger.info("Invalidated %d cache entries of %s", deleted, namespace)
+
+    async def run(self) -> None:
+        last_id: bytes | str | None = None
+        while True:
+            try:
+                if last_id is None:
+                    last_id = await self.get_last_id()
+                last_id = await self.process_events(last_id)
+            except RedisError:
+                logger.exception("Error reading cache invalidation events")
+                await asyncio.sleep(self.block_ms / 1000)
+
+    async def get_last_id(self) -> bytes | str:
+        """Return the ID of the last processed event, or of the last event in the stream."""
+        last_id: bytes | None = await self.redis.get(self.last_id_key)
+        if last_id:
+            return last_id
+        # "$" is resolved by every read, so events published between the reads would be lost
+        latest = await self.redis.xrevrange(self.stream, count=1)
+        return latest[0][0] if latest else "0-0"
+
+    async def process_events(self, last_id: bytes | str) -> bytes | str:
+        response = await self.redis.xread({self.stream: last_id}, count=100, block=self.block_ms)
+        for _, events in response:
+            for event_id, fields in events:
+                try:
+                    namespace, ids = decode_event(fields)
+                except (KeyError, ValueError):
+                    logger.exception("Skipping malformed cache invalidation event %s", event_id)
+                else:
+                    self._notify(namespace, ids)
+                    await self.invalidate(namespace, ids)
+                last_id = event_id
+            await self.redis.set(self.last_id_key, last_id)
+        return last_id
+
+    def _notify(self, namespace: str, ids: list[str]) -> None:
+        for listener in self.listeners[namespace]:
+            try:
+                listener(ids)
+            except Exception:
+                logger.exception("Error in cache invalidation listener of %s", namespace)
+
+
+def decode_event(fields: dict[bytes, bytes]) -> tuple[str, list[str]]:
+    """Return the namespace and the IDs of the updated documents of the event."""
+    namespace, ids = fields[b"entity"].decode(), orjson.loads(fields[b"ids"])
+    if not isinstance(ids, list) or not all(isinstance(id_, str) for id_ in ids):
+        msg = f"IDs must be a list of strings, got {ids!r}"
+        raise ValueError(msg)
+    return namespace, ids
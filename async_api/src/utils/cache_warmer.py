@@ -0,0 +1,123 @@
+import asyncio
+import logging
+
+from http import HTTPStatus
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+from starlette.types import ASGIApp, Message
+
+from core.settings import settings
+from utils.cache import get_backend, hot_keys, refresh_in_background
+
+logger = logging.getLogger(__name__)
+
+# counts of the requests are multiplied by this every interval, so the keys hot lately win
+HOT_KEYS_DECAY = 0.8
+# saved paths are dropped if no worker updates them for this long
+SAVED_PATHS_TTL_SECONDS = 7 * 24 * 3600
+
+
+class CacheWarmer:
+    """Keeps the entries of the most requested cache keys fresh.
+
+    Every interval the warmer looks up the remaining TTLs of the hottest keys counted by
+    `hot_keys` and refreshes the entries which become stale within `cache_refresh_ahead_seconds`,
+    or are missing, e.g. after a Redis flush, in the background. Requests for them
+    never wait for the endpoint.
+
+    The paths of the hottest keys are saved in a sorted set in Redis with their counts.
+    On startup a new deploy requests them through the app before it serves traffic,
+    so the cache is filled without a burst of misses after a rollout.
+    """
+
+    def __init__(self, app: ASGIApp, redis: Redis, key: str) -> None:
+        self.app = app
+        self.redis = redis
+        self.key = key
+
+    async def warm_up(self) -> None:
+        """Request the saved paths, giving up on the ones not done in time."""
+        try:
+            paths = await self.redis.zrevrange(self.key, 0, settings.cache_warm_keys - 1)
+        except RedisError:
+            logger.exception("Error loading hot cache keys")
+            return
+        if not paths:
+            return
+        semaphore = asyncio.Semaphore(settings.cache_warmup_concurrency)
+
+        async def warm(path: str) -> int:
+            async with semaphore:
+                return await self.request(path)
+
+        tasks = [asyncio.create_task(warm(path.decode())) for path in paths]
+        done, pending = await asyncio.wait(tasks, timeout=settings.cache_warmup_timeout_seconds)
+        for task in pending:
+            task.cancel()
+        warmed = sum(
+            task.exception() is None and task.result() < HTTPStatus.BAD_REQUEST for task in done
+        )
+        logger.info("Warmed up %d of %d hot cache keys", warmed, len(paths))
+
+    async def request(self, path: str) -> int:
+        """Send a GET request for the path to the app and return the status of the response."""
+        path, _, query_string = path.partition("?")
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": "GET",
+            "scheme": "http",
+            "path": path,
+            "raw_path": path.encode(),
+            "query_string": query_string.encode(),
+            "root_path": "",
+            "headers": [(b"host", b"localhost"), (b"accept-encoding", b"gzip")],
+            "client": None,
+            "server": None,
+        }
+        status = 0
+
+        async def receive() -> Message:
+            return {"type": "http.request", "body": b"", "more_body": False}
+
+        async def send(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+
+        await self.app(scope, receive, send)
+        return status
+
+    async def refresh(self) -> None:
+        """Refresh the entries of the hottest keys which are about to become stale."""
+        top = hot_keys.rank(settings.cache_warm_keys)
+        if not top:
+            return
+        ttls = await get_backend().get_ttls([cache_key for cache_key, _, _ in top])
+        for (cache_key, hot_key, _), ttl in zip(top, ttls, strict=True):
+            fresh_seconds = ttl - settings.cache_fallback_ttl_seconds - hot_key.stale_seconds
+            if fresh_seconds <= settings.cache_refresh_ahead_seconds:
+                refresh_in_background(cache_key, hot_key.render)
+
+    async def save(self) -> None:
+        """Save the paths of the hottest keys, keeping the hottest ones saved by all workers."""
+        top = hot_keys.top(settings.cache_warm_keys)
+        if not top:
+            return
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.zadd(self.key, {hot_key.path: count for _, hot_key, count in top})
+            pipe.zremrangebyrank(self.key, 0, -settings.cache_warm_keys - 1)
+            pipe.expire(self.key, SAVED_PATHS_TTL_SECONDS)
+            await pipe.execute()
+
+    async def run(self) -> None:
+        while True:
+            await asyncio.sleep(settings.cache_warmer_interval_seconds)
+            try:
+                await self.refresh()
+                await self.save()
+            except RedisError:
+                logger.exception("Error warming hot cache keys")
+            hot_keys.sketch.decay(HOT_KEYS_DECAY)
@@ -0,0 +1,101 @@
+from typing import TypeVar
+
+import logging
+import time
+
+from collections.abc import Awaitable, Callable
+
+T = TypeVar("T")
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitOpenError(Exception):
+    """The call was rejected without trying it because the service is considered down."""
+
+    def __init__(self, name: str, retry_after: float) -> None:
+        super().__init__(f"Circuit of {name} is open, retry in {retry_after:.1f}s")
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """Rejects calls to a failing service instead of waiting for its timeouts.
+
+    After `failure_threshold` consecutive failures the circuit opens and calls fail at once
+    with CircuitOpenError. When `recovery_seconds` pass, a single probe call is let through:
+    its success closes the circuit, its failure keeps the circuit open for another period.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int,
+        recovery_seconds: float,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_seconds = recovery_seconds
+        self.clock = clock
+        self.failures = 0
+        self.opened_at: float | None = None
+        self._probing = False
+
+    @property
+    def is_open(self) -> bool:
+        return self.opened_at is not None
+
+    async def call(
+        self,
+        func: Callable[[], Awaitable[T]],
+        is_failure: Callable[[Exception], bool | None],
+    ) -> T:
+        """Call the function unless the circuit is open.
+
+        Exceptions for which `is_failure` returns False, e.g. 404 responses,
+        prove that the service is up and count as successes. Exceptions for which it returns
+        None, e.g. timeouts shortened by the caller, tell nothing about the service
+        and are not counted.
+        """
+        probe = self._before_call()
+        try:
+            result = await func()
+        except Exception as e:
+            failure = is_failure(e)
+            if failure:
+                self._on_failure()
+            elif failure is not None:
+                self._on_success()
+            raise
+        finally:
+            if probe:
+                self._probing = False
+        self._on_success()
+        return result
+
+    def record_failure(self) -> None:
+        """Count a failure which did not fail the call, e.g. of a single search of a batch."""
+        self._on_failure()
+
+    def _before_call(self) -> bool:
+        """Check whether the call is allowed and return whether it is a probe."""
+        if self.opened_at is None:
+            return False
+        retry_after = self.opened_at + self.recovery_seconds - self.clock()
+        if retry_after > 0 or self._probing:
+            raise CircuitOpenError(self.name, max(retry_after, 0))
+        self._probing = True
+        return True
+
+    def _on_success(self) -> None:
+        if self.opened_at is not None:
+            logger.info("Circuit of %s is closed", self.name)
+        self.failures = 0
+        self.opened_at = None
+
+    def _on_failure(self) -> None:
+        self.failures += 1
+        if self.opened_at is not None or self.failures >= self.failure_threshold:
+            if self.opened_at is None:
+                logger.warning("Circuit of %s is open after %d failures", self.name, self.failures)
+            self.opened_at = self.clock()
@@ -0,0 +1,55 @@
+import heapq
+
+from operator import itemgetter
+
+
+class SpaceSaving:
+    """Approximate counts of the most frequent keys of a stream in bounded memory.
+
+    At most `capacity` keys are counted. A new key replaces the key with the lowest count
+    and inherits its count, so counts may be overestimated by up to that count,
+    but every key which is more frequent than it is among the counted ones.
+    Counts can be decayed, so the keys frequent lately take over from the ones frequent before.
+    """
+
+    def __init__(self, capacity: int) -> None:
+        self.capacity = capacity
+        self.counts: dict[str, float] = {}
+        # snapshots of the counts, the outdated ones are skipped when the minimum is looked up
+        self._heap: list[tuple[float, str]] = []
+
+    def __len__(self) -> int:
+        return len(self.counts)
+
+    def add(self, key: str, weight: float = 1) -> str | None:
+        """Count the key and return the key it replaced, if any."""
+        evicted = None
+        count = self.counts.get(key)
+        if count is None:
+            if len(self.counts) < self.capacity:
+                count = 0
+            else:
+                evicted, count = self._pop_min()
+        self.counts[key] = count = count + weight
+        heapq.heappush(self._heap, (count, key))
+        if len(self._heap) > 4 * self.capacity:
+            self._rebuild()
+        return evicted
+
+    def top(self, n: int) -> list[tuple[str, float]]:
+        return heapq.nlargest(n, self.counts.items(), key=itemgetter(1))
+
+    def decay(self, factor: float) -> None:
+        self.counts = {key: count * factor for key, count in self.counts.items()}
+        self._rebuild()
+
+    def _pop_min(self) -> tuple[str, float]:
+        while True:
+            count, key = heapq.heappop(self._heap)
+            if self.counts.get(key) == count:
+                del self.counts[key]
+                return key, count
+
+    def _rebuild(self) -> None:
+        self._heap = [(count, key) for key, count in self.counts.items()]
+        heapq.heapify(self._heap)
@@ -0,0 +1,88 @@
+import math
+import time
+
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from core.settings import settings
+
+PARTIAL_RESULTS_HEADER = "X-Partial-Results"
+
+
+class LatencyBudgetExceededError(TimeoutError):
+    def __init__(self) -> None:
+        super().__init__("Latency budget of the request is exhausted")
+
+
+@dataclass
+class LatencyBudget:
+    """Time the request may take, counted from its start.
+
+    The budget of the route is looked up when it is needed, as the route is only known
+    after routing. `partial` is set when Elasticsearch returned partial results
+    because the budget ran out.
+    """
+
+    scope: Scope
+    started: float = field(default_factory=time.monotonic)
+    partial: bool = False
+
+    @property
+    def seconds(self) -> float:
+        path: str = getattr(self.scope.get("route"), "path", "")
+        return settings.request_budgets_ms.get(path, settings.request_budget_ms) / 1000
+
+    def remaining(self) -> float:
+        return self.started + self.seconds - time.monotonic()
+
+
+latency_budget: ContextVar[LatencyBudget | None] = ContextVar("latency_budget", default=None)
+
+
+def is_partial() -> bool:
+    budget = latency_budget.get()
+    return budget is not None and budget.partial
+
+
+def search_timeout(request_timeout: float) -> str:
+    """Timeout of the search in Elasticsearch for the given timeout of the HTTP request.
+
+    It is shorter than the request timeout, so the partial results returned
+    when it runs out still have time to reach the API.
+    """
+    margin = settings.es_timeout_margin_ms / 1000
+    seconds = max(request_timeout - margin, request_timeout / 2)
+    return f"{max(math.floor(seconds * 1000), 1)}ms"
+
+
+class LatencyBudgetMiddleware:
+    """Starts the latency budget of every request and flags responses with partial results.
+
+    Such responses get the `X-Partial-Results` header and must not be stored by HTTP caches.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        budget = LatencyBudget(scope)
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start" and budget.partial:
+                headers = MutableHeaders(raw=message["headers"])
+                headers[PARTIAL_RESULTS_HEADER] = "true"
+                headers["Cache-Control"] = "no-store"
+            await send(message)
+
+        token = latency_budget.set(budget)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            latency_budget.reset(token)
@@ -0,0 +1,139 @@
+from typing import Any, ParamSpec, TypeVar
+
+import os
+import time
+
+from collections.abc import Callable, Coroutine
+from functools import wraps
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+)
+from prometheus_client.multiprocess import MultiProcessCollector
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+P = ParamSpec("P")
+R = TypeVar("R")
+
+REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "Duration of HTTP requests by route template and status code.",
+    ["method", "route", "status"],
+)
+CACHE_REQUESTS = Counter(
+    "cache_requests",
+    "Lookups of the response cache by namespace and result: hit, miss, error or fallback,"
+    " when an expired entry is served because Elasticsearch is unavailable.",
+    ["namespace", "result"],
+)
+LOCAL_CACHE_REQUESTS = Counter(
+    "local_cache_requests",
+    "Lookups of the in-process cache layer by result: hit or miss.",
+    ["result"],
+)
+LOCAL_CACHE_EVICTIONS = Counter(
+    "local_cache_evictions",
+    "Entries evicted from the in-process cache layer to keep it within its size.",
+)
+CACHE_STALE_HITS = Counter(
+    "cache_stale_hits",
+    "Cache hits served stale while the entry was refreshed in the background, by namespace.",
+    ["namespace"],
+)
+REDIS_DURATION = Histogram(
+    "redis_request_duration_seconds",
+    "Duration of round-trips to Redis by cache operation.",
+    ["operation"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1),
+)
+CACHE_COMPRESSION_RATIO = Histogram(
+    "cache_compression_ratio",
+    "Ratio of the original to the compressed size of cache entries.",
+    buckets=(1, 1.5, 2, 3, 4, 6, 8, 12, 16),
+)
+CACHE_CODER_DURATION = Histogram(
+    "cache_coder_duration_seconds",
+    "Duration of compression and decompression of cache entries by operation: encode or decode.",
+    ["operation"],
+    buckets=(0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01),
+)
+ID_FILTER_REJECTIONS = Counter(
+    "id_filter_rejections",
+    "Lookups answered with 404 because the ID filter ruled the ID out, by namespace.",
+    ["namespace"],
+)
+ELASTICSEARCH_DURATION = Histogram(
+    "elasticsearch_request_duration_seconds",
+    "Duration of Elasticsearch requests by service method.",
+    ["method"],
+)
+ELASTICSEARCH_BATCH_SIZE = Histogram(
+    "elasticsearch_msearch_batch_size",
+    "Number of searches sent to Elasticsearch in a single _msearch request.",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128),
+)
+
+
+def track_elasticsearch(
+    func: Callable[P, Coroutine[Any, Any, R]],
+) -> Callable[P, Coroutine[Any, Any, R]]:
+    """Observe the duration of the service method in the Elasticsearch histogram."""
+    histogram = ELASTICSEARCH_DURATION.labels(func.__qualname__)
+
+    @wraps(func)
+    async def inner(*args: P.args, **kwargs: P.kwargs) -> R:
+        with histogram.time():
+            return await func(*args, **kwargs)
+
+    return inner
+
+
+class PrometheusMiddleware:
+    """Observes the duration of HTTP requests.
+
+    Requests are labelled with the path template of the matched route rather than the path itself,
+    so the number of time series does not depend on the number of films and persons.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            REQUEST_DURATION.labels(
+                scope["method"],
+                getattr(scope.get("route"), "path", "unmatched"),
+                status_code,
+            ).observe(time.perf_counter() - start)
+
+
+def generate_metrics() -> tuple[bytes, str]:
+    """Render the metrics and return them with their content type.
+
+    When the API runs in several worker processes, `PROMETHEUS_MULTIPROC_DIR` must be set,
+    then the metrics of all workers are collected from the files in this directory.
+    """
+    if "PROMETHEUS_MULTIPROC_DIR" not in os.environ:
+        return generate_latest(), CONTENT_TYPE_LATEST
+    registry = CollectorRegistry()
+    MultiProcessCollector(registry)  # type: ignore[no-untyped-call]
+    return generate_latest(registry), CONTENT_TYPE_LATEST
@@ -0,0 +1,89 @@
+from typing import Any, cast
+
+import asyncio
+
+from collections.abc import Awaitable, Callable, Sequence
+
+from utils.metrics import ELASTICSEARCH_BATCH_SIZE
+
+# header and body of a search as they are sent in the _msearch request
+Search = tuple[dict[str, Any], dict[str, Any]]
+
+
+class MultiSearchBatcher:
+    """Collects concurrent searches and sends them as a single _msearch request.
+
+    The first search of a batch opens a window: the batch is sent when `window_seconds` pass
+    or it reaches `max_size` searches, whichever comes first. Then the responses are handed
+    back to the waiting callers in order. `send` returns a response or an exception
+    for every search; if it raises or returns fewer responses, every search of the batch
+    left without a response fails with its error.
+    The batch is sent with the longest request timeout of its searches,
+    or without one if any of them has none.
+    """
+
+    def __init__(
+        self,
+        send: Callable[[Sequence[Search], float | None], Awaitable[Sequence[Any]]],
+        window_seconds: float,
+        max_size: int,
+    ) -> None:
+        self.send = send
+        self.window_seconds = window_seconds
+        self.max_size = max_size
+        self._batch: list[tuple[Search, float | None, asyncio.Future[Any]]] = []
+        self._timer: asyncio.TimerHandle | None = None
+        self._send_tasks: set[asyncio.Task[None]] = set()
+
+    async def search(
+        self,
+        header: dict[str, Any],
+        body: dict[str, Any],
+        request_timeout: float | None = None,
+    ) -> Any:
+        loop = asyncio.get_running_loop()
+        future: asyncio.Future[Any] = loop.create_future()
+        self._batch.append(((header, body), request_timeout, future))
+        if len(self._batch) >= self.max_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window_seconds, self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._batch = self._batch, []
+        # a caller cancelled while waiting for the window does not need its search sent
+        batch = [
+            (search, timeout, future) for search, timeout, future in batch if not future.done()
+        ]
+        if not batch:
+            return
+        task = asyncio.create_task(self._send(batch))
+        self._send_tasks.add(task)
+        task.add_done_callback(self._send_tasks.discard)
+
+    async def _send(self, batch: list[tuple[Search, float | None, asyncio.Future[Any]]]) -> None:
+        ELASTICSEARCH_BATCH_SIZE.observe(len(batch))
+        timeouts = [timeout for _, timeout, _ in batch]
+        request_timeout = None if None in timeouts else max(cast(list[float], timeouts))
+        try:
+            responses = await self.send([search for search, _, _ in batch], request_timeout)
+            # a response missing for any search fails the rest of the batch
+            for (_, _, future), response in zip(batch, responses, strict=True):
+                if future.done():
+                    continue
+                if isinstance(response, Exception):
+                    future.set_exception(response)
+                else:
+                    future.set_result(response)
+        except Exception as e:  # noqa: BLE001
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+        finally:
+            # e.g. the batch is cancelled, callers must never wait forever
+            for _, _, future in batch:
+                future.cancel()
@@ -0,0 +1,50 @@
+from typing import Any, cast, get_args, get_origin
+
+import inspect
+
+from collections.abc import Callable, Mapping
+from functools import cache
+
+from pydantic import BaseModel
+
+Projector = Callable[[Any], Any]
+
+
+def _identity(value: Any) -> Any:
+    return value
+
+
+@cache
+def get_projector(annotation: Any) -> Projector:
+    """Build a function which shapes trusted data as the annotation without validating it.
+
+    Models are projected to dicts with their own fields, which are looked up by validation aliases
+    in mappings or in attributes of other models. Lists are projected item by item,
+    other values are returned as is, so they must be serializable already.
+    """
+    if get_origin(annotation) is list:
+        project_item = get_projector(get_args(annotation)[0])
+        return lambda value: [project_item(item) for item in value]
+
+    if not (inspect.isclass(annotation) and issubclass(annotation, BaseModel)):
+        return _identity
+
+    fields = [
+        (
+            name,
+            field.validation_alias if isinstance(field.validation_alias, str) else name,
+            get_projector(cast(Any, field.annotation)),
+            field.is_required(),
+            field.get_default(call_default_factory=True),
+        )
+        for name, field in annotation.model_fields.items()
+    ]
+
+    def project_model(value: Any) -> dict[str, Any]:
+        source = value if isinstance(value, Mapping) else vars(value)
+        return {
+            name: project(source[key]) if required or key in source else default
+            for name, key, project, required, default in fields
+        }
+
+    return project_model
@@ -0,0 +1,75 @@
+from typing import Any, TypeVar, cast
+
+import asyncio
+import contextlib
+
+from collections.abc import Awaitable, Callable
+from functools import partial
+
+from redis.asyncio import Redis
+from redis.exceptions import LockError
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """Coalesces concurrent calls with the same key into a single call.
+
+    The first caller starts the call in a separate task and every caller, the first one included,
+    awaits its result, so a cancelled caller does not cancel the call for the others.
+    If Redis is provided, the call is also guarded by a Redis lock,
+    so only one worker at a time makes the call for the key.
+    """
+
+    def __init__(self, redis: Redis | None = None, lock_timeout: float = 10) -> None:
+        self.redis = redis
+        self.lock_timeout = lock_timeout
+        self._calls: dict[str, asyncio.Task[Any]] = {}
+
+    @property
+    def distributed(self) -> bool:
+        return self.redis is not None
+
+    def in_flight(self, key: str) -> bool:
+        return key in self._calls
+
+    async def do(self, key: str, func: Callable[[], Awaitable[T]]) -> T:
+        """Call the function or join the call for the same key which is already in flight."""
+        return await asyncio.shield(self.start(key, func))
+
+    def start(self, key: str, func: Callable[[], Awaitable[T]]) -> asyncio.Task[T]:
+        """Start the call unless the call for the same key is already in flight, return its task.
+
+        The call is in flight as soon as this returns, so callers which do not await it,
+        e.g. background refreshes, are coalesced as well.
+        """
+        call = self._calls.get(key)
+        if call is None:
+            call = asyncio.create_task(self._call(key, func))
+            self._calls[key] = call
+            call.add_done_callback(partial(self._forget, key))
+        return cast(asyncio.Task[T], call)
+
+    def _forget(self, key: str, call: asyncio.Task[Any]) -> None:
+        if self._calls.get(key) is call:
+            del self._calls[key]
+        if not call.cancelled():
+            # the exception is delivered to the callers, do not report it as never retrieved
+            call.exception()
+
+    async def _call(self, key: str, func: Callable[[], Awaitable[T]]) -> T:
+        if self.redis is None:
+            return await func()
+        lock = self.redis.lock(
+            f"{key}:lock",
+            timeout=self.lock_timeout,
+            blocking_timeout=self.lock_timeout,
+        )
+        # if the lock holder hangs, make the call anyway after waiting for the timeout
+        acquired = await lock.acquire()
+        try:
+            return await func()
+        finally:
+            if acquired:
+                with contextlib.suppress(LockError):
+                    await lock.release()
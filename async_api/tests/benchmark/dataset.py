@@ -0,0 +1,95 @@
+from typing import Any
+
+from collections import defaultdict
+from dataclasses import dataclass
+from random import Random
+
+from models.film import Film, GenreIdName, PersonIdName
+from models.genre import Genre
+from models.person import Person, PersonFilm
+from models.value_objects import FilmID, PersonID, Roles
+from tests.functional.utils.factories import GENRES, FilmFactory, GenreFactory, PersonFactory
+
+
+@dataclass(frozen=True)
+class Scale:
+    films: int
+    persons: int
+
+
+SCALES = {
+    "small": Scale(films=1_000, persons=500),
+    "medium": Scale(films=10_000, persons=4_000),
+    "large": Scale(films=50_000, persons=20_000),
+}
+
+
+@dataclass(frozen=True)
+class Dataset:
+    films: list[Film]
+    persons: list[Person]
+    genres: list[Genre]
+
+    def documents(self) -> dict[str, list[dict[str, Any]]]:
+        """Documents of the films, persons and genres as the ETL loads them to Elasticsearch."""
+        return {
+            "films": [film.model_dump(mode="json") for film in self.films],
+            "persons": [person.model_dump(mode="json") for person in self.persons],
+            "genres": [genre.model_dump(mode="json") for genre in self.genres],
+        }
+
+
+def generate_dataset(scale: Scale, seed: int = 0) -> Dataset:
+    """Generate films and persons which reference each other, like the ETL output does.
+
+    Factories alone generate films with random persons, so person pages would never list them.
+    Here the cast of every film is picked from the generated persons and
+    the filmography of every person is collected from the films.
+    """
+    random = Random(seed)
+    FilmFactory.seed_random(seed)
+    PersonFactory.seed_random(seed)
+    GenreFactory.seed_random(seed)
+
+    genres = [GenreFactory.build(name=name) for name in GENRES]
+    persons = PersonFactory.batch(scale.persons, films=[])
+    films = []
+    roles: dict[PersonID, dict[FilmID, list[Roles]]] = defaultdict(dict)
+    for _ in range(scale.films):
+        cast = {
+            Roles.actor: random.sample(persons, random.randint(1, 4)),
+            Roles.writer: random.sample(persons, random.randint(0, 2)),
+            Roles.director: random.sample(persons, 1),
+        }
+        film = FilmFactory.build(
+            genres=[
+                GenreIdName(id=genre.id, name=genre.name)
+                for genre in random.sample(genres, random.randint(1, 3))
+            ],
+            actors=[PersonIdName(id=p.id, name=p.full_name) for p in cast[Roles.actor]],
+            writers=[PersonIdName(id=p.id, name=p.full_name) for p in cast[Roles.writer]],
+            directors=[PersonIdName(id=p.id, name=p.full_name) for p in cast[Roles.director]],
+        )
+        films.append(film)
+        for role, members in cast.items():
+            for person in members:
+                roles[person.id].setdefault(film.id, []).append(role)
+
+    films_by_id = {film.id: film for film in films}
+    persons = [
+        person.model_copy(
+            update={
+                "films": [
+                    PersonFilm(
+                        id=film_id,
+                        title=films_by_id[film_id].title,
+                        imdb_rating=films_by_id[film_id].imdb_rating or 0,
+                        roles=film_roles,
+                    )
+                    for film_id, film_roles in roles[person.id].items()
+                ],
+            },
+        )
+        for person in persons
+    ]
+    return Dataset(films=films, persons=persons, genres=genres)
@@ -0,0 +1,376 @@
+from typing import Any, TypeVar
+
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import os
+import statistics
+import sys
+import time
+
+from collections.abc import AsyncIterator, Callable, Mapping, Sequence
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from random import Random
+
+from fakeredis.aioredis import FakeRedis
+from fastapi_cache import FastAPICache
+from httpx import ASGITransport, AsyncClient
+
+from tests.benchmark.dataset import SCALES, Dataset, generate_dataset
+from tests.benchmark.stand_in import InMemoryElasticsearch, tokenize
+from tests.functional.utils.logger import setup_logger
+
+T = TypeVar("T")
+
+logger = logging.getLogger(__name__)
+
+# share of the routes in the traffic: mostly detail pages and suggestions of the search box
+DEFAULT_MIX = {
+    "film_details": 30,
+    "suggest": 15,
+    "film_list": 15,
+    "film_search": 10,
+    "person_details": 8,
+    "person_films": 5,
+    "person_search": 5,
+    "film_batch": 4,
+    "film_facets": 3,
+    "genre_list": 3,
+    "genre_details": 2,
+}
+PERCENTILES = (50, 95, 99)
+
+
+@dataclass(frozen=True)
+class Call:
+    route: str
+    method: str
+    path: str
+    params: dict[str, Any] = field(default_factory=dict)
+    json: Any = None
+
+
+class Workload:
+    """Generates requests of the routes with Zipf-distributed popularity of the entities.
+
+    A few films and persons get most of the requests, like on a real catalog,
+    so the hit ratio of the cache depends on its size and TTLs the way it does in production.
+    Search queries and suggestion prefixes are taken from the names of popular entities.
+    """
+
+    def __init__(self, dataset: Dataset, seed: int = 0, zipf_exponent: float = 1.1) -> None:
+        self.dataset = dataset
+        self.random = Random(seed)
+        self.zipf_exponent = zipf_exponent
+        self._cum_weights: dict[int, list[float]] = {}
+        self.routes: dict[str, Callable[[], Call]] = {
+            "film_details": self.film_details,
+            "film_list": self.film_list,
+            "film_search": self.film_search,
+            "film_batch": self.film_batch,
+            "film_facets": self.film_facets,
+            "person_details": self.person_details,
+            "person_films": self.person_films,
+            "person_search": self.person_search,
+            "genre_list": self.genre_list,
+            "genre_details": self.genre_details,
+            "suggest": self.suggest,
+        }
+
+    def calls(self, mix: Mapping[str, float], count: int) -> list[Call]:
+        routes = self.random.choices(list(mix), weights=list(mix.values()), k=count)
+        return [self.routes[route]() for route in routes]
+
+    def popular(self, items: Sequence[T]) -> T:
+        if len(items) not in self._cum_weights:
+            weights = (1 / rank**self.zipf_exponent for rank in range(1, len(items) + 1))
+            self._cum_weights[len(items)] = list(itertools.accumulate(weights))
+        return self.random.choices(items, cum_weights=self._cum_weights[len(items)])[0]
+
+    def word(self, text: str) -> str:
+        return self.random.choice(tokenize(text))
+
+    def film_details(self) -> Call:
+        film = self.popular(self.dataset.films)
+        return Call("film_details", "GET", f"/v1/films/{film.id}")
+
+    def film_list(self) -> Call:
+        params: dict[str, Any] = {
+            "page_number": self.popular(range(1, 21)),
+            "page_size": self.random.choice((10, 10, 10, 50)),
+        }
+        if sort := self.random.choice((None, "-imdb_rating", "imdb_rating")):
+            params["sort"] = sort
+        if self.random.random() < 0.3:
+            params["genre"] = self.popular(self.dataset.genres).name
+        return Call("film_list", "GET", "/v1/films/", params)
+
+    def film_search(self) -> Call:
+        query = self.word(self.popular(self.dataset.films).title)
+        return Call("film_search", "GET", "/v1/films/search", {"query": query})
+
+    def film_batch(self) -> Call:
+        ids = {str(self.popular(self.dataset.films).id) for _ in range(10)}
+        return Call("film_batch", "POST", "/v1/films/batch", json={"ids": sorted(ids)})
+
+    def film_facets(self) -> Call:
+        params = {}
+        if self.random.random() < 0.5:
+            params["genre"] = self.popular(self.dataset.genres).name
+        return Call("film_facets", "GET", "/v1/films/facets", params)
+
+    def person_details(self) -> Call:
+        person = self.popular(self.dataset.persons)
+        return Call("person_details", "GET", f"/v1/persons/{person.id}")
+
+    def person_films(self) -> Call:
+        person = self.popular(self.dataset.persons)
+        return Call("person_films", "GET", f"/v1/persons/{person.id}/films")
+
+    def person_search(self) -> Call:
+        query = self.word(self.popular(self.dataset.persons).full_name)
+        return Call("person_search", "GET", "/v1/persons/search", {"query": query})
+
+    def genre_list(self) -> Call:
+        return Call("genre_list", "GET", "/v1/genres/")
+
+    def genre_details(self) -> Call:
+        genre = self.popular(self.dataset.genres)
+        return Call("genre_details", "GET", f"/v1/genres/{genre.id}")
+
+    def suggest(self) -> Call:
+        if self.random.random() < 0.7:
+            name = self.popular(self.dataset.films).title
+        else:
+            name = self.popular(self.dataset.persons).full_name
+        word = self.word(name)
+        prefix = word[: self.random.randint(1, min(len(word), 5))]
+        return Call("suggest", "GET", "/v1/suggest/", {"query": prefix})
+
+
+@dataclass
+class RouteStats:
+    latencies: list[float] = field(default_factory=list)
+    errors: int = 0
+
+    def summary(self, duration: float) -> dict[str, Any]:
+        latencies = sorted(self.latencies)
+        return {
+            "requests": len(latencies),
+            "errors": self.errors,
+            "rps": len(latencies) / duration,
+            **{
+                f"p{percentile}_ms": percentile_of(latencies, percentile) * 1000
+                for percentile in PERCENTILES
+            },
+        }
+
+
+def percentile_of(latencies: Sequence[float], percentile: int) -> float:
+    if len(latencies) < 2:
+        return latencies[0] if latencies else 0.0
+    return statistics.quantiles(latencies, n=100, method="inclusive")[percentile - 1]
+
+
+@dataclass
+class PhaseResult:
+    name: str
+    duration: float
+    routes: dict[str, RouteStats]
+    elasticsearch_requests: int
+
+    def summary(self) -> dict[str, Any]:
+        total = RouteStats(
+            latencies=[latency for stats in self.routes.values() for latency in stats.latencies],
+            errors=sum(stats.errors for stats in self.routes.values()),
+        )
+        return {
+            "phase": self.name,
+            "duration_seconds": self.duration,
+            "elasticsearch_requests": self.elasticsearch_requests,
+            "total": total.summary(self.duration),
+            "routes": {
+                route: stats.summary(self.duration) for route, stats in sorted(self.routes.items())
+            },
+        }
+
+
+async def run_phase(
+    name: str,
+    client: AsyncClient,
+    calls: Sequence[Call],
+    concurrency: int,
+    elastic: InMemoryElasticsearch,
+) -> PhaseResult:
+    """Send the calls with `concurrency` requests in flight and measure their latencies."""
+    routes: dict[str, RouteStats] = {}
+    pending = iter(calls)
+    elasticsearch_requests = elastic.requests.total()
+
+    async def worker() -> None:
+        for call in pending:
+            stats = routes.setdefault(call.route, RouteStats())
+            start = time.perf_counter()
+            response = await client.request(
+                call.method,
+                call.path,
+                params=call.params,
+                json=call.json,
+            )
+            stats.latencies.append(time.perf_counter() - start)
+            if response.is_server_error:
+                stats.errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return PhaseResult(
+        name=name,
+        duration=time.perf_counter() - start,
+        routes=routes,
+        elasticsearch_requests=elastic.requests.total() - elasticsearch_requests,
+    )
+
+
+@asynccontextmanager
+async def offline_api(
+    dataset: Dataset,
+    elasticsearch_latency_seconds: float,
+) -> AsyncIterator[tuple[AsyncClient, InMemoryElasticsearch, FakeRedis]]:
+    """Start the API in process with Elasticsearch and Redis replaced by in-memory stand-ins.
+
+    Requests are sent through ASGI without sockets, so the measurements include the routing,
+    the cache, the services and serialization but not the HTTP server.
+    """
+    # the settings require the addresses, though the clients are replaced before any request
+    os.environ.setdefault("REDIS_URL", "redis://localhost:6379")
+    os.environ.setdefault("ELASTICSEARCH_HOST", "http://localhost:9200")
+    # the warmer would refill the cache the cold phase starts with
+    os.environ.setdefault("CACHE_WARMER_ENABLED", "false")
+    from core.settings import settings
+
+    documents = dataset.documents()
+    elastic = InMemoryElasticsearch(
+        {
+            settings.es_films_index: documents["films"],
+            settings.es_persons_index: documents["persons"],
+            settings.es_genres_index: documents["genres"],
+        },
+        latency_seconds=elasticsearch_latency_seconds,
+    )
+    redis = FakeRedis()
+    # main imports the clients by name, so they are replaced before it is imported
+    import db.elastic
+    import db.redis
+
+    db.elastic.elasticsearch = elastic  # type: ignore[assignment]
+    db.redis.redis = redis
+
+    import main
+
+    async with (
+        main.lifespan(main.app),
+        # httpx annotates ASGI apps more narrowly than Starlette does
+        AsyncClient(
+            transport=ASGITransport(app=main.app),  # type: ignore[arg-type]
+            base_url="http://benchmark",
+        ) as client,
+    ):
+        yield client, elastic, redis
+
+
+async def run_benchmark(args: argparse.Namespace) -> list[PhaseResult]:
+    logger.info("Generating %s dataset", args.scale)
+    dataset = generate_dataset(SCALES[args.scale], seed=args.seed)
+    calls = Workload(dataset, seed=args.seed).calls(args.mix, args.requests)
+    async with offline_api(dataset, args.es_latency_ms / 1000) as (client, elastic, redis):
+        # stand-in builds its lookups on the first queries, they should not count as cold cache
+        await run_phase("prepare", client, calls[: len(calls) // 10], args.concurrency, elastic)
+        # clearing the namespace of the cache clears the local layer too
+        await FastAPICache.get_backend().clear(namespace=FastAPICache.get_prefix())
+        await redis.flushall()
+        results = []
+        for phase in ("cold", "warm"):
+            logger.info("Running %s phase: %d requests", phase, len(calls))
+            results.append(await run_phase(phase, client, calls, args.concurrency, elastic))
+        return results
+
+
+def format_report(results: Sequence[PhaseResult]) -> str:
+    header = f"{'phase':<6} {'route':<16} {'requests':>8} {'errors':>6} {'rps':>9}"
+    header += "".join(f" {f'p{percentile} ms':>8}" for percentile in PERCENTILES)
+    lines = [header]
+    for result in results:
+        summary = result.summary()
+        for route, stats in [*summary["routes"].items(), ("total", summary["total"])]:
+            line = (
+                f"{result.name:<6} {route:<16} {stats['requests']:>8} {stats['errors']:>6}"
+                f" {stats['rps']:>9.1f}"
+            )
+            line += "".join(f" {stats[f'p{percentile}_ms']:>8.2f}" for percentile in PERCENTILES)
+            lines.append(line)
+        lines.append(
+            f"{result.name:<6} elasticsearch requests: {result.elasticsearch_requests},"
+            f" duration: {result.duration:.2f}s",
+        )
+    return "\n".join(lines)
+
+
+def parse_mix(value: str) -> dict[str, float]:
+    """Parse the mix of routes like `film_details=3,suggest=1`."""
+    mix = {}
+    for item in value.split(","):
+        route, _, weight = item.partition("=")
+        if route.strip() not in DEFAULT_MIX:
+            raise argparse.ArgumentTypeError(f"unknown route {route!r}")  # noqa: TRY003
+        mix[route.strip()] = float(weight or 1)
+    return mix
+
+
+def parse_args(argv: Sequence[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Measure RPS and latency percentiles of the API with cold and warm cache.",
+    )
+    parser.add_argument("--scale", choices=SCALES, default="small")
+    parser.add_argument("--requests", type=int, default=5000, help="requests in every phase")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument(
+        "--mix",
+        type=parse_mix,
+        default=DEFAULT_MIX,
+        help=f"weights of the routes, default: {','.join(f'{k}={v}' for k, v in DEFAULT_MIX.items())}",
+    )
+    parser.add_argument(
+        "--es-latency-ms",
+        type=float,
+        default=2.0,
+        help="simulated latency of every Elasticsearch request",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path, help="save the results as JSON to compare runs")
+    return parser.parse_args(argv)
+
+
+def main(argv: Sequence[str] | None = None) -> None:
+    args = parse_args(argv)
+    results = asyncio.run(run_benchmark(args))
+    sys.stdout.write(format_report(results) + "\n")
+    if args.output:
+        report = {
+            "scale": args.scale,
+            "concurrency": args.concurrency,
+            "es_latency_ms": args.es_latency_ms,
+            "mix": args.mix,
+            "phases": [result.summary() for result in results],
+        }
+        args.output.write_text(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    setup_logger()
+    # a line per request would slow down the benchmark itself
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    main()
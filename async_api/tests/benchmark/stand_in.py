@@ -0,0 +1,348 @@
+from typing import Any
+
+import asyncio
+import bisect
+import math
+import re
+
+from collections import Counter, defaultdict
+from collections.abc import Iterable, Mapping, Sequence
+
+from elastic_transport import ApiResponseMeta, HttpHeaders, NodeConfig
+from elasticsearch.exceptions import NotFoundError
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> list[str]:
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+def field_values(doc: Mapping[str, Any], field: str) -> list[Any]:
+    """Values of the dotted field path, lists of objects are flattened like in Elasticsearch."""
+    values: list[Any] = [doc]
+    for name in field.removesuffix(".keyword").split("."):
+        values = [
+            item
+            for value in values
+            if isinstance(value, Mapping) and value.get(name) is not None
+            for item in (value[name] if isinstance(value[name], list) else [value[name]])
+        ]
+    return values
+
+
+class UnsupportedRequestError(Exception):
+    def __init__(self, request: Any) -> None:
+        super().__init__(f"Request is not supported by the stand-in: {request}")
+
+
+def not_found(index: str, doc_id: str) -> NotFoundError:
+    meta = ApiResponseMeta(
+        status=404,
+        http_version="1.1",
+        headers=HttpHeaders(),
+        duration=0.0,
+        node=NodeConfig("http", "localhost", 9200),
+    )
+    return NotFoundError("not_found", meta, {"_index": index, "_id": doc_id, "found": False})
+
+
+class InMemoryIndex:
+    """Documents of an index with the lookups built on demand for the queried fields."""
+
+    def __init__(self, docs: Iterable[dict[str, Any]]) -> None:
+        self.docs = list(docs)
+        self.positions = {str(doc["id"]): position for position, doc in enumerate(self.docs)}
+        self._postings: dict[str, dict[str, list[int]]] = {}
+        self._suggestions: dict[str, list[tuple[str, int]]] = {}
+
+    def match(self, field: str, text: str) -> dict[int, float]:
+        """Positions of documents with any of the terms, scored by the number of matched terms."""
+        if field not in self._postings:
+            postings = defaultdict(list)
+            for position, doc in enumerate(self.docs):
+                for term in {
+                    term for value in field_values(doc, field) for term in tokenize(value)
+                }:
+                    postings[term].append(position)
+            self._postings[field] = postings
+        scores: Counter[int] = Counter()
+        for term in set(tokenize(text)):
+            scores.update(self._postings[field].get(term, ()))
+        return dict(scores)
+
+    def suggest(self, field: str, prefix: str, size: int) -> list[int]:
+        """Positions of documents with any word of the field starting with the prefix.
+
+        The completion fields are indexed with every suffix of the name, so the prefix may
+        match the beginning of any word and continue with the following words.
+        """
+        if field not in self._suggestions:
+            suffixes: list[tuple[str, int]] = []
+            for position, doc in enumerate(self.docs):
+                words = str(doc[field]).lower().split()
+                suffixes.extend((" ".join(words[i:]), position) for i in range(len(words)))
+            self._suggestions[field] = sorted(suffixes)
+        suffixes = self._suggestions[field]
+        prefix = prefix.lower()
+        found: list[int] = []
+        for suffix, position in suffixes[bisect.bisect_left(suffixes, (prefix, -1)) :]:
+            if not suffix.startswith(prefix) or len(found) == size:
+                break
+            if position not in found:
+                found.append(position)
+        return found
+
+
+class InMemoryElasticsearch:
+    """Stand-in for AsyncElasticsearch which serves the queries of our services from memory.
+
+    Only the subset of the query DSL the services send is supported.
+    Every request waits for `latency_seconds`, so cache misses cost about as much
+    as a round-trip to a nearby cluster instead of nothing.
+    """
+
+    def __init__(
+        self,
+        indexes: Mapping[str, Iterable[dict[str, Any]]],
+        latency_seconds: float = 0,
+    ) -> None:
+        self.indexes = {name: InMemoryIndex(docs) for name, docs in indexes.items()}
+        self.latency_seconds = latency_seconds
+        self.requests: Counter[str] = Counter()
+        self._results: dict[str, tuple[int, list[tuple[int, float]], dict[str, Any] | None]] = {}
+
+    async def _request(self, api: str) -> None:
+        self.requests[api] += 1
+        await asyncio.sleep(self.latency_seconds)
+
+    async def info(self, **_: Any) -> dict[str, Any]:
+        return {"version": {"number": "8.12.0"}}
+
+    async def close(self) -> None:
+        pass
+
+    async def get(self, *, index: str, id: str, **_: Any) -> dict[str, Any]:  # noqa: A002
+        await self._request("get")
+        store = self.indexes[index]
+        if id not in store.positions:
+            raise not_found(index, id)
+        return {
+            "_index": index,
+            "_id": id,
+            "found": True,
+            "_source": store.docs[store.positions[id]],
+        }
+
+    async def mget(self, *, index: str, ids: Sequence[str], **_: Any) -> dict[str, Any]:
+        await self._request("mget")
+        store = self.indexes[index]
+        return {
+            "docs": [
+                (
+                    {"_index": index, "_id": doc_id, "found": True, "_source": store.docs[position]}
+                    if (position := store.positions.get(doc_id)) is not None
+                    else {"_index": index, "_id": doc_id, "found": False}
+                )
+                for doc_id in ids
+            ],
+        }
+
+    async def count(self, *, index: str, **_: Any) -> dict[str, Any]:
+        await self._request("count")
+        return {"count": len(self.indexes[index].docs)}
+
+    async def open_point_in_time(self, *, index: str, **_: Any) -> dict[str, Any]:
+        await self._request("open_point_in_time")
+        return {"id": index}
+
+    async def close_point_in_time(self, **_: Any) -> dict[str, Any]:
+        await self._request("close_point_in_time")
+        return {"succeeded": True}
+
+    async def msearch(self, *, searches: Sequence[dict[str, Any]], **_: Any) -> dict[str, Any]:
+        await self._request("msearch")
+        responses = []
+        for header, body in zip(searches[::2], searches[1::2], strict=True):
+            store = self.indexes[header["index"]]
+            suggestion = body["suggest"]["suggestions"]
+            completion = suggestion["completion"]
+            name_field = completion["field"].removesuffix("_suggest")
+            positions = store.suggest(name_field, suggestion["prefix"], completion["size"])
+            options = [
+                {
+                    "_id": str(store.docs[position]["id"]),
+                    "_source": {field: store.docs[position][field] for field in body["_source"]},
+                }
+                for position in positions
+            ]
+            responses.append({"suggest": {"suggestions": [{"options": options}]}})
+        return {"responses": responses}
+
+    async def search(
+        self,
+        *,
+        index: str | None = None,
+        query: dict[str, Any] | None = None,
+        sort: list[dict[str, Any]] | None = None,
+        from_: int = 0,
+        size: int = 10,
+        source_includes: list[str] | None = None,
+        pit: dict[str, Any] | None = None,
+        search_after: list[Any] | None = None,
+        aggs: dict[str, Any] | None = None,
+        **_: Any,
+    ) -> dict[str, Any]:
+        await self._request("search")
+        index = pit["id"] if pit else index
+        if index is None:
+            raise UnsupportedRequestError({"index": index})
+        store = self.indexes[index]
+        total, ordered, aggregations = self._evaluate(store, index, query, sort, aggs)
+        if search_after is not None:
+            # the last sort value is the unique _shard_doc tiebreaker added by the pagination
+            from_ = next(
+                i for i, (position, _) in enumerate(ordered) if position == search_after[-1]
+            )
+            from_ += 1
+        hits = [
+            {
+                "_index": index,
+                "_id": str(store.docs[position]["id"]),
+                "_score": score,
+                "_source": (
+                    {k: v for k, v in store.docs[position].items() if k in source_includes}
+                    if source_includes is not None
+                    else store.docs[position]
+                ),
+                "sort": self._sort_values(store.docs[position], score, position, sort),
+            }
+            for position, score in ordered[from_ : from_ + size]
+        ]
+        result: dict[str, Any] = {
+            "took": 1,
+            "timed_out": False,
+            "hits": {"total": {"value": total, "relation": "eq"}, "hits": hits},
+        }
+        if aggregations is not None:
+            result["aggregations"] = aggregations
+        if pit:
+            result["pit_id"] = pit["id"]
+        return result
+
+    def _evaluate(
+        self,
+        store: InMemoryIndex,
+        index: str,
+        query: dict[str, Any] | None,
+        sort: list[dict[str, Any]] | None,
+        aggs: dict[str, Any] | None,
+    ) -> tuple[int, list[tuple[int, float]], dict[str, Any] | None]:
+        """Match, sort and aggregate the documents, results are memoized as the data never changes.
+
+        Pages are cut from the memoized results, so the time spent in the stand-in
+        does not grow with the size of the dataset and does not distort the measurements.
+        """
+        key = repr((index, query, sort, aggs))
+        if key not in self._results:
+            scores = self._query(store, query or {"match_all": {}})
+            self._results[key] = (
+                len(scores),
+                self._sorted(store, scores, sort),
+                self._aggregations(store, scores, aggs) if aggs else None,
+            )
+        return self._results[key]
+
+    @staticmethod
+    def _query(store: InMemoryIndex, query: dict[str, Any]) -> dict[int, float]:
+        if "match" in query:
+            ((field, text),) = query["match"].items()
+            return store.match(field, text["query"] if isinstance(text, dict) else text)
+        if "bool" in query:
+            ((field, value),) = query["bool"]["filter"]["term"].items()
+            return {
+                position: 0.0
+                for position, doc in enumerate(store.docs)
+                if value in field_values(doc, field)
+            }
+        if "match_all" in query:
+            return dict.fromkeys(range(len(store.docs)), 1.0)
+        raise UnsupportedRequestError(query)
+
+    @staticmethod
+    def _sorted(
+        store: InMemoryIndex,
+        scores: dict[int, float],
+        sort: list[dict[str, Any]] | None,
+    ) -> list[tuple[int, float]]:
+        """Sort hits by several fields in stable passes, missing values go last in any order."""
+        hits = sorted(scores.items())
+        for spec in reversed(sort or [{"_score": {"order": "desc"}}]):
+            ((field, options),) = spec.items()
+            reverse = options["order"] == "desc"
+            if field == "_score":
+                hits.sort(key=lambda hit: hit[1], reverse=reverse)
+            elif field == "_shard_doc":
+                hits.sort(key=lambda hit: hit[0], reverse=reverse)
+            else:
+                present = [hit for hit in hits if store.docs[hit[0]].get(field) is not None]
+                present.sort(key=lambda hit: store.docs[hit[0]][field], reverse=reverse)
+                hits = present + [hit for hit in hits if store.docs[hit[0]].get(field) is None]
+        return hits
+
+    @staticmethod
+    def _sort_values(
+        doc: dict[str, Any],
+        score: float,
+        position: int,
+        sort: list[dict[str, Any]] | None,
+    ) -> list[Any]:
+        special = {"_score": score, "_shard_doc": position}
+        return [
+            special[field] if field in special else doc.get(field)
+            for spec in sort or [{"_score": {}}]
+            for field in spec
+        ]
+
+    @staticmethod
+    def _aggregations(
+        store: InMemoryIndex,
+        scores: dict[int, float],
+        aggs: dict[str, Any],
+    ) -> dict[str, Any]:
+        result = {}
+        for name, agg in aggs.items():
+            if "terms" in agg:
+                terms = agg["terms"]
+                counts = Counter(
+                    value
+                    for position in scores
+                    for value in field_values(store.docs[position], terms["field"])
+                )
+                buckets = [
+                    {"key": key, "doc_count": count}
+                    for key, count in counts.most_common(terms.get("size", 10))
+                ]
+            elif "histogram" in agg:
+                histogram = agg["histogram"]
+                interval = histogram["interval"]
+                counts = Counter(
+                    math.floor(value / interval) * interval
+                    for position in scores
+                    for value in field_values(store.docs[position], histogram["field"])
+                )
+                bounds = histogram.get("extended_bounds", {})
+                low = min([*counts, bounds.get("min", math.inf)])
+                high = max([*counts, bounds.get("max", -math.inf)])
+                steps = int((high - low) / interval) + 1 if counts or bounds else 0
+                buckets = [
+                    {
+                        "key": float(low + step * interval),
+                        "doc_count": counts.get(low + step * interval, 0),
+                    }
+                    for step in range(steps)
+                ]
+            else:
+                raise UnsupportedRequestError(agg)
+            result[name] = {"buckets": buckets}
+        return result
@@ -13,6 +13,7 @@ class Settings(BaseSettings):
     es_genres_index: str = "genres"
     es_persons_index: str = "persons"
     es_films_index: str = "movies"
+    cache_invalidation_stream: str = "cache-invalidation"
 
 
 settings = Settings(_env_file=FUNC_TESTS_ROOT / "envs" / ".env.test")
@@ -1,8 +1,12 @@
+import asyncio
+import json
+
 from uuid import uuid4
 
 from elasticsearch import AsyncElasticsearch
 from elasticsearch.helpers import async_bulk
 from httpx import AsyncClient
+from redis.asyncio import Redis
 
 from models.film import Film
 from tests.functional.settings import settings
@@ -21,6 +25,14 @@ async def insert_films(es_client: AsyncElasticsearch, films: list[Film]):
     await async_bulk(es_client, documents, refresh="wait_for")
 
 
+async def publish_films_updates(redis_client: Redis, films: list[Film]):
+    """Notify the API about updated films the same way as the ETL does."""
+    await redis_client.xadd(
+        settings.cache_invalidation_stream,
+        {"entity": "films", "ids": json.dumps([str(film.id) for film in films])},
+    )
+
+
 async def test_list_films(test_client: AsyncClient, es_client: AsyncElasticsearch):
     # Arrange
     films: list[Film] = FilmFactory.batch(15)
@@ -45,6 +57,78 @@ async def test_list_films(test_client: AsyncClient, es_client: AsyncElasticsearc
     assert some_film["imdb_rating"] == film_in_es.imdb_rating
 
 
+async def test_list_films_by_cursor(test_client: AsyncClient, es_client: AsyncElasticsearch):
+    # Arrange
+    films: list[Film] = FilmFactory.batch(25)
+    await insert_films(es_client, films)
+
+    # Act
+    response_films = []
+    cursor = ""
+    while cursor is not None:
+        response = await test_client.get("/v1/films/", params={"page_size": 10, "cursor": cursor})
+        assert response.status_code == 200
+        response_films.extend(response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+
+    # Assert
+    assert len(response_films) == len(films)
+    assert {response_film["uuid"] for response_film in response_films} == {
+        str(film.id) for film in films
+    }
+
+
+async def test_list_films_by_invalid_cursor(test_client: AsyncClient):
+    # Act
+    response = await test_client.get("/v1/films/", params={"cursor": "invalid"})
+
+    # Assert
+    assert response.status_code == 400
+
+
+async def test_list_films_by_cursor_of_other_sort(
+    test_client: AsyncClient,
+    es_client: AsyncElasticsearch,
+):
+    # Arrange
+    films: list[Film] = FilmFactory.batch(25)
+    await insert_films(es_client, films)
+    response = await test_client.get(
+        "/v1/films/",
+        params={"page_size": 10, "cursor": "", "sort": "-imdb_rating"},
+    )
+    cursor = response.headers["X-Next-Cursor"]
+
+    # Act
+    response = await test_client.get(
+        "/v1/films/",
+        params={"page_size": 10, "cursor": cursor, "sort": "imdb_rating"},
+    )
+
+    # Assert
+    assert response.status_code == 400
+
+
+async def test_search_persons_by_cursor_of_films(
+    test_client: AsyncClient,
+    es_client: AsyncElasticsearch,
+):
+    # Arrange
+    films: list[Film] = FilmFactory.batch(25)
+    await insert_films(es_client, films)
+    response = await test_client.get("/v1/films/", params={"page_size": 10, "cursor": ""})
+    cursor = response.headers["X-Next-Cursor"]
+
+    # Act
+    response = await test_client.get(
+        "/v1/persons/search",
+        params={"page_size": 10, "cursor": cursor},
+    )
+
+    # Assert
+    assert response.status_code == 400
+
+
 async def test_list_films_filter_by_genre(test_client: AsyncClient, es_client: AsyncElasticsearch):
     # Arrange
     action_genre = GenreIdNameFactory.build(name="Action")
@@ -64,6 +148,30 @@ async def test_list_films_filter_by_genre(test_client: AsyncClient, es_client: A
     }
 
 
+async def test_get_film_facets(test_client: AsyncClient, es_client: AsyncElasticsearch):
+    # Arrange
+    action_genre = GenreIdNameFactory.build(name="Action")
+    comedy_genre = GenreIdNameFactory.build(name="Comedy")
+    action_films: list[Film] = FilmFactory.batch(3, genres=[action_genre], imdb_rating=7.5)
+    comedy_films: list[Film] = FilmFactory.batch(
+        2,
+        genres=[action_genre, comedy_genre],
+        imdb_rating=3.2,
+    )
+    await insert_films(es_client, action_films + comedy_films)
+
+    # Act
+    response = await test_client.get("/v1/films/facets", params={"genre": "Comedy"})
+
+    # Assert
+    assert response.status_code == 200
+
+    facets = response.json()
+    assert facets["genres"] == [{"name": "Action", "count": 2}, {"name": "Comedy", "count": 2}]
+    assert {"rating": 3.0, "count": 2} in facets["imdb_rating"]
+    assert sum(bucket["count"] for bucket in facets["imdb_rating"]) == 2
+
+
 async def test_get_film_details(test_client: AsyncClient, es_client: AsyncElasticsearch):
     # Arrange
     film: Film = FilmFactory.build()
@@ -103,6 +211,81 @@ async def test_get_non_existent_film_details(test_client: AsyncClient):
     assert response.status_code == 404
 
 
+async def test_get_non_existent_film_details_from_cache(
+    test_client: AsyncClient,
+    es_client: AsyncElasticsearch,
+):
+    # Arrange
+    film: Film = FilmFactory.build()
+    await test_client.get(f"/v1/films/{film.id}")
+    await insert_films(es_client, [film])
+
+    # Act
+    response = await test_client.get(f"/v1/films/{film.id}")
+
+    # Assert
+    assert response.status_code == 404
+    assert response.json() == {"detail": "Film not found"}
+
+
+async def test_get_film_details_after_update_of_non_existent_film(
+    test_client: AsyncClient,
+    es_client: AsyncElasticsearch,
+    redis_client: Redis,
+):
+    # Arrange
+    film: Film = FilmFactory.build()
+    await test_client.get(f"/v1/films/{film.id}")
+    await insert_films(es_client, [film])
+    await publish_films_updates(redis_client, [film])
+
+    # Act
+    for _ in range(50):
+        response = await test_client.get(f"/v1/films/{film.id}")
+        if response.status_code != 404:
+            break
+        await asyncio.sleep(0.1)
+
+    # Assert
+    assert response.status_code == 200
+    assert response.json()["uuid"] == str(film.id)
+
+
+async def test_get_films_batch(test_client: AsyncClient, es_client: AsyncElasticsearch):
+    # Arrange
+    films: list[Film] = FilmFactory.batch(3)
+    await insert_films(es_client, films)
+    film_ids = [str(film.id) for film in films]
+
+    # Act
+    response = await test_client.post("/v1/films/batch", json={"ids": [*film_ids, str(uuid4())]})
+
+    # Assert
+    assert response.status_code == 200
+    assert [response_film["uuid"] for response_film in response.json()] == film_ids
+
+
+async def test_get_films_batch_after_non_existent_film_details(
+    test_client: AsyncClient,
+    es_client: AsyncElasticsearch,
+):
+    # Arrange
+    film: Film = FilmFactory.build()
+    await insert_films(es_client, [film])
+    non_existent_film_id = str(uuid4())
+    await test_client.get(f"/v1/films/{non_existent_film_id}")
+
+    # Act
+    response = await test_client.post(
+        "/v1/films/batch",
+        json={"ids": [str(film.id), non_existent_film_id]},
+    )
+
+    # Assert
+    assert response.status_code == 200
+    assert [response_film["uuid"] for response_film in response.json()] == [str(film.id)]
+
+
 async def test_get_film_details_from_cache(test_client: AsyncClient, es_client: AsyncElasticsearch):
     # Arrange
     film: Film = FilmFactory.build()
@@ -121,6 +304,25 @@ async def test_get_film_details_from_cache(test_client: AsyncClient, es_client:
     assert response_film["description"] == film.description
 
 
+async def test_get_film_details_not_modified(
+    test_client: AsyncClient,
+    es_client: AsyncElasticsearch,
+):
+    # Arrange
+    film: Film = FilmFactory.build()
+    await insert_films(es_client, [film])
+    response = await test_client.get(f"/v1/films/{film.id}")
+    etag = response.headers["ETag"]
+
+    # Act
+    response = await test_client.get(f"/v1/films/{film.id}", headers={"If-None-Match": etag})
+
+    # Assert
+    assert response.status_code == 304
+    assert response.headers["ETag"] == etag
+    assert not response.content
+
+
 async def test_search_films_by_name(test_client: AsyncClient, es_client: AsyncElasticsearch):
     # Arrange
     film: Film = FilmFactory.build(title="Star Wars")
@@ -1,8 +1,12 @@
+import asyncio
+import json
+
 from uuid import uuid4
 
 from elasticsearch import AsyncElasticsearch
 from elasticsearch.helpers import async_bulk
-from httpx import AsyncClient
+from httpx import AsyncClient, Response
+from redis.asyncio import Redis
 
 from models.genre import Genre
 from tests.functional.settings import settings
@@ -21,20 +25,42 @@ async def insert_genres(es_client: AsyncElasticsearch, genres: list[Genre]):
     await async_bulk(es_client, documents, refresh="wait_for")
 
 
-async def test_list_genres(test_client: AsyncClient, es_client: AsyncElasticsearch):
+async def publish_genres_updates(redis_client: Redis, genres: list[Genre]):
+    """Notify the API about updated genres the same way as the ETL does."""
+    await redis_client.xadd(
+        settings.cache_invalidation_stream,
+        {"entity": "genres", "ids": json.dumps([str(genre.id) for genre in genres])},
+    )
+
+
+async def get_genres_list(test_client: AsyncClient, expected_count: int) -> Response:
+    """Wait for the API to reload the genre catalog."""
+    for _ in range(50):
+        response = await test_client.get("/v1/genres/")
+        if response.status_code != 200 or len(response.json()) == expected_count:
+            break
+        await asyncio.sleep(0.1)
+    return response
+
+
+async def test_list_genres(
+    test_client: AsyncClient,
+    es_client: AsyncElasticsearch,
+    redis_client: Redis,
+):
     # Arrange
     genres: list[Genre] = GenreFactory.batch(15)
     await insert_genres(es_client, genres)
+    await publish_genres_updates(redis_client, genres)
 
     # Act
-    response = await test_client.get("/v1/genres/", params={"page_number": 1, "page_size": 10})
+    response = await get_genres_list(test_client, len(genres))
 
     # Assert
     assert response.status_code == 200
 
     response_genres = response.json()
-    assert len(response_genres) == 10
-    assert {response_genre["uuid"] for response_genre in response_genres} <= {
+    assert {response_genre["uuid"] for response_genre in response_genres} == {
         str(genre.id) for genre in genres
     }
 
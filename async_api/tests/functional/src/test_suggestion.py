@@ -0,0 +1,97 @@
+import pytest
+
+from elasticsearch import AsyncElasticsearch
+from elasticsearch.helpers import async_bulk
+from httpx import AsyncClient
+
+from models.film import Film
+from models.person import Person
+from tests.functional.settings import settings
+from tests.functional.testdata.elasticsearch_mappings import MOVIES_MAPPING, PERSONS_MAPPING
+from tests.functional.utils.factories import FilmFactory, PersonFactory
+
+
+@pytest.fixture(autouse=True)
+async def _create_suggest_indexes(es_client: AsyncElasticsearch):
+    # completion fields must be mapped explicitly
+    for es_index, mapping in (
+        (settings.es_films_index, MOVIES_MAPPING),
+        (settings.es_persons_index, PERSONS_MAPPING),
+    ):
+        await es_client.indices.delete(index=es_index)
+        await es_client.indices.create(
+            index=es_index,
+            mappings=mapping["mappings"],
+            settings=mapping["settings"],
+        )
+
+
+def build_suggest_inputs(text: str) -> list[str]:
+    words = text.split()
+    return [" ".join(words[position:]) for position in range(len(words))]
+
+
+async def insert_documents(
+    es_client: AsyncElasticsearch,
+    films: list[Film],
+    persons: list[Person],
+):
+    documents = [
+        {
+            "_index": settings.es_films_index,
+            "_id": str(film.id),
+            "_source": {
+                **film.model_dump(mode="json"),
+                "title_suggest": build_suggest_inputs(film.title),
+            },
+        }
+        for film in films
+    ] + [
+        {
+            "_index": settings.es_persons_index,
+            "_id": str(person.id),
+            "_source": {
+                **person.model_dump(mode="json"),
+                "full_name_suggest": build_suggest_inputs(person.full_name),
+            },
+        }
+        for person in persons
+    ]
+    await async_bulk(es_client, documents, refresh="wait_for")
+
+
+async def test_suggest(test_client: AsyncClient, es_client: AsyncElasticsearch):
+    # Arrange
+    films: list[Film] = [
+        FilmFactory.build(title="Star Wars"),
+        FilmFactory.build(title="Starship Troopers"),
+        FilmFactory.build(title="Alien"),
+    ]
+    person: Person = PersonFactory.build(full_name="Sylvester Stallone")
+    await insert_documents(es_client, films, [person])
+
+    # Act
+    response = await test_client.get("/v1/suggest/", params={"query": "Sta"})
+
+    # Assert
+    assert response.status_code == 200
+
+    suggestions = response.json()
+    assert {film["uuid"] for film in suggestions["films"]} == {str(films[0].id), str(films[1].id)}
+    assert suggestions["persons"] == [{"uuid": str(person.id), "name": person.full_name}]
+
+
+async def test_suggest_by_any_word(test_client: AsyncClient, es_client: AsyncElasticsearch):
+    # Arrange
+    film: Film = FilmFactory.build(title="The Empire Strikes Back")
+    await insert_documents(es_client, [film], [])
+
+    # Act
+    response = await test_client.get("/v1/suggest/", params={"query": "strik", "size": 1})
+
+    # Assert
+    assert response.status_code == 200
+    assert response.json() == {
+        "films": [{"uuid": str(film.id), "name": film.title}],
+        "persons": [],
+    }
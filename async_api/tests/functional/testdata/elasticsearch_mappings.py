@@ -30,13 +30,18 @@ MOVIES_MAPPING = {
             "id": {"type": "keyword"},
             "imdb_rating": {"type": "float"},
             "title": {"type": "text", "analyzer": "ru_en", "fields": {"raw": {"type": "keyword"}}},
+            "title_suggest": {"type": "completion", "analyzer": "simple"},
             "description": {"type": "text", "analyzer": "ru_en"},
             "genres": {
-                "type": "nested",
+                "type": "object",
                 "dynamic": "strict",
                 "properties": {
                     "id": {"type": "keyword"},
-                    "name": {"type": "text", "analyzer": "ru_en"},
+                    "name": {
+                        "type": "text",
+                        "analyzer": "ru_en",
+                        "fields": {"keyword": {"type": "keyword"}},
+                    },
                 },
             },
             "directors_names": {"type": "text", "analyzer": "ru_en"},
@@ -137,6 +142,7 @@ PERSONS_MAPPING = {
         "properties": {
             "id": {"type": "keyword"},
             "full_name": {"type": "text"},
+            "full_name_suggest": {"type": "completion", "analyzer": "simple"},
             "films": {
                 "type": "nested",
                 "dynamic": "strict",
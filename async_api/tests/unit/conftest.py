@@ -0,0 +1,74 @@
+import asyncio
+import os
+
+# settings require the URLs of the services, the unit tests replace them with in-memory stand-ins
+os.environ.setdefault("REDIS_URL", "redis://localhost:6379")
+os.environ.setdefault("ELASTICSEARCH_HOST", "http://localhost:9200")
+
+import pytest  # noqa: E402
+
+from fakeredis.aioredis import FakeRedis  # noqa: E402
+from fastapi import FastAPI, HTTPException, status  # noqa: E402
+from fastapi.responses import ORJSONResponse  # noqa: E402
+from fastapi_cache import FastAPICache  # noqa: E402
+from httpx import ASGITransport, AsyncClient  # noqa: E402
+from pydantic import BaseModel  # noqa: E402
+
+from utils.cache import cache, key_builder  # noqa: E402
+from utils.cache_backends import LocalLRUCache, TwoTierBackend  # noqa: E402
+
+
+class Item(BaseModel):
+    id: str
+    name: str
+
+
+class ItemsApp:
+    """App with a cached endpoint which counts how many times it renders every item.
+
+    Renders wait until `released` is set, so tests can hold them in flight.
+    """
+
+    def __init__(self) -> None:
+        self.items = {"1": Item(id="1", name="one"), "2": Item(id="2", name="two")}
+        self.renders: list[str] = []
+        self.released = asyncio.Event()
+        self.released.set()
+        self.app = FastAPI(default_response_class=ORJSONResponse)
+
+        @self.app.get("/items/{item_id}", response_model=Item)
+        @cache(namespace="items", id_param="item_id")
+        async def get_item(item_id: str) -> Item:
+            self.renders.append(item_id)
+            await self.released.wait()
+            if item_id not in self.items:
+                raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not found")
+            return self.items[item_id]
+
+
+@pytest.fixture()
+async def redis_client():
+    redis = FakeRedis()
+    yield redis
+    await redis.aclose(close_connection_pool=True)
+
+
+@pytest.fixture()
+def cache_backend(redis_client: FakeRedis):
+    backend = TwoTierBackend(redis_client, LocalLRUCache(1024 * 1024, 60))
+    FastAPICache.init(backend, prefix="fastapi-cache", key_builder=key_builder)
+    yield backend
+    FastAPICache.reset()
+
+
+@pytest.fixture()
+def items_app(cache_backend: TwoTierBackend) -> ItemsApp:  # noqa: ARG001
+    return ItemsApp()
+
+
+@pytest.fixture()
+async def test_client(items_app: ItemsApp):
+    # httpx annotates ASGI apps more narrowly than Starlette does
+    transport = ASGITransport(app=items_app.app)  # type: ignore[arg-type]
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        yield client
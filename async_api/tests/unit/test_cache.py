@@ -0,0 +1,148 @@
+import asyncio
+
+import pytest
+
+from httpx import AsyncClient
+
+from core.settings import settings
+from tests.unit.conftest import ItemsApp
+from utils import cache
+from utils.cache import (
+    CachedResponse,
+    InvalidCacheEntryError,
+    get_cached,
+    get_many_cached,
+    get_storage_ttl,
+    set_cached,
+)
+from utils.cache_backends import TwoTierBackend
+
+RESPONSE = CachedResponse(b'{"uuid":"1"}', media_type="application/json", etag="etag")
+INVALID_ENTRIES = [b'[{"uuid":"1"}]', b'{"status_code":200}', b"not json\n{}", b'{"code":1}\n{}']
+
+
+def test_load_dumped_response():
+    # Act
+    loaded = CachedResponse.load(RESPONSE.dump())
+
+    # Assert
+    assert loaded == RESPONSE
+
+
+@pytest.mark.parametrize("data", INVALID_ENTRIES)
+def test_load_invalid_entry(data: bytes):
+    # Act, Assert
+    with pytest.raises(InvalidCacheEntryError):
+        CachedResponse.load(data)
+
+
+@pytest.mark.parametrize("data", INVALID_ENTRIES)
+async def test_get_invalid_entry_as_miss(cache_backend: TwoTierBackend, data: bytes):
+    # Arrange
+    await cache_backend.set("fastapi-cache:films:1", data, 60)
+
+    # Act
+    ttl, cached = await get_cached("fastapi-cache:films:1", "films")
+
+    # Assert
+    assert ttl == 0
+    assert cached is None
+
+
+async def test_get_many_skips_invalid_entries(cache_backend: TwoTierBackend):
+    # Arrange
+    await cache_backend.set("fastapi-cache:films:1", INVALID_ENTRIES[0], 7200)
+    await cache_backend.set("fastapi-cache:films:2", RESPONSE.dump(), 7200)
+
+    # Act
+    live, expired = await get_many_cached(
+        ["1", "2"],
+        ["fastapi-cache:films:1", "fastapi-cache:films:2"],
+        "films",
+    )
+
+    # Assert
+    assert live == {"2": RESPONSE}
+    assert expired == {}
+
+
+async def test_send_negative_ttl_with_first_not_found(test_client: AsyncClient):
+    # Act
+    first = await test_client.get("/items/404")
+    cached = await test_client.get("/items/404")
+
+    # Assert
+    max_age = settings.negative_cache_ttl_seconds * (1 + settings.cache_ttl_jitter)
+    for response in (first, cached):
+        assert response.status_code == 404
+        assert 0 <= int(response.headers["Cache-Control"].removeprefix("max-age=")) <= max_age
+
+
+async def test_cap_max_age_of_long_lived_entries(
+    test_client: AsyncClient,
+    monkeypatch: pytest.MonkeyPatch,
+):
+    # Arrange
+    monkeypatch.setattr(settings, "cache_ttl_policy", {"items": 3600})
+
+    # Act
+    first = await test_client.get("/items/1")
+    cached = await test_client.get("/items/1")
+
+    # Assert
+    for response in (first, cached):
+        assert response.status_code == 200
+        assert response.headers["Cache-Control"] == (
+            f"max-age={settings.cache_client_max_age_seconds}"
+        )
+
+
+async def set_item(item_id: str, name: str, fresh_ttl: int) -> None:
+    body = f'{{"id":"{item_id}","name":"{name}"}}'.encode()
+    await set_cached(
+        f"fastapi-cache:items:get_item:item_id={item_id}",
+        CachedResponse(body, media_type="application/json"),
+        get_storage_ttl(fresh_ttl + settings.cache_stale_ttl_seconds),
+        [f"items:{item_id}"],
+    )
+
+
+async def test_serve_stale_entry_and_refresh_it_once(
+    items_app: ItemsApp,
+    test_client: AsyncClient,
+):
+    # Arrange
+    await set_item("1", "stale", -10)
+    await set_item("2", "stale", -10)
+    items_app.released.clear()
+
+    # Act
+    responses = await asyncio.gather(
+        *(test_client.get(f"/items/{item_id}") for item_id in ("1", "2") * 5),
+    )
+    refreshes = len(cache.refresh_tasks)
+    items_app.released.set()
+    await asyncio.gather(*cache.refresh_tasks)
+    refreshed = await test_client.get("/items/1")
+
+    # Assert
+    for response in responses:
+        assert response.json()["name"] == "stale"
+        assert response.headers["Cache-Control"] == "max-age=0"
+    assert refreshes == 2
+    assert sorted(items_app.renders) == ["1", "2"]
+    assert refreshed.json() == {"id": "1", "name": "one"}
+    assert refreshed.headers["Cache-Control"] != "max-age=0"
+
+
+async def test_send_time_entry_stays_fresh_as_max_age(test_client: AsyncClient):
+    # Arrange
+    await set_item("1", "cached", 20)
+
+    # Act
+    response = await test_client.get("/items/1")
+
+    # Assert
+    assert response.json()["name"] == "cached"
+    # the TTL is counted down in seconds
+    assert response.headers["Cache-Control"] in {"max-age=19", "max-age=20"}
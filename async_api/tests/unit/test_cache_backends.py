@@ -0,0 +1,28 @@
+from prometheus_client import REGISTRY
+
+from utils.cache_backends import LocalLRUCache
+
+
+def sample(name: str, labels: dict[str, str] | None = None) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+def test_count_local_hits_misses_and_evictions():
+    # Arrange
+    cache = LocalLRUCache(max_size_bytes=20, max_ttl_seconds=60)
+    hits = sample("local_cache_requests_total", {"result": "hit"})
+    misses = sample("local_cache_requests_total", {"result": "miss"})
+    evictions = sample("local_cache_evictions_total")
+
+    # Act
+    cache.set("a", b"123456789")
+    cache.get_with_ttl("a")
+    cache.get_with_ttl("b")
+    cache.set("b", b"123456789")
+    cache.set("c", b"123456789")
+
+    # Assert
+    assert sample("local_cache_requests_total", {"result": "hit"}) == hits + 1
+    assert sample("local_cache_requests_total", {"result": "miss"}) == misses + 1
+    assert sample("local_cache_evictions_total") == evictions + 1
+    assert cache.get_with_ttl("a") is None
@@ -0,0 +1,108 @@
+import gzip
+import os
+
+import pytest
+
+from prometheus_client import REGISTRY
+
+from utils.cache import CachedResponse
+from utils.cache_codec import MARKER, CacheCodec
+
+FILMS = b'[{"uuid":"","title":"","imdb_rating":7.5}' + b',{"uuid":"","title":""}' * 100 + b"]"
+
+
+def compression_ratio_count() -> float:
+    return REGISTRY.get_sample_value("cache_compression_ratio_count") or 0
+
+
+def test_store_gzipped_response_as_is():
+    # Arrange
+    codec = CacheCodec(min_size=16)
+    body = gzip.compress(b'[{"uuid":"","title":""}]' * 100)
+    data = CachedResponse(body, media_type="application/json", content_encoding="gzip").dump()
+    observed = compression_ratio_count()
+
+    # Act
+    encoded = codec.encode(data)
+
+    # Assert
+    assert encoded == data
+    assert codec.decode(encoded) == data
+    assert compression_ratio_count() == observed
+
+
+def test_observe_ratio_of_compressed_entries_only():
+    # Arrange
+    codec = CacheCodec(min_size=16, dictionary=None)
+    incompressible = os.urandom(1024)
+    observed = compression_ratio_count()
+
+    # Act
+    codec.encode(incompressible)
+    codec.encode(b'{"uuid":"","title":""}' * 100)
+
+    # Assert
+    assert compression_ratio_count() == observed + 1
+
+
+@pytest.mark.parametrize(
+    "codec",
+    [CacheCodec(min_size=16), CacheCodec(min_size=16, dictionary=None), CacheCodec(min_size=0)],
+    ids=["dictionary", "zlib", "no-threshold"],
+)
+@pytest.mark.parametrize(
+    "data",
+    [FILMS, b"{}", b"", MARKER + b"starts with the marker", os.urandom(1024)],
+    ids=["compressible", "small", "empty", "marker", "incompressible"],
+)
+def test_round_trip(codec: CacheCodec, data: bytes):
+    # Act
+    decoded = codec.decode(codec.encode(data))
+
+    # Assert
+    assert decoded == data
+
+
+def test_compress_large_entries():
+    # Arrange
+    codec = CacheCodec(min_size=16)
+
+    # Act
+    encoded = codec.encode(FILMS)
+
+    # Assert
+    assert encoded.startswith(codec.header)
+    assert len(encoded) < len(FILMS)
+
+
+@pytest.mark.parametrize(
+    "corrupt",
+    [
+        lambda encoded: encoded[: len(encoded) // 2],
+        lambda encoded: encoded[:10] + bytes(len(encoded) - 10),
+        lambda encoded: MARKER + b"x" + encoded[2:],
+        lambda encoded: encoded[:2] + b"\xff\xff\xff\xff" + encoded[6:],
+    ],
+    ids=["truncated", "zeroed", "unknown-codec", "other-dictionary"],
+)
+def test_decode_corrupt_entry(corrupt):
+    # Arrange
+    codec = CacheCodec(min_size=16)
+    encoded = codec.encode(FILMS)
+
+    # Act
+    decoded = codec.decode(corrupt(encoded))
+
+    # Assert
+    assert decoded is None
+
+
+def test_decode_entry_of_other_dictionary():
+    # Arrange
+    encoded = CacheCodec(min_size=16, dictionary=b'{"uuid":"","title":""}').encode(FILMS)
+
+    # Act
+    decoded = CacheCodec(min_size=16).decode(encoded)
+
+    # Assert
+    assert decoded is None
@@ -0,0 +1,110 @@
+import json
+
+import pytest
+
+from fakeredis.aioredis import FakeRedis
+
+from utils.cache_backends import TwoTierBackend
+from utils.cache_invalidation import CacheInvalidator
+
+STREAM = "cache-invalidation"
+
+pytestmark = pytest.mark.usefixtures("cache_backend")
+
+
+async def publish(redis_client: FakeRedis, entity: str, ids: str):
+    return await redis_client.xadd(STREAM, {"entity": entity, "ids": ids})
+
+
+async def test_skip_malformed_event(redis_client: FakeRedis, cache_backend: TwoTierBackend):
+    # Arrange
+    invalidator = CacheInvalidator(redis_client, STREAM, block_ms=10)
+    updated: list[list[str]] = []
+    invalidator.add_listener("films", updated.append)
+    await publish(redis_client, "films", "not json")
+    await publish(redis_client, "films", json.dumps(42))
+    last_id = await publish(redis_client, "films", json.dumps(["1"]))
+    await cache_backend.set("fastapi-cache:films:1", b"cached", 60, ["fastapi-cache:tags:films:1"])
+
+    # Act
+    processed_id = await invalidator.process_events("0-0")
+
+    # Assert
+    assert processed_id == last_id
+    assert updated == [["1"]]
+    assert await cache_backend.get("fastapi-cache:films:1") is None
+    assert await redis_client.get(invalidator.last_id_key) == last_id
+
+
+async def test_persist_last_id_of_skipped_events(
+    redis_client: FakeRedis,
+    cache_backend: TwoTierBackend,  # noqa: ARG001
+):
+    # Arrange
+    invalidator = CacheInvalidator(redis_client, STREAM, block_ms=10)
+    last_id = await publish(redis_client, "films", "not json")
+
+    # Act
+    await invalidator.process_events("0-0")
+
+    # Assert
+    assert await redis_client.get(invalidator.last_id_key) == last_id
+
+
+async def test_invalidate_after_listener_error(
+    redis_client: FakeRedis,
+    cache_backend: TwoTierBackend,
+):
+    # Arrange
+    invalidator = CacheInvalidator(redis_client, STREAM, block_ms=10)
+    updated: list[list[str]] = []
+
+    def fail(ids: list[str]) -> None:
+        raise RuntimeError(ids)
+
+    invalidator.add_listener("films", fail)
+    invalidator.add_listener("films", updated.append)
+    await publish(redis_client, "films", json.dumps(["1"]))
+    await publish(redis_client, "films", json.dumps(["2"]))
+    await cache_backend.set("fastapi-cache:films:1", b"cached", 60, ["fastapi-cache:tags:films:1"])
+
+    # Act
+    await invalidator.process_events("0-0")
+
+    # Assert
+    assert updated == [["1"], ["2"]]
+    assert await cache_backend.get("fastapi-cache:films:1") is None
+
+
+async def test_process_events_published_between_reads(
+    redis_client: FakeRedis,
+    cache_backend: TwoTierBackend,  # noqa: ARG001
+):
+    # Arrange
+    invalidator = CacheInvalidator(redis_client, STREAM, block_ms=10)
+    updated: list[list[str]] = []
+    invalidator.add_listener("films", updated.append)
+    await publish(redis_client, "films", json.dumps(["old"]))
+    last_id = await invalidator.get_last_id()
+    last_id = await invalidator.process_events(last_id)
+
+    # Act
+    await publish(redis_client, "films", json.dumps(["new"]))
+    await invalidator.process_events(last_id)
+
+    # Assert
+    assert updated == [["new"]]
+
+
+async def test_start_from_stored_last_id(redis_client: FakeRedis):
+    # Arrange
+    invalidator = CacheInvalidator(redis_client, STREAM, block_ms=10)
+    stored_id = await publish(redis_client, "films", json.dumps(["1"]))
+    await publish(redis_client, "films", json.dumps(["2"]))
+    await redis_client.set(invalidator.last_id_key, stored_id)
+
+    # Act
+    last_id = await invalidator.get_last_id()
+
+    # Assert
+    assert last_id == stored_id
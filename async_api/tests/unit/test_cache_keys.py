@@ -0,0 +1,153 @@
+from typing import Annotated
+
+import uuid
+
+import pytest
+
+from fastapi import Depends, FastAPI
+from fastapi.responses import ORJSONResponse
+from httpx import ASGITransport, AsyncClient
+
+from api.dependencies import PaginationParams, SortParams
+from core.settings import settings
+from models.genre import Genre
+from models.value_objects import GenreID
+from services.genre import GenreCatalog, genre_catalog
+from utils.cache import cache, key_builder, normalize_params, normalize_text
+from utils.cache_backends import TwoTierBackend
+
+GENRE_ID = GenreID(uuid.uuid4())
+SAME_REQUESTS = [
+    ("/films/", f"/films/?page_size={settings.default_page_size}"),
+    ("/films/?query=Star Wars", "/films/?query=  star   WARS "),
+    ("/films/?sort=%2Brating", "/films/?sort=rating"),
+    ("/films/?sort=+rating", "/films/?sort=rating"),
+    ("/films/?genre=comedy", "/films/?genre=Comedy"),
+    (
+        "/films/?query=star&page_size=10&sort=-rating",
+        "/films/?sort=-rating&page_size=10&query=star",
+    ),
+    (f"/genres/{str(GENRE_ID).upper()}", f"/genres/{GENRE_ID}"),
+]
+DIFFERENT_REQUESTS = [
+    ("/films/", "/films/?page_size=10"),
+    ("/films/", "/films/?page_number=2"),
+    ("/films/?query=star", "/films/?query=star wars"),
+    ("/films/?sort=rating", "/films/?sort=-rating"),
+    ("/films/?sort=rating", "/films/?sort=title"),
+    ("/films/?genre=Comedy", "/films/?genre=Drama"),
+    ("/films/?genre=Comedy", "/films/?query=Comedy"),
+    (f"/genres/{GENRE_ID}", f"/genres/{uuid.uuid4()}"),
+]
+
+
+def func() -> None:
+    pass
+
+
+@pytest.fixture()
+def renders(cache_backend: TwoTierBackend) -> list[str]:  # noqa: ARG001
+    return []
+
+
+@pytest.fixture()
+async def films_client(renders: list[str], monkeypatch: pytest.MonkeyPatch):
+    genres = [Genre(id=GENRE_ID, name="Comedy"), Genre(id=GenreID(uuid.uuid4()), name="Drama")]
+    monkeypatch.setattr(genre_catalog, "catalog", GenreCatalog.from_genres(genres))
+    app = FastAPI(default_response_class=ORJSONResponse)
+
+    @app.get("/films/")
+    @cache(
+        namespace="films",
+        normalize={"query": normalize_text, "genre": genre_catalog.canonical_name},
+    )
+    async def get_film_list(
+        pagination_params: Annotated[PaginationParams, Depends()],
+        sort_params: Annotated[SortParams, Depends()],
+        query: str | None = None,
+        genre: str | None = None,
+    ) -> list[str]:
+        renders.append(f"{pagination_params} {sort_params} {query} {genre}")
+        return []
+
+    @app.get("/genres/{genre_id}")
+    @cache(namespace="genres", id_param="genre_id")
+    async def get_genre_details(genre_id: GenreID) -> str:
+        renders.append(str(genre_id))
+        return "Comedy"
+
+    # httpx annotates ASGI apps more narrowly than Starlette does
+    transport = ASGITransport(app=app)  # type: ignore[arg-type]
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        yield client
+
+
+@pytest.mark.parametrize(("first_url", "second_url"), SAME_REQUESTS)
+async def test_share_entry_of_same_requests(
+    films_client: AsyncClient,
+    renders: list[str],
+    first_url: str,
+    second_url: str,
+):
+    # Act
+    first = await films_client.get(first_url)
+    second = await films_client.get(second_url)
+
+    # Assert
+    assert first.status_code == second.status_code == 200
+    assert len(renders) == 1
+
+
+@pytest.mark.parametrize(("first_url", "second_url"), DIFFERENT_REQUESTS)
+async def test_separate_entries_of_different_requests(
+    films_client: AsyncClient,
+    renders: list[str],
+    first_url: str,
+    second_url: str,
+):
+    # Act
+    first = await films_client.get(first_url)
+    second = await films_client.get(second_url)
+
+    # Assert
+    assert first.status_code == second.status_code == 200
+    assert len(renders) == 2
+
+
+@pytest.mark.usefixtures("cache_backend")
+def test_build_readable_key_from_sorted_params():
+    # Act
+    key = key_builder(
+        func,
+        "films",
+        kwargs={
+            "sort_params": SortParams(sort="-rating"),
+            "query": "star wars",
+            "genre": None,
+            "film_service": object(),
+        },
+    )
+
+    # Assert
+    assert key == "fastapi-cache:films:func:query=star+wars&sort=-rating"
+
+
+@pytest.mark.usefixtures("cache_backend")
+def test_build_same_key_from_reordered_params():
+    # Act
+    first = key_builder(func, "films", kwargs={"query": "star", "genre": "Comedy"})
+    second = key_builder(func, "films", kwargs={"genre": "Comedy", "query": "star"})
+
+    # Assert
+    assert first == second
+
+
+def test_normalize_only_listed_params():
+    # Act
+    params = normalize_params(
+        {"query": " Star  Wars", "genre": None, "sort": "Rating"},
+        {"query": normalize_text, "genre": normalize_text},
+    )
+
+    # Assert
+    assert params == {"query": "star wars", "genre": None, "sort": "Rating"}
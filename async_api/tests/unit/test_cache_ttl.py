@@ -0,0 +1,78 @@
+import pytest
+
+from core.settings import settings
+from utils.cache import get_ttl, hot_keys, spread_ttl
+
+
+@pytest.fixture()
+def _no_jitter(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(settings, "cache_ttl_jitter", 0)
+
+
+@pytest.mark.usefixtures("_no_jitter")
+@pytest.mark.parametrize(
+    ("namespace", "endpoint", "expire", "expected_ttl"),
+    [
+        ("films", "get_film_list", 30, 10),
+        ("films", "search_films", 30, 20),
+        ("persons", "search_persons", 30, 30),
+        ("persons", "search_persons", None, settings.cache_ttl_seconds),
+    ],
+)
+def test_take_most_specific_ttl(
+    monkeypatch: pytest.MonkeyPatch,
+    namespace: str,
+    endpoint: str,
+    expire: int | None,
+    expected_ttl: int,
+):
+    # Arrange
+    monkeypatch.setattr(settings, "cache_ttl_policy", {"films:get_film_list": 10, "films": 20})
+
+    # Act
+    ttl = get_ttl(namespace, endpoint, expire)
+
+    # Assert
+    assert ttl == expected_ttl
+
+
+@pytest.mark.usefixtures("_no_jitter")
+@pytest.mark.parametrize(
+    ("cache_key", "expected_ttl"),
+    [("hottest", 300), ("hot", 200), ("cold", 100)],
+)
+def test_extend_ttl_of_popular_keys(
+    monkeypatch: pytest.MonkeyPatch,
+    cache_key: str,
+    expected_ttl: int,
+):
+    # Arrange
+    monkeypatch.setattr(settings, "cache_ttl_popularity_factor", 3)
+    monkeypatch.setattr(hot_keys, "popularity", {"hottest": 1.0, "hot": 0.5})
+
+    # Act
+    ttl = get_ttl("films", "get_film_list", 100, cache_key)
+
+    # Assert
+    assert ttl == expected_ttl
+
+
+def test_spread_ttl_within_jitter(monkeypatch: pytest.MonkeyPatch):
+    # Arrange
+    monkeypatch.setattr(settings, "cache_ttl_jitter", 0.1)
+
+    # Act
+    ttls = {spread_ttl(1000) for _ in range(1000)}
+
+    # Assert
+    assert min(ttls) >= 900
+    assert max(ttls) <= 1100
+    assert len(ttls) > 1
+
+
+def test_keep_spread_ttl_positive():
+    # Act
+    ttl = spread_ttl(0.1)
+
+    # Assert
+    assert ttl == 1
@@ -0,0 +1,37 @@
+from fakeredis.aioredis import FakeRedis
+from httpx import AsyncClient
+
+from tests.unit.conftest import ItemsApp
+from utils.cache_warmer import CacheWarmer
+
+HOT_KEYS = "fastapi-cache:hot-keys"
+
+
+async def test_warm_up_empty_cache_with_saved_paths(
+    redis_client: FakeRedis,
+    items_app: ItemsApp,
+    test_client: AsyncClient,
+):
+    # Arrange
+    await redis_client.zadd(HOT_KEYS, {"/items/1": 5, "/items/404": 3})
+    warmer = CacheWarmer(items_app.app, redis_client, HOT_KEYS)
+
+    # Act
+    await warmer.warm_up()
+    responses = [await test_client.get(path) for path in ("/items/1", "/items/404")]
+
+    # Assert
+    assert sorted(items_app.renders) == ["1", "404"]
+    assert [response.status_code for response in responses] == [200, 404]
+    assert await redis_client.exists("fastapi-cache:items:get_item:item_id=1")
+
+
+async def test_skip_warm_up_without_saved_paths(redis_client: FakeRedis, items_app: ItemsApp):
+    # Arrange
+    warmer = CacheWarmer(items_app.app, redis_client, HOT_KEYS)
+
+    # Act
+    await warmer.warm_up()
+
+    # Assert
+    assert items_app.renders == []
@@ -0,0 +1,165 @@
+import contextlib
+
+import pytest
+
+from utils.circuit_breaker import CircuitBreaker, CircuitOpenError
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class ServiceDownError(Exception):
+    pass
+
+
+class NotFoundError(Exception):
+    pass
+
+
+def is_failure(error: Exception) -> bool | None:
+    if isinstance(error, TimeoutError):
+        return None
+    return isinstance(error, ServiceDownError)
+
+
+async def succeed() -> str:
+    return "ok"
+
+
+async def fail() -> str:
+    raise ServiceDownError
+
+
+async def not_found() -> str:
+    raise NotFoundError
+
+
+async def time_out() -> str:
+    raise TimeoutError
+
+
+@pytest.fixture()
+def clock() -> FakeClock:
+    return FakeClock()
+
+
+@pytest.fixture()
+def breaker(clock: FakeClock) -> CircuitBreaker:
+    return CircuitBreaker("service", failure_threshold=3, recovery_seconds=10, clock=clock)
+
+
+async def call_failing(breaker: CircuitBreaker, times: int) -> None:
+    for _ in range(times):
+        with pytest.raises(ServiceDownError):
+            await breaker.call(fail, is_failure)
+
+
+async def test_open_after_consecutive_failures(breaker: CircuitBreaker):
+    # Act
+    await call_failing(breaker, 2)
+    closed_after_two = not breaker.is_open
+    await call_failing(breaker, 1)
+
+    # Assert
+    assert closed_after_two
+    assert breaker.is_open
+    with pytest.raises(CircuitOpenError):
+        await breaker.call(succeed, is_failure)
+
+
+@pytest.mark.parametrize("interruption", [succeed, not_found])
+async def test_success_resets_failures(breaker: CircuitBreaker, interruption):
+    # Arrange
+    await call_failing(breaker, 2)
+
+    # Act
+    with contextlib.suppress(NotFoundError):
+        await breaker.call(interruption, is_failure)
+    await call_failing(breaker, 2)
+
+    # Assert
+    assert not breaker.is_open
+
+
+async def test_neutral_errors_are_not_counted(breaker: CircuitBreaker):
+    # Arrange
+    await call_failing(breaker, 2)
+
+    # Act
+    with pytest.raises(TimeoutError):
+        await breaker.call(time_out, is_failure)
+
+    # Assert
+    assert breaker.failures == 2
+    assert not breaker.is_open
+
+
+async def test_retry_after_counts_down(breaker: CircuitBreaker, clock: FakeClock):
+    # Arrange
+    await call_failing(breaker, 3)
+    clock.now += 4
+
+    # Act
+    with pytest.raises(CircuitOpenError) as error:
+        await breaker.call(succeed, is_failure)
+
+    # Assert
+    assert error.value.retry_after == pytest.approx(6)
+
+
+async def test_close_after_successful_probe(breaker: CircuitBreaker, clock: FakeClock):
+    # Arrange
+    await call_failing(breaker, 3)
+    clock.now += 10
+
+    # Act
+    result = await breaker.call(succeed, is_failure)
+
+    # Assert
+    assert result == "ok"
+    assert not breaker.is_open
+    assert breaker.failures == 0
+
+
+async def test_reopen_after_failed_probe(breaker: CircuitBreaker, clock: FakeClock):
+    # Arrange
+    await call_failing(breaker, 3)
+    clock.now += 10
+
+    # Act
+    await call_failing(breaker, 1)
+
+    # Assert
+    assert breaker.is_open
+    with pytest.raises(CircuitOpenError) as error:
+        await breaker.call(succeed, is_failure)
+    assert error.value.retry_after == pytest.approx(10)
+
+
+async def test_let_single_probe_through(breaker: CircuitBreaker, clock: FakeClock):
+    # Arrange
+    await call_failing(breaker, 3)
+    clock.now += 10
+    probe_started = False
+
+    async def probe() -> str:
+        nonlocal probe_started
+        probe_started = True
+        # a concurrent call arrives while the probe is in flight
+        with pytest.raises(CircuitOpenError) as error:
+            await breaker.call(succeed, is_failure)
+        assert error.value.retry_after == 0
+        return "ok"
+
+    # Act
+    result = await breaker.call(probe, is_failure)
+
+    # Assert
+    assert probe_started
+    assert result == "ok"
+    assert not breaker.is_open
@@ -0,0 +1,63 @@
+from typing import Any
+
+import asyncio
+
+import pytest
+
+from elastic_transport import ConnectionTimeout
+
+from core.settings import settings
+from db.elastic import GuardedElasticsearch, breaker
+from utils.latency_budget import LatencyBudget, LatencyBudgetExceededError, latency_budget
+
+
+@pytest.fixture()
+async def elastic(monkeypatch: pytest.MonkeyPatch):
+    async def time_out(*_args: Any, request_timeout: Any = None, **_kwargs: Any) -> Any:
+        await asyncio.sleep(request_timeout if isinstance(request_timeout, float) else 0)
+        msg = "Connection timed out"
+        raise ConnectionTimeout(msg)
+
+    monkeypatch.setattr(breaker, "failure_threshold", 1)
+    monkeypatch.setattr(breaker, "failures", 0)
+    monkeypatch.setattr(breaker, "opened_at", None)
+    client = GuardedElasticsearch("http://localhost:9200")
+    monkeypatch.setattr(client.transport, "perform_request", time_out)
+    yield client
+    await client.close()
+
+
+@pytest.fixture()
+def _tiny_budget(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(settings, "request_budget_ms", 20)
+    token = latency_budget.set(LatencyBudget({"type": "http"}))
+    yield
+    latency_budget.reset(token)
+
+
+@pytest.mark.usefixtures("_tiny_budget")
+@pytest.mark.parametrize("msearch_window_ms", [0, 1])
+async def test_budget_timeout_keeps_breaker_closed(
+    elastic: GuardedElasticsearch,
+    monkeypatch: pytest.MonkeyPatch,
+    msearch_window_ms: float,
+):
+    # Arrange
+    monkeypatch.setattr(settings, "es_msearch_window_ms", msearch_window_ms)
+
+    # Act
+    with pytest.raises(LatencyBudgetExceededError):
+        await elastic.search(index="movies", query={"match_all": {}})
+
+    # Assert
+    assert not breaker.is_open
+    assert breaker.failures == 0
+
+
+async def test_timeout_without_budget_opens_breaker(elastic: GuardedElasticsearch):
+    # Act
+    with pytest.raises(ConnectionTimeout):
+        await elastic.search(index="movies", query={"match_all": {}})
+
+    # Assert
+    assert breaker.is_open
@@ -0,0 +1,76 @@
+import random
+
+from collections import Counter
+
+from utils.heavy_hitters import SpaceSaving
+
+
+def skewed_stream(keys: int, length: int) -> list[str]:
+    """Stream of keys with Zipf-like frequencies: the key `n` is `n + 1` times rarer than `0`."""
+    rng = random.Random(42)
+    return rng.choices(
+        [str(key) for key in range(keys)],
+        [1 / (key + 1) for key in range(keys)],
+        k=length,
+    )
+
+
+def test_find_most_frequent_keys_of_skewed_stream():
+    # Arrange
+    sketch = SpaceSaving(50)
+
+    # Act
+    for key in skewed_stream(1000, 10_000):
+        sketch.add(key)
+
+    # Assert
+    assert [key for key, _ in sketch.top(3)] == ["0", "1", "2"]
+
+
+def test_bound_errors_of_counts():
+    # Arrange
+    sketch = SpaceSaving(50)
+    stream = skewed_stream(1000, 10_000)
+
+    # Act
+    for key in stream:
+        sketch.add(key)
+
+    # Assert
+    counts = Counter(stream)
+    max_error = len(stream) / sketch.capacity
+    assert len(sketch) == sketch.capacity
+    for key, count in sketch.counts.items():
+        assert counts[key] <= count <= counts[key] + max_error
+    for key, count in counts.items():
+        if count > max_error:
+            assert key in sketch.counts
+
+
+def test_replace_least_counted_key():
+    # Arrange
+    sketch = SpaceSaving(2)
+    sketch.add("a", 2)
+    sketch.add("b")
+
+    # Act
+    evicted = sketch.add("c")
+
+    # Assert
+    assert evicted == "b"
+    assert sketch.counts == {"a": 2, "c": 2}
+
+
+def test_let_recent_keys_take_over_after_decay():
+    # Arrange
+    sketch = SpaceSaving(2)
+    sketch.add("old", 10)
+    sketch.add("older", 5)
+
+    # Act
+    sketch.decay(0.1)
+    evicted = sketch.add("new", 2)
+
+    # Assert
+    assert evicted == "older"
+    assert sketch.top(1) == [("new", 2.5)]
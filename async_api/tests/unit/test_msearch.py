@@ -0,0 +1,160 @@
+from typing import Any
+
+import asyncio
+
+from collections.abc import Sequence
+
+import pytest
+
+from utils.msearch import MultiSearchBatcher, Search
+
+
+class FakeMultiSearch:
+    """Answers every search with its body, or with the given responses."""
+
+    def __init__(
+        self,
+        responses: Sequence[Any] | Exception | None = None,
+        delay: float = 0,
+    ) -> None:
+        self.responses = responses
+        self.delay = delay
+        self.batches: list[tuple[list[Search], float | None]] = []
+
+    async def __call__(self, searches: Sequence[Search], request_timeout: float | None) -> Any:
+        self.batches.append((list(searches), request_timeout))
+        await asyncio.sleep(self.delay)
+        if isinstance(self.responses, Exception):
+            raise self.responses
+        return self.responses if self.responses is not None else [body for _, body in searches]
+
+
+async def search(batcher: MultiSearchBatcher, number: int, timeout: float | None = None) -> Any:
+    return await batcher.search({"index": "movies"}, {"size": number}, timeout)
+
+
+async def test_send_batch_of_max_size_at_once():
+    # Arrange
+    send = FakeMultiSearch()
+    batcher = MultiSearchBatcher(send, window_seconds=10, max_size=2)
+
+    # Act
+    responses = await asyncio.wait_for(
+        asyncio.gather(search(batcher, 1), search(batcher, 2)),
+        timeout=1,
+    )
+
+    # Assert
+    assert list(responses) == [{"size": 1}, {"size": 2}]
+    assert len(send.batches) == 1
+
+
+async def test_send_batch_when_window_passes():
+    # Arrange
+    send = FakeMultiSearch()
+    batcher = MultiSearchBatcher(send, window_seconds=0.01, max_size=10)
+
+    # Act
+    responses = await asyncio.gather(*(search(batcher, number) for number in range(3)))
+
+    # Assert
+    assert responses == [{"size": 0}, {"size": 1}, {"size": 2}]
+    assert [len(searches) for searches, _ in send.batches] == [3]
+
+
+@pytest.mark.parametrize(
+    ("timeouts", "expected"),
+    [([0.5, 0.2], 0.5), ([0.5, None], None)],
+)
+async def test_send_batch_with_longest_timeout(
+    timeouts: list[float | None],
+    expected: float | None,
+):
+    # Arrange
+    send = FakeMultiSearch()
+    batcher = MultiSearchBatcher(send, window_seconds=0.01, max_size=10)
+
+    # Act
+    await asyncio.gather(*(search(batcher, 1, timeout) for timeout in timeouts))
+
+    # Assert
+    assert send.batches[0][1] == expected
+
+
+async def test_fail_search_with_its_error():
+    # Arrange
+    error = ValueError("search failed")
+    send = FakeMultiSearch([{"hits": []}, error])
+    batcher = MultiSearchBatcher(send, window_seconds=0.01, max_size=10)
+
+    # Act
+    responses = await asyncio.gather(search(batcher, 1), search(batcher, 2), return_exceptions=True)
+
+    # Assert
+    assert list(responses) == [{"hits": []}, error]
+
+
+async def test_fail_all_searches_with_error_of_batch():
+    # Arrange
+    error = ConnectionError("msearch failed")
+    send = FakeMultiSearch(error)
+    batcher = MultiSearchBatcher(send, window_seconds=0.01, max_size=10)
+
+    # Act
+    responses = await asyncio.gather(search(batcher, 1), search(batcher, 2), return_exceptions=True)
+
+    # Assert
+    assert list(responses) == [error, error]
+
+
+async def test_fail_searches_without_responses():
+    # Arrange
+    send = FakeMultiSearch([{"hits": []}])
+    batcher = MultiSearchBatcher(send, window_seconds=0.01, max_size=10)
+
+    # Act
+    responses = await asyncio.wait_for(
+        asyncio.gather(search(batcher, 1), search(batcher, 2), return_exceptions=True),
+        timeout=1,
+    )
+
+    # Assert
+    assert responses[0] == {"hits": []}
+    assert isinstance(responses[1], ValueError)
+
+
+async def test_skip_search_cancelled_within_window():
+    # Arrange
+    send = FakeMultiSearch()
+    batcher = MultiSearchBatcher(send, window_seconds=0.01, max_size=10)
+    cancelled = asyncio.create_task(search(batcher, 1))
+    waiting = asyncio.create_task(search(batcher, 2))
+    await asyncio.sleep(0)
+
+    # Act
+    cancelled.cancel()
+    response = await waiting
+
+    # Assert
+    assert response == {"size": 2}
+    assert [body for searches, _ in send.batches for _, body in searches] == [{"size": 2}]
+
+
+async def test_cancel_searches_of_cancelled_batch():
+    # Arrange
+    send = FakeMultiSearch(delay=10)
+    batcher = MultiSearchBatcher(send, window_seconds=0, max_size=10)
+    searches = [asyncio.create_task(search(batcher, number)) for number in range(2)]
+    while not send.batches:
+        await asyncio.sleep(0.001)
+
+    # Act
+    for task in batcher._send_tasks:  # noqa: SLF001
+        task.cancel()
+    responses = await asyncio.wait_for(
+        asyncio.gather(*searches, return_exceptions=True),
+        timeout=1,
+    )
+
+    # Assert
+    assert all(isinstance(response, asyncio.CancelledError) for response in responses)
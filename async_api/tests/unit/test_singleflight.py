@@ -0,0 +1,112 @@
+import asyncio
+
+import pytest
+
+from fakeredis.aioredis import FakeRedis
+from httpx import AsyncClient
+
+from core.settings import settings
+from tests.unit.conftest import ItemsApp
+from utils import cache
+from utils.cache import CachedResponse, get_storage_ttl, set_cached
+from utils.singleflight import SingleFlight
+
+CACHE_KEY = "fastapi-cache:items:get_item:item_id=1"
+
+
+class Render:
+    """Render which waits for the gate, so the callers join it while it is in flight."""
+
+    def __init__(self, error: Exception | None = None) -> None:
+        self.error = error
+        self.calls = 0
+        self.gate = asyncio.Event()
+
+    async def __call__(self) -> str:
+        self.calls += 1
+        await self.gate.wait()
+        if self.error is not None:
+            raise self.error
+        return "rendered"
+
+
+async def test_call_once_for_concurrent_callers():
+    # Arrange
+    single_flight = SingleFlight()
+    render = Render()
+    callers = [asyncio.create_task(single_flight.do("key", render)) for _ in range(10)]
+    await asyncio.sleep(0)
+
+    # Act
+    render.gate.set()
+    results = await asyncio.gather(*callers)
+
+    # Assert
+    assert results == ["rendered"] * 10
+    assert render.calls == 1
+    assert not single_flight.in_flight("key")
+
+
+async def test_deliver_error_to_all_callers():
+    # Arrange
+    single_flight = SingleFlight()
+    render = Render(ValueError("render failed"))
+    callers = [asyncio.create_task(single_flight.do("key", render)) for _ in range(10)]
+    await asyncio.sleep(0)
+
+    # Act
+    render.gate.set()
+    results = await asyncio.gather(*callers, return_exceptions=True)
+
+    # Assert
+    assert results == [render.error] * 10
+    assert render.calls == 1
+    assert not single_flight.in_flight("key")
+
+
+async def test_call_again_after_error():
+    # Arrange
+    single_flight = SingleFlight()
+    render = Render(ValueError("render failed"))
+    render.gate.set()
+    with pytest.raises(ValueError, match="render failed"):
+        await single_flight.do("key", render)
+    render.error = None
+
+    # Act
+    result = await single_flight.do("key", render)
+
+    # Assert
+    assert result == "rendered"
+    assert render.calls == 2
+
+
+async def test_pick_up_entry_written_by_lock_holder(
+    redis_client: FakeRedis,
+    items_app: ItemsApp,
+    test_client: AsyncClient,
+    monkeypatch: pytest.MonkeyPatch,
+):
+    # Arrange
+    single_flight = SingleFlight(redis_client, lock_timeout=5)
+    monkeypatch.setattr(cache, "single_flight", single_flight)
+    lock = redis_client.lock(f"{CACHE_KEY}:lock", timeout=5)
+    await lock.acquire()
+    request = asyncio.create_task(test_client.get("/items/1"))
+    while not single_flight.in_flight(CACHE_KEY):
+        await asyncio.sleep(0)
+
+    # Act
+    written = CachedResponse(b'{"id":"1","name":"written"}', media_type="application/json")
+    await set_cached(
+        CACHE_KEY,
+        written,
+        get_storage_ttl(60 + settings.cache_stale_ttl_seconds),
+        ["items:1"],
+    )
+    await lock.release()
+    response = await request
+
+    # Assert
+    assert response.json() == {"id": "1", "name": "written"}
+    assert items_app.renders == []
@@ -0,0 +1,255 @@
+from typing import Any
+
+import json
+
+from pathlib import Path
+from uuid import UUID
+
+import pytest
+
+from core.settings import settings
+from models.value_objects import SortOrder
+from services.film import InMemoryFilmService
+from services.genre import GenreCatalogLoader, InMemoryGenreService
+from services.pagination import (
+    Cursor,
+    ExpiredCursorError,
+    InvalidCursorError,
+    request_digest,
+    slice_page,
+)
+from services.person import InMemoryPersonService
+from services.snapshot import CatalogSnapshot, UnsupportedSortError
+
+GENRES = {"Action": UUID(int=101), "Comedy": UUID(int=102), "Drama": UUID(int=103)}
+
+
+def film_source(number: int, title: str, rating: float | None, genres: list[str]) -> dict[str, Any]:
+    return {
+        "id": str(UUID(int=number)),
+        "title": title,
+        "imdb_rating": rating,
+        "description": None,
+        "genres": [{"id": str(GENRES[name]), "name": name} for name in genres],
+        "directors_names": [],
+        "actors_names": [],
+        "writers_names": [],
+        "actors": [],
+        "writers": [],
+        "directors": [],
+    }
+
+
+def person_source(number: int, full_name: str) -> dict[str, Any]:
+    return {"id": str(UUID(int=number)), "full_name": full_name, "films": []}
+
+
+@pytest.fixture()
+def snapshot_path(tmp_path: Path) -> Path:
+    documents = [
+        (settings.es_films_index, film_source(1, "The Star Wars", 8.6, ["Action"])),
+        (settings.es_films_index, film_source(2, "Star Trek", 7.9, ["Action", "Drama"])),
+        (settings.es_films_index, film_source(3, "Drama Queen", None, ["Drama"])),
+        (settings.es_films_index, film_source(4, "Quiet Night", 6.5, ["Drama"])),
+        (settings.es_films_index, film_source(5, "Another Star", 7.9, ["Comedy"])),
+        (settings.es_persons_index, person_source(11, "George Lucas")),
+        (settings.es_persons_index, person_source(12, "Harrison Ford")),
+        (settings.es_persons_index, person_source(13, "Mark Hamill")),
+        *(
+            (settings.es_genres_index, {"id": str(id_), "name": name})
+            for name, id_ in GENRES.items()
+        ),
+        ("other", {"id": "1"}),
+    ]
+    lines = [json.dumps({"_index": index, "_source": source}) for index, source in documents]
+    path = tmp_path / "snapshot.ndjson"
+    path.write_text("\n".join([*lines, ""]) + "\n")
+    return path
+
+
+@pytest.fixture()
+def snapshot(snapshot_path: Path) -> CatalogSnapshot:
+    return CatalogSnapshot.load(snapshot_path)
+
+
+def film_numbers(films: list[Any]) -> list[int]:
+    return [film.id.int for film in films]
+
+
+def test_load_snapshot(snapshot_path: Path, snapshot: CatalogSnapshot):
+    # Assert
+    assert len(snapshot.films) == 5
+    assert len(snapshot.persons) == 3
+    assert [genre.name for genre in snapshot.genres.genres] == ["Action", "Comedy", "Drama"]
+    assert snapshot.version == CatalogSnapshot.load(snapshot_path).version
+
+
+@pytest.mark.parametrize(
+    ("sort_order", "expected"),
+    [(SortOrder.desc, [1, 2, 5, 4, 3]), (SortOrder.asc, [4, 2, 5, 1, 3])],
+)
+async def test_list_films_sorted_by_rating(
+    snapshot: CatalogSnapshot,
+    sort_order: SortOrder,
+    expected: list[int],
+):
+    # Arrange
+    service = InMemoryFilmService(snapshot)
+
+    # Act
+    page = await service.get_list(sort_by="imdb_rating", sort_order=sort_order)
+
+    # Assert
+    assert film_numbers(page.items) == expected
+    assert page.next_cursor is None
+
+
+@pytest.mark.parametrize(
+    ("genre", "expected"),
+    [("drama", [2, 3, 4]), ("Action", [1, 2]), ("Western", [])],
+)
+async def test_list_films_filter_by_genre(
+    snapshot: CatalogSnapshot,
+    genre: str,
+    expected: list[int],
+):
+    # Arrange
+    service = InMemoryFilmService(snapshot)
+
+    # Act
+    page = await service.get_list(genre=genre)
+
+    # Assert
+    assert film_numbers(page.items) == expected
+
+
+async def test_list_films_sorted_by_unsupported_field(snapshot: CatalogSnapshot):
+    # Arrange
+    service = InMemoryFilmService(snapshot)
+
+    # Act, Assert
+    with pytest.raises(UnsupportedSortError):
+        await service.get_list(sort_by="description")
+
+
+async def test_list_films_by_pages(snapshot: CatalogSnapshot):
+    # Arrange
+    service = InMemoryFilmService(snapshot)
+
+    # Act
+    pages = [await service.get_list(page=page, size=2) for page in (1, 2, 3, 4)]
+
+    # Assert
+    assert [film_numbers(page.items) for page in pages] == [[1, 2], [3, 4], [5], []]
+
+
+async def test_list_films_by_cursor(snapshot: CatalogSnapshot):
+    # Arrange
+    service = InMemoryFilmService(snapshot)
+
+    # Act
+    pages = []
+    cursor: str | None = ""
+    while cursor is not None:
+        page = await service.get_list(size=2, sort_by="title.raw", cursor=cursor)
+        pages.append(film_numbers(page.items))
+        cursor = page.next_cursor
+
+    # Assert
+    assert pages == [[5, 3], [4, 2], [1]]
+
+
+async def test_search_films(snapshot: CatalogSnapshot):
+    # Arrange
+    service = InMemoryFilmService(snapshot)
+
+    # Act
+    page = await service.search(query="STAR")
+
+    # Assert
+    assert film_numbers(page.items) == [2, 5, 1]
+
+
+async def test_get_film(snapshot: CatalogSnapshot):
+    # Arrange
+    service = InMemoryFilmService(snapshot)
+
+    # Act
+    film = await service.get_or_none(UUID(int=4))  # type: ignore[arg-type]
+    missing = await service.get_or_none(UUID(int=404))  # type: ignore[arg-type]
+
+    # Assert
+    assert film is not None
+    assert film.title == "Quiet Night"
+    assert missing is None
+
+
+async def test_search_persons(snapshot: CatalogSnapshot):
+    # Arrange
+    service = InMemoryPersonService(snapshot)
+
+    # Act
+    found = await service.search(query="ford")
+    all_persons = await service.search(page=2, size=2)
+
+    # Assert
+    assert [person.full_name for person in found.items] == ["Harrison Ford"]
+    assert [person.full_name for person in all_persons.items] == ["Mark Hamill"]
+
+
+async def test_get_genres(snapshot: CatalogSnapshot):
+    # Arrange
+    catalog = GenreCatalogLoader()
+    catalog.catalog = snapshot.genres
+    service = InMemoryGenreService(catalog)
+
+    # Act
+    genres = await service.get_list()
+    genre = await service.get_or_none(GENRES["Drama"])  # type: ignore[arg-type]
+
+    # Assert
+    assert [genre.name for genre in genres] == ["Action", "Comedy", "Drama"]
+    assert genre is not None
+    assert genre.name == "Drama"
+
+
+def test_slice_page_by_cursor():
+    # Arrange
+    items = list(range(5))
+
+    # Act
+    first, cursor = slice_page(items, version="v1", index="movies", size=3, cursor="")
+    second, last_cursor = slice_page(items, version="v1", index="movies", size=3, cursor=cursor)
+
+    # Assert
+    assert first == [0, 1, 2]
+    assert second == [3, 4]
+    assert cursor is not None
+    assert last_cursor is None
+
+
+def test_slice_page_by_cursor_of_other_version():
+    # Arrange
+    _, cursor = slice_page(range(5), version="v1", index="movies", size=2, cursor="")
+
+    # Act, Assert
+    with pytest.raises(ExpiredCursorError):
+        slice_page(range(5), version="v2", index="movies", size=2, cursor=cursor)
+
+
+@pytest.mark.parametrize(
+    "cursor",
+    [
+        "invalid",
+        Cursor(pit_id="v1", search_after=[2], index="persons", digest=request_digest(None, None)),
+        Cursor(pit_id="v1", search_after=[-1], index="movies", digest=request_digest(None, None)),
+        Cursor(pit_id="v1", search_after=["2"], index="movies", digest=request_digest(None, None)),
+    ],
+)
+def test_slice_page_by_invalid_cursor(cursor: str | Cursor):
+    # Arrange
+    token = cursor.encode() if isinstance(cursor, Cursor) else cursor
+
+    # Act, Assert
+    with pytest.raises(InvalidCursorError):
+        slice_page(range(5), version="v1", index="movies", size=2, cursor=token)
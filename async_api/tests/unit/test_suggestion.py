@@ -0,0 +1,84 @@
+from typing import Any
+
+import uuid
+
+import pytest
+
+from elastic_transport import ApiResponseMeta, HttpHeaders, NodeConfig, ObjectApiResponse
+from elasticsearch import ApiError, BadRequestError
+
+from db.elastic import breaker
+from services.suggestion import ElasticsearchSuggestionService
+
+FILM_ID = uuid.uuid4()
+FILMS_RESPONSE = {
+    "status": 200,
+    "suggest": {
+        "suggestions": [{"options": [{"_id": str(FILM_ID), "_source": {"title": "Star Wars"}}]}],
+    },
+}
+PERSONS_RESPONSE = {"status": 200, "suggest": {"suggestions": [{"options": []}]}}
+
+
+class FakeElasticsearch:
+    def __init__(self, responses: list[dict[str, Any]]) -> None:
+        self.responses = responses
+
+    async def msearch(self, **_kwargs: Any) -> ObjectApiResponse[Any]:
+        meta = ApiResponseMeta(
+            status=200,
+            http_version="1.1",
+            headers=HttpHeaders(),
+            duration=0.0,
+            node=NodeConfig("http", "localhost", 9200),
+        )
+        return ObjectApiResponse(body={"responses": self.responses}, meta=meta)
+
+
+def create_service(responses: list[dict[str, Any]]) -> ElasticsearchSuggestionService:
+    return ElasticsearchSuggestionService(FakeElasticsearch(responses))  # type: ignore[arg-type]
+
+
+def error_response(status: int, error_type: str) -> dict[str, Any]:
+    return {"status": status, "error": {"type": error_type, "reason": error_type}}
+
+
+@pytest.fixture(autouse=True)
+def _reset_breaker(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(breaker, "failures", 0)
+    monkeypatch.setattr(breaker, "opened_at", None)
+
+
+async def test_suggest():
+    # Arrange
+    service = create_service([FILMS_RESPONSE, PERSONS_RESPONSE])
+
+    # Act
+    suggestions = await service.suggest("sta")
+
+    # Assert
+    assert [(film.id, film.name) for film in suggestions.films] == [(FILM_ID, "Star Wars")]
+    assert suggestions.persons == []
+
+
+async def test_raise_error_of_search():
+    # Arrange
+    service = create_service(
+        [FILMS_RESPONSE, error_response(400, "search_phase_execution_exception")],
+    )
+
+    # Act, Assert
+    with pytest.raises(BadRequestError):
+        await service.suggest("sta")
+    assert breaker.failures == 0
+
+
+async def test_count_server_error_of_search_as_failure():
+    # Arrange
+    service = create_service([error_response(503, "unavailable_shards_exception"), FILMS_RESPONSE])
+
+    # Act, Assert
+    with pytest.raises(ApiError) as error:
+        await service.suggest("sta")
+    assert error.value.meta.status == 503
+    assert breaker.failures == 1
@@ -10,10 +10,12 @@ import tenacity
 from elasticsearch import Elasticsearch
 from loguru import logger
 from psycopg.rows import DictRow, dict_row
+from redis import Redis
 
 from etl.extractor import PostgresExtractor
 from etl.loader import ElasticsearchLoader
 from etl.pipeline import ETL
+from etl.publisher import RedisUpdatesPublisher
 from etl.settings import settings
 from etl.state import ETLState, StateManager
 from etl.storage.file_storage import JsonFileStorage
@@ -57,10 +59,25 @@ def get_es_connection() -> Iterator[Elasticsearch]:
         yield es_client
 
 
+@contextmanager
+def get_redis_connection() -> Iterator[Redis]:
+    with contextlib.closing(Redis.from_url(str(settings.redis_url))) as redis_client:
+        yield redis_client
+
+
 @contextmanager
 def get_etl() -> Iterator[ETL]:
-    with get_pg_connection() as pg_conn, get_es_connection() as es_client:
+    with (
+        get_pg_connection() as pg_conn,
+        get_es_connection() as es_client,
+        get_redis_connection() as redis_client,
+    ):
         extractor = PostgresExtractor(pg_conn)
         loader = ElasticsearchLoader(es_client)
+        publisher = RedisUpdatesPublisher(
+            redis_client,
+            settings.cache_invalidation_stream,
+            settings.cache_invalidation_stream_max_length,
+        )
         state_manager = get_state_manager()
-        yield ETL(state_manager, extractor, loader, settings)
+        yield ETL(state_manager, extractor, loader, publisher, settings)
@@ -57,6 +57,7 @@ class PersonElasticsearchRecord(BaseElasticsearchRecord):
     """Модель для хранения информации о персоне в индексе Elasticsearch."""
 
     full_name: str
+    full_name_suggest: list[str]
     films: list[PersonFilmWorkElasticsearchRecord]
 
 
@@ -66,6 +67,7 @@ class FilmWorkElasticsearchRecord(BaseElasticsearchRecord):
 
     imdb_rating: float
     title: str
+    title_suggest: list[str]
     description: str
     genres: list[GenreMinimalElasticsearchRecord]
     directors_names: list[str]
@@ -36,6 +36,8 @@ class ElasticsearchLoader:
                 {"_index": index, "_id": str(record.id), "_source": dataclasses.asdict(record)}
                 for record in records
             ],
+            # documents must be searchable before the API is notified to drop its cache
+            refresh="wait_for",
         )
         logger.info(
             "Inserted {} documents into Elasticsearch",
@@ -3,6 +3,7 @@ from loguru import logger
 from etl import dto, transformer
 from etl.extractor import PostgresExtractor
 from etl.loader import ElasticsearchLoader
+from etl.publisher import RedisUpdatesPublisher
 from etl.settings import Settings
 from etl.state import ETLState, StateManager
 
@@ -11,7 +12,8 @@ class ETL:
     """Класс, отвечающий за выполнение ETL-процесса.
 
     Предоставляет функции для синхронизации обновлений жанров, персон и
-    фильмов из PostgreSQL в Elasticsearch.
+    фильмов из PostgreSQL в Elasticsearch. После загрузки документов
+    оповещает API об их обновлении, чтобы сбросить кеш.
     """
 
     def __init__(
@@ -19,11 +21,13 @@ class ETL:
         state_manager: StateManager[ETLState],
         extractor: PostgresExtractor,
         loader: ElasticsearchLoader,
+        publisher: RedisUpdatesPublisher,
         settings: Settings,
     ) -> None:
         self.state_manager = state_manager
         self.extractor = extractor
         self.loader = loader
+        self.publisher = publisher
         self.settings = settings
 
     def synchronize_person_updates(self) -> None:
@@ -112,6 +116,9 @@ class ETL:
             genres_info,
         )
         self.loader.load_genres_records(genres_elasticsearch_records)
+        self.publisher.publish_genres_updates(
+            [record.id for record in genres_elasticsearch_records],
+        )
 
     def _update_persons_in_elasticsearch(self, persons: list[dto.PersonIdModified]) -> None:
         """Обновляет данные о персонах в Elasticsearch."""
@@ -125,6 +132,9 @@ class ETL:
             persons_film_works,
         )
         self.loader.load_persons_records(persons_elasticsearch_records)
+        self.publisher.publish_persons_updates(
+            [record.id for record in persons_elasticsearch_records],
+        )
 
     def _update_film_works_in_elasticsearch(self, film_works: list[dto.FilmWorkIdModified]) -> None:
         """Обновляет данные о фильмах в Elasticsearch."""
@@ -140,3 +150,6 @@ class ETL:
             film_works_persons=film_works_persons,
         )
         self.loader.load_film_works_records(film_works_elasticsearch_records)
+        self.publisher.publish_film_works_updates(
+            [record.id for record in film_works_elasticsearch_records],
+        )
@@ -0,0 +1,55 @@
+import json
+
+from collections.abc import Sequence
+from uuid import UUID
+
+import tenacity
+
+from loguru import logger
+from redis import ConnectionError as RedisConnectionError
+from redis import Redis
+
+from etl.settings import settings
+
+retry = tenacity.retry(
+    before_sleep=tenacity.before_sleep_log(logger, "ERROR"),  # type: ignore[arg-type]
+    after=tenacity.after_log(logger, "INFO"),  # type: ignore[arg-type]
+    retry=tenacity.retry_if_exception_type(RedisConnectionError),
+    wait=settings.retry_policy,
+)
+
+
+class RedisUpdatesPublisher:
+    """Класс, отвечающий за оповещение API об обновлённых документах.
+
+    События публикуются в Redis Stream, чтобы API могло сбросить кеш
+    обновлённых документов, в том числе после собственного перезапуска.
+    """
+
+    def __init__(self, client: Redis, stream: str, max_length: int) -> None:
+        self._client = client
+        self._stream = stream
+        self._max_length = max_length
+
+    @retry
+    def _publish(self, entity: str, ids: Sequence[UUID]) -> None:
+        """Публикует событие об обновлении документов заданной сущности."""
+        self._client.xadd(
+            self._stream,
+            {"entity": entity, "ids": json.dumps([str(id_) for id_ in ids])},
+            maxlen=self._max_length,
+            approximate=True,
+        )
+        logger.info("Published updates of {} {} to {}", len(ids), entity, self._stream)
+
+    def publish_film_works_updates(self, film_works_ids: Sequence[UUID]) -> None:
+        """Оповещает об обновлении фильмов."""
+        self._publish("films", film_works_ids)
+
+    def publish_genres_updates(self, genres_ids: Sequence[UUID]) -> None:
+        """Оповещает об обновлении жанров."""
+        self._publish("genres", genres_ids)
+
+    def publish_persons_updates(self, persons_ids: Sequence[UUID]) -> None:
+        """Оповещает об обновлении персон."""
+        self._publish("persons", persons_ids)
@@ -2,7 +2,7 @@ from pathlib import Path
 
 import tenacity
 
-from pydantic import PostgresDsn
+from pydantic import PostgresDsn, RedisDsn
 from pydantic_settings import BaseSettings
 from tenacity import wait_random_exponential
 
@@ -18,6 +18,11 @@ class Settings(BaseSettings):
     # Database
     postgres_dsn: PostgresDsn
     elasticsearch_host: str
+    redis_url: RedisDsn
+
+    # API cache invalidation
+    cache_invalidation_stream: str = "cache-invalidation"
+    cache_invalidation_stream_max_length: int = 10000
 
     # Jobs run configuration
     persons_per_run: int = 100
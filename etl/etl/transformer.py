@@ -8,6 +8,15 @@ if TYPE_CHECKING:
     from uuid import UUID
 
 
+def build_suggest_inputs(text: str) -> list[str]:
+    """Строит варианты ввода для автодополнения: текст, начиная с каждого из его слов.
+
+    Так подсказки находятся по началу любого слова, а не только первого.
+    """
+    words = text.split()
+    return [" ".join(words[position:]) for position in range(len(words))]
+
+
 def build_film_works_elasticsearch_records(
     film_works_info: list[dto.FilmWorkInfo],
     film_works_genres: list[dto.FilmWorkGenreRecord],
@@ -29,6 +38,7 @@ def build_film_works_elasticsearch_records(
                 for genre in genres_by_film_work_id[film_work_info.id]
             ],
             title=film_work_info.title,
+            title_suggest=build_suggest_inputs(film_work_info.title),
             description=film_work_info.description,
             directors_names=[
                 fwp.person_full_name
@@ -91,6 +101,7 @@ def build_persons_elasticsearch_records(
         dto.PersonElasticsearchRecord(
             id=person_info.id,
             full_name=person_info.full_name,
+            full_name_suggest=build_suggest_inputs(person_info.full_name),
             films=[
                 dto.PersonFilmWorkElasticsearchRecord(
                     id=film.film_work_id,